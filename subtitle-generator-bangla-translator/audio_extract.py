@@ -0,0 +1,173 @@
+import os
+import re
+import shutil
+import subprocess
+
+import tracing
+from translators import Cancelled
+
+# Audio Extraction
+#
+# Pulls the audio track out of a video with ffmpeg directly. When the track is
+# already in the requested format it is copied as-is (no decoding at all);
+# otherwise only the audio is decoded, never the video.
+
+# Output extension -> audio codecs that can be stream-copied into it unchanged.
+COPY_CODECS = {
+    'mp3': {'mp3'},
+    'm4a': {'aac', 'alac'},
+    'aac': {'aac'},
+    'flac': {'flac'},
+    'wav': {'pcm_s16le'},
+    'ogg': {'vorbis', 'opus'},
+    'opus': {'opus'},
+}
+
+# Output extension -> ffmpeg encoder used when the stream cannot be copied.
+ENCODERS = {
+    'mp3': ['-c:a', 'libmp3lame', '-q:a', '2'],
+    'm4a': ['-c:a', 'aac', '-b:a', '160k'],
+    'aac': ['-c:a', 'aac', '-b:a', '160k'],
+    'flac': ['-c:a', 'flac'],
+    'wav': ['-c:a', 'pcm_s16le'],
+    'ogg': ['-c:a', 'libvorbis', '-q:a', '5'],
+    'opus': ['-c:a', 'libopus', '-b:a', '96k'],
+}
+
+# What speech-to-text services need: one channel at 16 kHz.
+TRANSCRIPTION_ARGS = ['-ac', '1', '-ar', '16000']
+
+_AUDIO_STREAM_RE = re.compile(r'Stream #\S+.*?: Audio: (\w+)[^\n]*?(\d+) Hz, ([^,\n]+)')
+_DURATION_RE = re.compile(r'Duration: (\d+):(\d+):(\d+(?:\.\d+)?)')
+
+
+def find_ffmpeg():
+    """
+    Locate the ffmpeg executable.
+
+    Looks on PATH first, then falls back to the binary bundled with `imageio-ffmpeg`
+    (installed alongside MoviePy).
+
+    Returns:
+        str: Path to ffmpeg.
+
+    Raises:
+        RuntimeError: If ffmpeg cannot be found.
+    """
+    path = shutil.which('ffmpeg')
+    if path:
+        return path
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except (ImportError, RuntimeError):
+        raise RuntimeError("FFmpeg not found. Install it (see Prerequisites in README.md).")
+
+
+def probe_audio(path):
+    """
+    Read the container duration and first audio stream's format with ffmpeg.
+
+    Args:
+        path (str): Path to a video or audio file.
+
+    Returns:
+        dict: 'codec', 'sample_rate', 'channels' (None if there is no audio stream)
+            and 'duration' in milliseconds (None if unknown).
+    """
+    # `ffmpeg -i` with no output exits with an error but prints the stream info.
+    err = subprocess.run([find_ffmpeg(), '-hide_banner', '-i', path],
+                         capture_output=True, text=True, errors='replace').stderr
+    info = {'codec': None, 'sample_rate': None, 'channels': None, 'duration': None}
+    m = _DURATION_RE.search(err)
+    if m:
+        h, mi, s = m.groups()
+        info['duration'] = int(((int(h) * 60 + int(mi)) * 60 + float(s)) * 1000)
+    m = _AUDIO_STREAM_RE.search(err)
+    if m:
+        info['codec'] = m.group(1)
+        info['sample_rate'] = int(m.group(2))
+        info['channels'] = m.group(3).strip()
+    return info
+
+
+def can_stream_copy(codec, fmt):
+    """
+    Check if an audio stream can be copied into a file of the given format.
+
+    Args:
+        codec (str): ffmpeg codec name of the source stream (e.g. 'aac').
+        fmt (str): Output format / extension (e.g. 'm4a').
+
+    Returns:
+        bool: True if no re-encoding is needed.
+    """
+    return codec in COPY_CODECS.get(fmt, ())
+
+
+def _run_ffmpeg(cmd, out_path, duration_ms, on_progress, cancel_event):
+    # Run ffmpeg, reporting progress from its `-progress` output and killing it on cancel.
+    proc = subprocess.Popen(cmd[:1] + ['-progress', 'pipe:1', '-nostats'] + cmd[1:],
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, errors='replace')
+    for line in proc.stdout:
+        if cancel_event is not None and cancel_event.is_set():
+            proc.kill()
+            proc.wait()
+            if os.path.exists(out_path):
+                os.remove(out_path)
+            raise Cancelled("Audio extraction was cancelled")
+        if on_progress and duration_ms and line.startswith('out_time_us='):
+            value = line.split('=', 1)[1].strip()
+            if value.isdigit():
+                on_progress(min(1.0, int(value) / 1000 / duration_ms))
+    err = proc.stderr.read()
+    if proc.wait() != 0:
+        raise RuntimeError(f"ffmpeg failed: {err.strip()}")
+    if on_progress:
+        on_progress(1.0)
+
+
+def extract_audio(video_path, out_path, for_transcription=False, on_progress=None, cancel_event=None):
+    """
+    Extract the audio track of a video into `out_path`.
+
+    The output format comes from the extension of `out_path`. The track is
+    stream-copied when it is already in that format; otherwise only the audio is
+    decoded and re-encoded. With `for_transcription`, the audio is always
+    downmixed to mono 16 kHz, which makes uploads much smaller.
+
+    Args:
+        video_path (str): Path to the input video (or audio) file.
+        out_path (str): Path of the audio file to write.
+        for_transcription (bool): Produce mono 16 kHz audio for speech-to-text.
+        on_progress (callable): Called with the finished fraction (0.0 to 1.0).
+        cancel_event (threading.Event): When set, stop ffmpeg, delete the partial file
+            and raise `Cancelled`.
+
+    Returns:
+        str: 'copy' if the stream was copied, 'encode' if it was re-encoded.
+
+    Raises:
+        ValueError: If the file has no audio stream or the format is not supported.
+        RuntimeError: If ffmpeg fails.
+        Cancelled: If `cancel_event` was set.
+    """
+    fmt = os.path.splitext(out_path)[1].lstrip('.').lower()
+    if fmt not in ENCODERS:
+        raise ValueError(f"Unsupported audio format: {fmt}")
+    info = probe_audio(video_path)
+    if info['codec'] is None:
+        raise ValueError(f"No audio stream found in {video_path}")
+    cmd = [find_ffmpeg(), '-y', '-v', 'error', '-i', video_path, '-vn', '-sn', '-dn', '-map', '0:a:0']
+    if can_stream_copy(info['codec'], fmt) and not for_transcription:
+        method = 'copy'
+        cmd += ['-c:a', 'copy']
+    else:
+        method = 'encode'
+        if for_transcription:
+            cmd += TRANSCRIPTION_ARGS
+        cmd += ENCODERS[fmt]
+    with tracing.span('extract', method=method, format=fmt, file=os.path.basename(video_path)) as span:
+        _run_ffmpeg(cmd + [out_path], out_path, info['duration'], on_progress, cancel_event)
+        span.set(bytes=os.path.getsize(out_path))
+    return method
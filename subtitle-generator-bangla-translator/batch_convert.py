@@ -0,0 +1,223 @@
+# Convert every video in a directory tree to audio, using all CPU cores.
+# Files whose audio is already up to date are skipped, so a re-run only does new work.
+#
+#   python batch_convert.py "Season 1" --format m4a
+#   python batch_convert.py "Season 1" --format flac --transcription --out audio/
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from audio_extract import extract_audio
+from stage_cache import file_hash
+
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mkv', '.mov', '.wmv')
+MANIFEST_NAME = '.video_to_audio.json'
+
+
+def find_videos(root):
+    """
+    List the video files under a directory, in a stable order.
+
+    Args:
+        root (str): Directory to walk.
+
+    Returns:
+        list: Paths of the video files found.
+    """
+    videos = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            if name.lower().endswith(VIDEO_EXTENSIONS):
+                videos.append(os.path.join(dirpath, name))
+    return videos
+
+
+def output_path_for(video, fmt, root, out_dir=None):
+    """
+    Work out where the audio for a video goes.
+
+    Without `out_dir` the audio sits next to the video; with it, the directory
+    layout under `root` is mirrored inside `out_dir`.
+
+    Returns:
+        str: The output audio path.
+    """
+    base = os.path.splitext(video)[0]
+    if out_dir:
+        base = os.path.join(out_dir, os.path.relpath(base, root))
+    return f"{base}.{fmt}"
+
+
+def is_up_to_date(video, audio, manifest=None, for_transcription=False):
+    """
+    Check if the audio for a video can be reused.
+
+    By default the audio must exist, be non-empty and be newer than the video.
+    With a manifest, the audio must also have been made with the same format and
+    `for_transcription` setting, and the video's content hash must instead match the
+    one recorded when the audio was made. The video is only re-hashed if its size or
+    mtime changed.
+
+    Args:
+        video (str): The source video path.
+        audio (str): The output audio path.
+        manifest (dict): Audio path -> source record from `_source_record`, or None
+            to compare mtimes only.
+        for_transcription (bool): Whether the audio should be mono 16 kHz.
+
+    Returns:
+        bool: True if the conversion can be skipped.
+    """
+    if not os.path.exists(audio) or os.path.getsize(audio) == 0:
+        return False
+    if manifest is None:
+        return os.path.getmtime(audio) >= os.path.getmtime(video)
+    entry = manifest.get(os.path.abspath(audio))
+    if not entry or entry.get('settings') != _settings(audio, for_transcription):
+        return False
+    st = os.stat(video)
+    if entry['size'] == st.st_size and entry['mtime'] == st.st_mtime:
+        return True
+    return entry['hash'] == file_hash(video)
+
+
+def _settings(audio, for_transcription):
+    return {'format': os.path.splitext(audio)[1].lstrip('.').lower(), 'for_transcription': for_transcription}
+
+
+def _source_record(video, audio, for_transcription):
+    st = os.stat(video)
+    return {'hash': file_hash(video), 'size': st.st_size, 'mtime': st.st_mtime,
+            'settings': _settings(audio, for_transcription)}
+
+
+def _partial_path(audio):
+    # Keeps the extension, which tells ffmpeg the output format: `ep1.mp3` -> `ep1.tmp.mp3`.
+    base, ext = os.path.splitext(audio)
+    return f"{base}.tmp{ext}"
+
+
+def _convert_one(video, audio, for_transcription, with_hash):
+    # Runs in a worker process. ffmpeg writes to a partial file that only replaces the
+    # audio once it has succeeded, so an interrupted run never leaves a truncated file
+    # that the next run would take as up to date.
+    start = time.perf_counter()
+    result = {'video': video, 'audio': audio, 'bytes': os.path.getsize(video)}
+    partial = _partial_path(audio)
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(audio)), exist_ok=True)
+        result['method'] = extract_audio(video, partial, for_transcription)
+        os.replace(partial, audio)
+        result['status'] = 'done'
+        if with_hash:
+            result['source'] = _source_record(video, audio, for_transcription)
+    except Exception as e:
+        result['status'] = 'error'
+        result['error'] = str(e)
+        if os.path.exists(partial):
+            os.remove(partial)
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+
+def _load_manifest(path):
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {}
+
+
+def convert_batch(root, fmt='mp3', out_dir=None, workers=None, for_transcription=False, use_hash=False,
+                  on_result=None):
+    """
+    Convert every video under `root` to audio across a process pool.
+
+    Args:
+        root (str): Directory containing the videos.
+        fmt (str): Output audio format (e.g. 'mp3', 'm4a', 'flac').
+        out_dir (str): Directory to mirror the outputs into; defaults to next to each video.
+        workers (int): Number of processes; defaults to the number of CPU cores.
+        for_transcription (bool): Produce mono 16 kHz audio for speech-to-text.
+        use_hash (bool): Decide what is up to date by content hash instead of mtime.
+        on_result (callable): Called with each file's result dict as it finishes.
+
+    Returns:
+        dict: Summary with 'results' (one dict per video) and aggregate counts and timings.
+    """
+    start = time.perf_counter()
+    manifest_path = os.path.join(out_dir or root, MANIFEST_NAME)
+    manifest = _load_manifest(manifest_path) if use_hash else None
+    results = []
+    jobs = []
+    for video in find_videos(root):
+        audio = output_path_for(video, fmt, root, out_dir)
+        if is_up_to_date(video, audio, manifest, for_transcription):
+            result = {'video': video, 'audio': audio, 'status': 'skipped', 'seconds': 0.0, 'bytes': 0}
+            results.append(result)
+            if on_result:
+                on_result(result)
+        else:
+            jobs.append((video, audio))
+
+    if jobs:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+            futures = [pool.submit(_convert_one, video, audio, for_transcription, use_hash)
+                       for video, audio in jobs]
+            for future in as_completed(futures):
+                result = future.result()
+                results.append(result)
+                if manifest is not None and 'source' in result:
+                    manifest[os.path.abspath(result['audio'])] = result.pop('source')
+                if on_result:
+                    on_result(result)
+
+    if manifest is not None:
+        os.makedirs(os.path.dirname(os.path.abspath(manifest_path)), exist_ok=True)
+        with open(manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=1)
+
+    elapsed = time.perf_counter() - start
+    done = [r for r in results if r['status'] == 'done']
+    total_bytes = sum(r['bytes'] for r in done)
+    return {
+        'results': results,
+        'converted': len(done),
+        'skipped': sum(r['status'] == 'skipped' for r in results),
+        'failed': sum(r['status'] == 'error' for r in results),
+        'seconds': elapsed,
+        'files_per_second': len(done) / elapsed if elapsed else 0.0,
+        'mb_per_second': total_bytes / 1e6 / elapsed if elapsed else 0.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert a folder of videos to audio in parallel.")
+    parser.add_argument('root', help="Directory containing the videos")
+    parser.add_argument('--format', default='mp3', help="Audio format (mp3, wav, m4a, flac, ...)")
+    parser.add_argument('--out', help="Mirror the outputs into this directory")
+    parser.add_argument('--workers', type=int, help="Number of processes (default: CPU cores)")
+    parser.add_argument('--transcription', action='store_true', help="Write mono 16 kHz audio")
+    parser.add_argument('--hash', action='store_true', help="Detect changed videos by content hash")
+    args = parser.parse_args(argv)
+
+    def report(r):
+        line = f"[{r['status']:>7}] {r['seconds']:7.2f}s  {os.path.relpath(r['video'], args.root)}"
+        if r['status'] == 'error':
+            line += f"  ({r['error']})"
+        print(line)
+
+    summary = convert_batch(args.root, args.format, args.out, args.workers, args.transcription,
+                            args.hash, on_result=report)
+    print(f"\n{summary['converted']} converted, {summary['skipped']} skipped, {summary['failed']} failed "
+          f"in {summary['seconds']:.1f}s ({summary['files_per_second']:.2f} files/s, "
+          f"{summary['mb_per_second']:.1f} MB/s)")
+    return 1 if summary['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,69 @@
+# Compare transcribing many files one after another (upload, wait for the job, next
+# file, as `transcribe_to_srt` does) with `TranscriptionManager`, which submits every
+# file at once and polls all jobs from one loop. Runs against the local stub API.
+#
+#   python bench/bench_async_transcribe.py
+#   python bench/bench_async_transcribe.py --files 50 --processing 5 --error-rate 0.05
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from stub_server import start_transcription_server
+from subtitle_core import write_transcript
+from transcribe_manager import AssemblyAIRestClient, TranscriptionManager
+from translators import call_with_retry
+
+
+def sequential(client, pairs, poll_interval):
+    # One file at a time, polling at a fixed interval like the SDK-based client.
+    for audio, srt in pairs:
+        job = call_with_retry(client.submit, call_with_retry(client.upload, audio))
+        while True:
+            time.sleep(poll_interval)
+            data = call_with_retry(client.get, job['id'])
+            if data['status'] in ('completed', 'error'):
+                break
+        write_transcript({'words': data.get('words'), 'srt': call_with_retry(client.srt, job['id'])}, srt)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark concurrent transcription against a stub API.")
+    parser.add_argument('--files', type=int, default=10, help="Audio files to transcribe")
+    parser.add_argument('--size-kb', type=int, default=500, help="Size of each fake audio file")
+    parser.add_argument('--processing', type=float, default=2.0, help="Seconds the stub takes per job")
+    parser.add_argument('--poll', type=float, default=3.0, help="Poll interval of the sequential run")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Share of stub requests that fail")
+    parser.add_argument('--concurrency', type=int, default=8, help="Manager requests in flight")
+    args = parser.parse_args()
+
+    server, url = start_transcription_server(args.processing, error_rate=args.error_rate)
+    client = AssemblyAIRestClient(api_key='stub', base_url=url)
+    with tempfile.TemporaryDirectory() as tmp:
+        pairs = []
+        for n in range(args.files):
+            audio = os.path.join(tmp, f'episode_{n}.mp3')
+            with open(audio, 'wb') as f:
+                f.write(os.urandom(args.size_kb * 1024))
+            pairs.append((audio, os.path.join(tmp, f'episode_{n}.srt')))
+
+        start = time.perf_counter()
+        sequential(client, pairs, args.poll)
+        seq = time.perf_counter() - start
+        seq_polls = server.polls
+
+        manager = TranscriptionManager(client, concurrency=args.concurrency, use_cache=False)
+        start = time.perf_counter()
+        results = manager.transcribe_many(pairs)
+        conc = time.perf_counter() - start
+        failed = sum(r['event'] != 'done' for r in results.values())
+    server.shutdown()
+
+    print(f"{'mode':<12} {'seconds':>8} {'polls':>6}")
+    print(f"{'sequential':<12} {seq:>8.2f} {seq_polls:>6}")
+    print(f"{'manager':<12} {conc:>8.2f} {server.polls - seq_polls:>6}")
+    print(f"speedup: {seq / conc:.1f}x for {args.files} files, {failed} failed")
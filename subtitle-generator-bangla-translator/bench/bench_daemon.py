@@ -0,0 +1,83 @@
+# Measure the per-file cost of translating many small SRT files: one `cli.py` process
+# per file (imports, backends and translation memory set up every time), `cli.py
+# --daemon` per file (a process that hands the file to a running worker daemon), and
+# a script that sends each file to the daemon directly with `DaemonClient.run`.
+#
+# The daemon runs in this process on a free localhost port. The translation memory
+# is off in every mode, so each mode makes the same requests.
+#
+#   python bench/bench_daemon.py
+#   python bench/bench_daemon.py --files 50 --backend libre   # through the local stub service
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from corpus import write_corpus
+from stub_server import start_translate_server
+from worker_daemon import DaemonClient, WorkerDaemon, make_server
+
+CLI = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'cli.py')
+
+
+def per_file(files, run):
+    # Median seconds of `run(path)` over the files.
+    times = []
+    for path in files:
+        start = time.perf_counter()
+        run(path)
+        times.append(time.perf_counter() - start)
+    return sorted(times)[len(times) // 2]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark per-file overhead with and without the worker daemon.")
+    parser.add_argument('--files', type=int, default=20, help="SRT files per mode")
+    parser.add_argument('--cues', type=int, default=40, help="Cues per file")
+    parser.add_argument('--backend', default='fake', choices=['fake', 'libre'])
+    parser.add_argument('--latency', type=float, default=0.05, help="Stub service delay for --backend libre")
+    args = parser.parse_args()
+
+    options = ['--backend', args.backend, '--targets', 'bn', '--force', '--rate', '0', '--no-cache']
+    job = {'targets': ['bn'], 'backend': args.backend, 'force': True, 'use_cache': False}
+    if args.backend == 'libre':
+        stub, url = start_translate_server(args.latency)
+        options += ['--url', url]
+        job['url'] = url
+
+    with tempfile.TemporaryDirectory() as tmp:
+        server = make_server(WorkerDaemon(rate=None, use_cache=False), '127.0.0.1:0')
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        client = DaemonClient(server.address)
+
+        modes = {}
+        for n, mode in enumerate(('process', 'cli --daemon', 'client')):
+            files = []
+            for i in range(args.files):
+                files.append(os.path.join(tmp, f'{n}_{i}.srt'))
+                write_corpus(files[-1], args.cues, seed=n * args.files + i)
+            if mode == 'process':
+                run = lambda path: subprocess.run([sys.executable, CLI, path] + options, capture_output=True,
+                                                  check=True)
+            elif mode == 'cli --daemon':
+                run = lambda path: subprocess.run([sys.executable, CLI, path, '--daemon', server.address] + options,
+                                                  capture_output=True, check=True)
+            else:
+                run = lambda path: client.run([path], **job)
+            modes[mode] = per_file(files, run)
+
+        server.shutdown()
+        server.daemon.close()
+
+    print(f"{args.files} files of {args.cues} cues, backend {args.backend}")
+    print(f"{'mode':<14} {'ms per file':>12}")
+    for mode, seconds in modes.items():
+        print(f"{mode:<14} {seconds * 1000:>12.1f}")
+    print(f"speedup: {modes['process'] / modes['client']:.0f}x for a script using the daemon, "
+          f"{modes['process'] / modes['cli --daemon']:.1f}x for cli.py --daemon")
@@ -0,0 +1,73 @@
+# Compare audio extraction speed: MoviePy (old path) vs direct ffmpeg extraction.
+# Uses the given video, or generates a synthetic MP4 (H.264 + AAC) of --seconds length.
+#
+#   python bench/bench_extract.py --seconds 600
+#   python bench/bench_extract.py my_episode.mp4
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from audio_extract import extract_audio, find_ffmpeg
+
+
+def make_video(path, seconds):
+    subprocess.run(
+        [find_ffmpeg(), '-y', '-v', 'error',
+         '-f', 'lavfi', '-i', f'testsrc=size=1280x720:rate=25:duration={seconds}',
+         '-f', 'lavfi', '-i', f'sine=frequency=440:sample_rate=44100:duration={seconds}',
+         '-c:v', 'libx264', '-preset', 'ultrafast', '-c:a', 'aac', '-b:a', '128k', path],
+        check=True,
+    )
+
+
+def moviepy_extract(video_path, out_path):
+    import moviepy as mp
+    video = mp.VideoFileClip(video_path)
+    video.audio.write_audiofile(out_path, logger=None)
+    video.close()
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark audio extraction.")
+    parser.add_argument('video', nargs='?', help="Video to extract from (default: synthetic)")
+    parser.add_argument('--seconds', type=int, default=300, help="Length of the synthetic video")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix='bench_extract_')
+    video = args.video
+    if not video:
+        video = os.path.join(tmp, 'input.mp4')
+        print(f"Generating {args.seconds}s test video...")
+        make_video(video, args.seconds)
+
+    cases = [
+        ('ffmpeg stream copy (m4a)', lambda out: extract_audio(video, out), 'copy.m4a'),
+        ('ffmpeg decode (mp3)', lambda out: extract_audio(video, out), 'encode.mp3'),
+        ('ffmpeg for transcription (flac)', lambda out: extract_audio(video, out, True), 'speech.flac'),
+    ]
+    try:
+        import moviepy  # noqa: F401
+        cases.insert(0, ('moviepy (mp3)', lambda out: moviepy_extract(video, out), 'moviepy.mp3'))
+    except ImportError:
+        print("MoviePy not installed; skipping the baseline.")
+
+    baseline = None
+    print(f"{'method':<34} {'seconds':>8} {'size MB':>8} {'speedup':>8}")
+    for name, fn, out_name in cases:
+        out = os.path.join(tmp, out_name)
+        elapsed = timed(fn, out)
+        baseline = baseline or elapsed
+        size = os.path.getsize(out) / 1e6
+        print(f"{name:<34} {elapsed:>8.2f} {size:>8.2f} {baseline / elapsed:>7.1f}x")
@@ -0,0 +1,46 @@
+# Measure multi-language translation: one parse, every language at the same time.
+# Translates a synthetic SRT into 1..N languages against the local stub server;
+# the time for N languages should stay close to the time for one.
+#
+#   python bench/bench_fanout.py --cues 2000 --latency 0.1
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from srt import Cue, write_srt
+from stub_server import start_translate_server
+from subtitle import translate_srt_multi
+from translators import LibreTranslateBackend
+
+LANGUAGES = ['bn', 'hi', 'ur', 'ta', 'ne']
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark multi-language translation.")
+    parser.add_argument('--cues', type=int, default=2000, help="Number of cues in the test SRT")
+    parser.add_argument('--latency', type=float, default=0.1, help="Stub latency per request (s)")
+    parser.add_argument('--workers', type=int, default=4, help="Requests in flight per language")
+    parser.add_argument('--languages', type=int, nargs='+', default=[1, 3, 5])
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix='bench_fanout_')
+    srt_path = os.path.join(tmp, 'talk.srt')
+    write_srt(srt_path, (Cue(i + 1, i * 2000, i * 2000 + 1800, [f"This is line {i} of the talk."])
+                         for i in range(args.cues)))
+    server, url = start_translate_server(args.latency)
+    print(f"{'languages':>9} {'requests':>9} {'seconds':>8} {'vs one':>7}")
+    baseline = None
+    for n in args.languages:
+        targets = LANGUAGES[:n]
+        server.requests = 0
+        start = time.perf_counter()
+        translate_srt_multi(srt_path, targets, translators={t: LibreTranslateBackend(url, 'en', t) for t in targets},
+                            workers=args.workers, rate=None, use_cache=False)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"{n:>9} {server.requests:>9} {elapsed:>8.2f} {elapsed / baseline:>6.2f}x")
+    server.shutdown()
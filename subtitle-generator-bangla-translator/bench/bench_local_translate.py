@@ -0,0 +1,57 @@
+# Measure offline translation throughput (sentences per second) on this CPU.
+# Needs `pip install ctranslate2 transformers sentencepiece` and a converted model,
+# e.g.:
+#   ct2-transformers-converter --model facebook/nllb-200-distilled-600M --quantization int8 \
+#       --output_dir ~/.cache/subtitle-generator/models/nllb-200-distilled-600M-ct2
+#
+#   python bench/bench_local_translate.py --sentences 500 --threads 1 2 4 8
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from translators import BatchTranslator, LocalBackend, DEFAULT_LOCAL_MODEL
+
+WORDS = ("we think this is really important because people want to know what happens when the "
+         "question is answered and everything changes for the better in the end").split()
+
+
+def make_sentences(n, seed=0):
+    rng = random.Random(seed)
+    return [' '.join(rng.choice(WORDS) for _ in range(rng.randint(4, 30))).capitalize() + '.'
+            for _ in range(n)]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark the local translation backend.")
+    parser.add_argument('--model', default=DEFAULT_LOCAL_MODEL, help="CTranslate2 model directory")
+    parser.add_argument('--target', default='bn')
+    parser.add_argument('--sentences', type=int, default=500)
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 2, 4, os.cpu_count()])
+    parser.add_argument('--batch-tokens', type=int, nargs='+', default=[512, 2048])
+    parser.add_argument('--beam-size', type=int, default=2)
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.model):
+        sys.exit(f"Model not found: {args.model} (see the comment at the top of this file)")
+    sentences = make_sentences(args.sentences)
+
+    start = time.perf_counter()
+    LocalBackend(args.model, 'en', args.target, threads=args.threads[0]).translate('Hello.')
+    print(f"model load + first sentence: {time.perf_counter() - start:.2f}s\n")
+
+    print(f"{'threads':>7} {'batch tok':>9} {'seconds':>8} {'sent/s':>8}")
+    for threads in args.threads:
+        for batch_tokens in args.batch_tokens:
+            backend = LocalBackend(args.model, 'en', args.target, threads=threads, batch_tokens=batch_tokens,
+                                   beam_size=args.beam_size)
+            backend.translate('Warm up.')
+            engine = BatchTranslator(backend)
+            start = time.perf_counter()
+            engine.translate_many(sentences)
+            elapsed = time.perf_counter() - start
+            print(f"{threads:>7} {batch_tokens:>9} {elapsed:>8.2f} {len(sentences) / elapsed:>8.1f}")
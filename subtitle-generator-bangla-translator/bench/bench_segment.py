@@ -0,0 +1,84 @@
+# Measure how long segmentation takes on a feature-length transcript.
+# Builds synthetic word timestamps (speech at --wpm with pauses between sentences),
+# segments them into cues, then re-flows a "translation" of every sentence onto the
+# same timings, the way translate_srt does.
+#
+#   python bench/bench_segment.py --minutes 150
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from segmentation import Segmenter
+
+VOCABULARY = ("the a we you they it this that what when where because really going know think "
+              "people time about would could there their something everything nothing important "
+              "question answer problem remember").split()
+
+
+def make_words(minutes, wpm, seed=0):
+    rng = random.Random(seed)
+    words = []
+    t = 0
+    end = minutes * 60 * 1000
+    per_word = 60000 // wpm
+    while t < end:
+        length = rng.randint(4, 25)
+        for i in range(length):
+            duration = rng.randint(per_word // 2, per_word)
+            text = rng.choice(VOCABULARY)
+            if i == length - 1:
+                text += rng.choice('.?!')
+            elif rng.random() < 0.08:
+                text += ','
+            words.append({'text': text, 'start': t, 'end': t + duration})
+            t += per_word
+        t += rng.randint(200, 2500)
+    return words
+
+
+def sentences(words):
+    current = []
+    for word in words:
+        current.append(word)
+        if word['text'][-1] in '.?!':
+            yield current
+            current = []
+    if current:
+        yield current
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark word-timestamp segmentation.")
+    parser.add_argument('--minutes', type=int, default=150, help="Length of the synthetic transcript")
+    parser.add_argument('--wpm', type=int, default=160, help="Speaking rate, in words per minute")
+    parser.add_argument('--budget', type=float, default=1.0, help="Seconds each step must stay under")
+    args = parser.parse_args()
+
+    words = make_words(args.minutes, args.wpm)
+    segmenter = Segmenter()
+    print(f"{len(words)} words over {args.minutes} minutes")
+
+    start = time.perf_counter()
+    cues = segmenter.segment(words)
+    segment_s = time.perf_counter() - start
+
+    groups = list(sentences(words))
+    # A stand-in translation: the same sentence, about 20% longer.
+    translations = [' '.join(w['text'] + w['text'][:1] for w in g) for g in groups]
+    start = time.perf_counter()
+    reflowed = 0
+    for group, text in zip(groups, translations):
+        reflowed += len(segmenter.reflow(text, [(w['start'], w['end']) for w in group]))
+    reflow_s = time.perf_counter() - start
+
+    print(f"{'step':<10} {'cues':>7} {'seconds':>8} {'words/s':>10}")
+    print(f"{'segment':<10} {len(cues):>7} {segment_s:>8.3f} {len(words) / segment_s:>10.0f}")
+    print(f"{'reflow':<10} {reflowed:>7} {reflow_s:>8.3f} {len(words) / reflow_s:>10.0f}")
+    too_slow = max(segment_s, reflow_s) > args.budget
+    print("FAIL: over budget" if too_slow else f"OK: both under {args.budget:.1f}s")
+    sys.exit(1 if too_slow else 0)
@@ -0,0 +1,126 @@
+# Measure sentence grouping on synthetic SRT files of growing size.
+# Compares the old per-line regex + string-concatenation grouping with
+# sentences.group_sentences; time per cue should stay flat as the file grows.
+# The "run-on" case has no full stops at all, which made the old buffer grow
+# without bound.
+#
+# Before timing anything it checks the sentence ends in `CASES`, which past changes
+# got wrong, and exits with status 1 if any of them is decided differently.
+#
+#   python bench/bench_sentences.py --sizes 1000 10000 100000
+
+import argparse
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from sentences import group_sentences, is_sentence_end, split_sentences
+from srt import Cue, read_srt, write_srt
+
+ENDINGS = ['', '', '', ',', '.', '?', '!', '...', ' Mr.', ' at 3.5']
+
+# (text, next text, expected is_sentence_end)
+CASES = [
+    ("No.", None, True),
+    ("Oh no.", None, True),
+    ("I said no.", "Then we left.", True),
+    ("Vitamin E.", None, True),
+    ("Take vitamin E.", "It helps.", True),
+    ("Go to Room No.", "5 on the left.", False),
+    ("It opens on Mar.", "3 next year.", False),
+    ("Ask J.", "Smith about it.", False),
+    ("Ask Mr.", "Smith about it.", False),
+    ("Wait...", "for it.", False),
+]
+# (cue texts, expected groups as cue numbers)
+GROUP_CASES = [
+    (["Did you see it?", "No.", "Then let's go..."], [[1], [2], [3]]),
+    (["It is in Room No.", "5, on the left."], [[1, 2]]),
+]
+# (text, expected sentences)
+SPLIT_CASES = [
+    ("I said no. Then we left.", ["I said no.", "Then we left."]),
+    ("See No. 5 first. Then ask John F. Kennedy.", ["See No. 5 first.", "Then ask John F. Kennedy."]),
+]
+
+
+def check_cases():
+    failures = []
+    for text, next_text, expected in CASES:
+        if is_sentence_end(text, next_text) != expected:
+            failures.append(f"is_sentence_end({text!r}, {next_text!r}) is not {expected}")
+    for texts, expected in GROUP_CASES:
+        cues = [Cue(i + 1, i * 2000, i * 2000 + 1800, [text]) for i, text in enumerate(texts)]
+        groups = [[cue.index for cue in group] for group in group_sentences(cues)]
+        if groups != expected:
+            failures.append(f"group_sentences({texts!r}) gave {groups}, not {expected}")
+    for text, expected in SPLIT_CASES:
+        if split_sentences(text) != expected:
+            failures.append(f"split_sentences({text!r}) gave {split_sentences(text)}, not {expected}")
+    return failures
+
+
+def make_srt(path, n, run_on=False, seed=0):
+    rng = random.Random(seed)
+
+    def cues():
+        for i in range(n):
+            text = ' '.join(rng.choice(('we', 'really', 'think', 'that', 'this', 'is', 'fine'))
+                            for _ in range(rng.randint(3, 9)))
+            if not run_on:
+                text += rng.choice(ENDINGS)
+            yield Cue(i + 1, i * 2000, i * 2000 + 1800, [text])
+    write_srt(path, cues())
+
+
+def legacy_groups(cues):
+    # The grouping translate_srt used to do: a regex search per line and per buffer,
+    # and a buffer grown by string concatenation.
+    groups, group, buffer = [], [], ''
+    for cue in cues:
+        strip = cue.text.strip()
+        group.append(cue)
+        buffer += strip + ' '
+        if re.search(r'[.!?…]$', strip) and re.search(r'[.!?…]$', buffer.strip()):
+            groups.append(group)
+            group, buffer = [], ''
+    if group:
+        groups.append(group)
+    return groups
+
+
+def timed(fn, cues):
+    start = time.perf_counter()
+    groups = fn(cues)
+    return time.perf_counter() - start, groups
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark sentence grouping.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    args = parser.parse_args()
+
+    failures = check_cases()
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if failures:
+        sys.exit(1)
+
+    tmp = tempfile.mkdtemp(prefix='bench_sentences_')
+    print(f"{'case':<8} {'cues':>7} {'old s':>8} {'new s':>8} {'new us/cue':>11} {'old max':>8} {'new max':>8}")
+    for run_on in (False, True):
+        for n in args.sizes:
+            path = os.path.join(tmp, f"{n}_{run_on}.srt")
+            make_srt(path, n, run_on)
+            cues = list(read_srt(path))
+            old_s, old = timed(legacy_groups, cues)
+            new_s, new = timed(lambda c: list(group_sentences(c)), cues)
+            # Largest group, in cues: what one translation request has to carry.
+            old_max, new_max = max(map(len, old)), max(map(len, new))
+            print(f"{'run-on' if run_on else 'normal':<8} {n:>7} {old_s:>8.3f} {new_s:>8.3f} "
+                  f"{new_s / n * 1e6:>11.2f} {old_max:>8} {new_max:>8}")
@@ -0,0 +1,84 @@
+# Measure import time of the non-GUI modules with `python -X importtime` and fail
+# if one got slower than its budget or pulls in a heavy dependency at import time.
+# Run it after changing imports; it exits with status 1 on a regression. The same
+# check runs with the tests (tests/test_startup.py).
+#
+#   python bench/bench_startup.py
+#   python bench/bench_startup.py --runs 10 --out startup.json
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# Module -> import budget in milliseconds (median of the runs, cumulative).
+BUDGETS = {
+    'srt': 30,
+    'translators': 80,
+    'transcription': 100,
+    'subtitle_core': 150,
+    'translate': 150,
+    'pipeline': 150,
+    'transcribe_manager': 150,
+    'worker_daemon': 80,
+    'timeline': 40,
+}
+
+# Nothing above may import these until they are actually used.
+HEAVY = ('tkinter', 'assemblyai', 'deep_translator', 'moviepy', 'numpy', 'ctranslate2', 'transformers',
+         'faster_whisper', 'urllib.request')
+
+_LINE_RE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)')
+
+
+def import_profile(module):
+    """
+    Import `module` in a fresh interpreter.
+
+    Returns:
+        tuple: Cumulative import time of `module` in milliseconds, and the set of
+            every module imported along the way.
+    """
+    err = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'], cwd=ROOT,
+                         capture_output=True, text=True, check=True).stderr
+    total = None
+    imported = set()
+    for self_us, cumulative_us, _, name in _LINE_RE.findall(err):
+        imported.add(name)
+        if name == module:
+            total = int(cumulative_us) / 1000
+    return total, imported
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark module import time.")
+    parser.add_argument('--runs', type=int, default=5, help="Fresh interpreters per module")
+    parser.add_argument('--out', help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = {}
+    failed = False
+    print(f"{'module':<19} {'median ms':>9} {'budget':>7}  heavy imports")
+    for module, budget in BUDGETS.items():
+        times = []
+        heavy = set()
+        for _ in range(args.runs):
+            ms, imported = import_profile(module)
+            times.append(ms)
+            heavy |= {name for name in imported if name in HEAVY}
+        median = statistics.median(times)
+        ok = median <= budget and not heavy
+        failed |= not ok
+        results[module] = {'median_ms': median, 'budget_ms': budget, 'heavy': sorted(heavy), 'ok': ok}
+        print(f"{module:<19} {median:>9.1f} {budget:>7}  {', '.join(sorted(heavy)) or '-'}"
+              f"{'' if ok else '  <- REGRESSION'}")
+
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=1)
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,94 @@
+# Measure bulk retiming of a large SRT file: 23.976 -> 25 fps, a shift, minimum
+# durations and gaps. Compares a loop over `Cue` objects (read_srt, adjust each cue,
+# write_srt) with `Timeline`, checks both write the same file, and times the
+# timeline's parse, operations and write separately.
+#
+#   python bench/bench_timeline.py --cues 100000
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from corpus import write_corpus
+from srt import Cue, read_srt, write_srt
+from timeline import Timeline, frame_rate
+
+SHIFT = -250
+MIN_DURATION = 800
+MIN_GAP = 80
+
+
+def retime_loop(src, dst, factor):
+    # The same steps as `retime_timeline`, one cue at a time.
+    cues = []
+    for cue in read_srt(src):
+        start = round((cue.start + SHIFT) * factor)
+        end = round((cue.end + SHIFT) * factor)
+        end = max(end, start + MIN_DURATION, 0)
+        start = max(start, 0)
+        if end > start:
+            cues.append(Cue(cue.index, start, end, cue.lines))
+    cues.sort(key=lambda c: c.start)
+    kept = []
+    for cue in cues:
+        if kept and cue.start - kept[-1].start <= MIN_GAP:
+            last = kept[-1]
+            kept[-1] = Cue(last.index, last.start, max(last.end, cue.end), last.lines + cue.lines)
+            continue
+        if kept:
+            kept[-1].end = min(kept[-1].end, cue.start - MIN_GAP)
+        kept.append(cue)
+    write_srt(dst, kept)
+
+
+def retime_timeline(src, dst, factor):
+    timeline = Timeline.from_srt(src).shift(SHIFT).scale(factor)
+    timeline.clamp(MIN_DURATION).resolve_overlaps(MIN_GAP).to_srt(dst)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark bulk SRT retiming.")
+    parser.add_argument('--cues', type=int, default=100000, help="Cues in the synthetic file")
+    parser.add_argument('--runs', type=int, default=3, help="Runs per method (the best is kept)")
+    args = parser.parse_args()
+
+    factor = frame_rate('23.976') / frame_rate('25')
+    with tempfile.TemporaryDirectory() as tmp:
+        src = write_corpus(os.path.join(tmp, 'in.srt'), args.cues)
+        results = {}
+        for name, retime in (('loop', retime_loop), ('timeline', retime_timeline)):
+            dst = os.path.join(tmp, f'{name}.srt')
+            best = None
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                retime(src, dst, factor)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            results[name] = best
+        with open(os.path.join(tmp, 'loop.srt'), encoding='utf-8') as a, \
+                open(os.path.join(tmp, 'timeline.srt'), encoding='utf-8') as b:
+            identical = a.read() == b.read()
+
+        steps = {}
+        start = time.perf_counter()
+        timeline = Timeline.from_srt(src)
+        steps['parse'] = time.perf_counter() - start
+        start = time.perf_counter()
+        timeline = timeline.shift(SHIFT).scale(factor).clamp(MIN_DURATION).resolve_overlaps(MIN_GAP)
+        steps['operations'] = time.perf_counter() - start
+        start = time.perf_counter()
+        timeline.to_srt(os.path.join(tmp, 'steps.srt'))
+        steps['write'] = time.perf_counter() - start
+
+    print(f"{args.cues} cues, 23.976 -> 25 fps, shift {SHIFT} ms, min duration {MIN_DURATION} ms, "
+          f"min gap {MIN_GAP} ms")
+    print(f"{'method':<10} {'seconds':>8} {'cues/s':>10}")
+    for name, seconds in results.items():
+        print(f"{name:<10} {seconds:>8.3f} {args.cues / seconds:>10.0f}")
+    print(f"speedup: {results['loop'] / results['timeline']:.1f}x, output {'identical' if identical else 'DIFFERS'}")
+    print('timeline steps: ' + ', '.join(f"{step} {seconds:.3f}s" for step, seconds in steps.items()))
+    sys.exit(0 if identical else 1)
@@ -0,0 +1,75 @@
+# Measure what tracing costs: a `span()` call while tracing is off and while it is
+# on, and a whole warm-cache translation of a generated SRT with tracing off and on.
+#
+#   python bench/bench_tracing.py
+#   python bench/bench_tracing.py --cues 20000
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import tracing
+from corpus import write_corpus
+from subtitle_core import translate_srt
+from translation_memory import TranslationMemory
+from translators import FakeTranslator
+
+
+def per_call(n):
+    # Time of one span and one count, less the bare loop.
+    start = time.perf_counter()
+    for _ in range(n):
+        pass
+    loop = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(n):
+        with tracing.span('bench', i=1):
+            pass
+        tracing.count('bench')
+    return (time.perf_counter() - start - loop) / n
+
+
+def translate(path, out, memory, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        translate_srt(path, out, FakeTranslator('auto', 'bn'), rate=None, memory=memory)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark the cost of tracing.")
+    parser.add_argument('--cues', type=int, default=10000, help="Cues in the generated SRT")
+    parser.add_argument('--calls', type=int, default=200000, help="span() calls for the per-call timing")
+    parser.add_argument('--repeat', type=int, default=5, help="Runs per translation timing; the fastest counts")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_corpus(os.path.join(tmp, 'talk.srt'), args.cues)
+        out = os.path.join(tmp, 'talk_bangla.srt')
+        memory = TranslationMemory(os.path.join(tmp, 'tm.sqlite'))
+        translate_srt(path, out, FakeTranslator('auto', 'bn'), rate=None, memory=memory)   # Fill the memory
+
+        tracing.disable()
+        off_call = per_call(args.calls)
+        tracer = tracing.enable()
+        on_call = per_call(args.calls)
+        # Alternate so warm-up and drift affect both sides alike.
+        off = on = None
+        for _ in range(2):
+            tracing.disable()
+            off = min(filter(None, [off, translate(path, out, memory, args.repeat)]))
+            tracer = tracing.enable()
+            on = min(filter(None, [on, translate(path, out, memory, args.repeat)]))
+        tracing.disable()
+        memory.close()
+
+    print(f"span()+count() per call: off {off_call * 1e9:.0f} ns, on {on_call * 1e9:.0f} ns")
+    print(f"warm translation of {args.cues} cues: off {off:.3f}s, on {on:.3f}s ({(on / off - 1) * 100:+.1f}%), "
+          f"{len(tracer.spans) // args.repeat} spans per run")
@@ -0,0 +1,40 @@
+# Measure how translation throughput scales with the number of workers.
+# Runs BatchTranslator against the local stub server with injected latency, so
+# no network access or API key is needed.
+#
+#   python bench/bench_translate_workers.py --latency 0.1 --rate 50
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from stub_server import start_translate_server
+from translators import BatchTranslator, LibreTranslateBackend, RateLimiter
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark concurrent translation.")
+    parser.add_argument('--groups', type=int, default=200, help="Number of sentence groups")
+    parser.add_argument('--batch-chars', type=int, default=500, help="Max characters per request")
+    parser.add_argument('--latency', type=float, default=0.1, help="Stub latency per request (s)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Share of 429/503 answers")
+    parser.add_argument('--rate', type=float, default=0, help="Rate limit (req/s), 0 for none")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8, 16])
+    args = parser.parse_args()
+
+    server, url = start_translate_server(args.latency, args.error_rate)
+    texts = [f"This is sentence number {i}, spoken by someone." for i in range(args.groups)]
+    print(f"{'workers':>8} {'requests':>9} {'seconds':>8} {'req/s':>8}")
+    for workers in args.workers:
+        server.requests = 0
+        limiter = RateLimiter(args.rate) if args.rate else None
+        engine = BatchTranslator(LibreTranslateBackend(url), max_chars=args.batch_chars,
+                                 workers=workers, rate_limiter=limiter)
+        start = time.perf_counter()
+        result = engine.translate_many(texts)
+        elapsed = time.perf_counter() - start
+        assert result == [t.upper() for t in texts], "output order changed"
+        print(f"{workers:>8} {server.requests:>9} {elapsed:>8.2f} {server.requests / elapsed:>8.1f}")
+    server.shutdown()
@@ -0,0 +1,104 @@
+# Measure silence trimming on a generated recording: talk (bursts of noise shaped like
+# words) separated by pauses of one to eight seconds over a quiet noise floor.
+#
+# Reports the time the detector takes, how much audio is cut, and how far the word
+# timestamps found in the trimmed audio land from the same words in the original
+# after remapping. The "transcriber" here finds word bursts by their level, so the
+# same words are found in both versions and any difference comes from the remapping.
+#
+#   python bench/bench_trim.py
+#   python bench/bench_trim.py --minutes 60
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from speech_trim import detect_speech, read_audio, remap_transcript, trim_silence, write_audio, TRIM_RATE
+
+
+def make_recording(minutes, seed=0):
+    """
+    Build the test audio.
+
+    Returns:
+        numpy.ndarray: int16 samples at `TRIM_RATE`.
+    """
+    rng = random.Random(seed)
+    noise = np.random.default_rng(seed)
+    total = int(minutes * 60 * TRIM_RATE)
+    audio = noise.normal(0, 20, total)    # About -64 dBFS
+    pos = TRIM_RATE
+    while pos < total:
+        talk_end = min(total, pos + int(rng.uniform(2, 15) * TRIM_RATE))
+        while pos < talk_end:
+            length = int(rng.uniform(0.2, 0.4) * TRIM_RATE)
+            burst = noise.normal(0, 6000, min(length, total - pos)) * np.hanning(min(length, total - pos)) ** 0.2
+            audio[pos:pos + len(burst)] += burst
+            pos += length + int(rng.uniform(0.08, 0.15) * TRIM_RATE)
+        pos += int(rng.uniform(1, 8) * TRIM_RATE)
+    return np.clip(audio, -32768, 32767).astype(np.int16)
+
+
+class BurstTranscriber:
+    """
+    Reports every loud burst of a WAV file as a word.
+    """
+
+    name = 'bursts'
+
+    def config(self):
+        return {'provider': self.name}
+
+    def transcribe_json(self, audio_path, on_status=None, cancel_event=None):
+        samples, rate = read_audio(audio_path)
+        frame = rate // 1000    # 1 ms frames
+        count = len(samples) // frame
+        level = samples[:count * frame].astype(np.float32).reshape(count, frame) / 32768.0
+        loud = np.concatenate(([0], (10 * np.log10(np.mean(level * level, axis=1) + 1e-10) > -40), [0]))
+        edges = np.flatnonzero(np.diff(loud.astype(np.int8)))
+        words = [{'text': f"w{n}", 'start': int(s), 'end': int(e), 'confidence': 1.0}
+                 for n, (s, e) in enumerate(zip(edges[0::2], edges[1::2])) if e - s >= 30]
+        return {'id': None, 'text': ' '.join(w['text'] for w in words), 'words': words, 'srt': ''}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark silence trimming and timestamp remapping.")
+    parser.add_argument('--minutes', type=float, default=20, help="Length of the generated recording")
+    args = parser.parse_args()
+
+    samples = make_recording(args.minutes)
+    client = BurstTranscriber()
+    with tempfile.TemporaryDirectory() as tmp:
+        # WAV in and out, so ffmpeg is not needed (transcribe_to_srt uploads FLAC).
+        original = os.path.join(tmp, 'talk.wav')
+        trimmed = os.path.join(tmp, 'speech.wav')
+        write_audio(samples, TRIM_RATE, original)
+
+        start = time.perf_counter()
+        regions = detect_speech(samples)
+        detect = time.perf_counter() - start
+        start = time.perf_counter()
+        table, duration_ms = trim_silence(original, trimmed)
+        trim = time.perf_counter() - start
+        sizes = os.path.getsize(original), os.path.getsize(trimmed)
+
+        truth = client.transcribe_json(original)['words']
+        start = time.perf_counter()
+        words = remap_transcript(client.transcribe_json(trimmed), table)['words']
+        remap = time.perf_counter() - start
+
+    errors = np.array([[abs(a['start'] - b['start']), abs(a['end'] - b['end'])] for a, b in zip(truth, words)])
+    print(f"recording: {args.minutes:g} min, {len(regions)} speech regions, {len(truth)} words")
+    print(f"detect {detect:.3f}s ({duration_ms / 1000 / detect:.0f}x real time), read + detect + write {trim:.2f}s, "
+          f"transcribe + remap {remap:.2f}s")
+    print(f"kept {table.kept_ms / duration_ms:.1%} of the audio; upload {sizes[1] / 1e6:.1f} MB instead of "
+          f"{sizes[0] / 1e6:.1f} MB")
+    print(f"words: {len(words)} in the trimmed audio, {len(truth)} in the original; timestamp error "
+          f"max {errors.max()} ms, mean {errors.mean():.2f} ms")
@@ -0,0 +1,51 @@
+# Synthetic subtitle corpora for the benchmarks: English-like cues with a realistic
+# mix of sentence lengths, punctuation, abbreviations and two-line cues. The same
+# size and seed always give the same corpus, so results compare across runs.
+
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from srt import Cue, write_srt
+
+WORDS = ("we you they it this that what when where because really going know think people time about "
+         "would could there their something everything nothing important question answer problem "
+         "remember today little house water morning evening friend family story reason").split()
+ENDINGS = ['.', '.', '.', '?', '!', '...']
+
+
+def make_cues(n, seed=0):
+    """
+    Build `n` cues of two seconds each; sentences run over one to four cues.
+
+    Returns:
+        list: The cues.
+    """
+    rng = random.Random(seed)
+    cues = []
+    left = 0    # Cues remaining in the current sentence
+    for i in range(n):
+        if left == 0:
+            left = rng.randint(1, 4)
+        left -= 1
+        words = [rng.choice(WORDS) for _ in range(rng.randint(3, 12))]
+        if rng.random() < 0.05:
+            words.insert(0, 'Mr.')
+        text = ' '.join(words)
+        if left == 0:
+            text += rng.choice(ENDINGS)
+        elif rng.random() < 0.2:
+            text += ','
+        lines = [text] if len(text) <= 42 else [text[:text.rfind(' ', 0, 42)], text[text.rfind(' ', 0, 42) + 1:]]
+        cues.append(Cue(i + 1, i * 2000, i * 2000 + 1800, lines))
+    return cues
+
+
+def write_corpus(path, n, seed=0):
+    """
+    Write a corpus of `n` cues to `path` (see `make_cues`).
+    """
+    write_srt(path, make_cues(n, seed))
+    return path
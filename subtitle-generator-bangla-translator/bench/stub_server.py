@@ -0,0 +1,198 @@
+# Local stand-ins for a LibreTranslate-compatible translation service and for the
+# AssemblyAI transcription REST API.
+#
+# The translation server "translates" by upper-casing the text, after an injected
+# delay. The transcription server accepts uploads and jobs, reports each job as
+# queued and then processing for a set time, and completes it with a made-up
+# transcript (one word per 2 KB uploaded). Both can be told to fail a share of
+# requests with HTTP 429/503 so retry and backoff can be exercised.
+#
+#   python bench/stub_server.py --port 5000 --latency 0.2 --error-rate 0.1
+#   python bench/stub_server.py --transcription --port 8000 --processing 5
+#   ASSEMBLYAI_URL=http://127.0.0.1:8000 python transcribe_manager.py talk.mp3
+
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubTranslateHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        server = self.server
+        length = int(self.headers.get('Content-Length', 0))
+        payload = json.loads(self.rfile.read(length) or b'{}')
+        with server.lock:
+            server.requests += 1
+        time.sleep(server.latency)
+        if random.random() < server.error_rate:
+            self.send_error(random.choice([429, 503]))
+            return
+        body = json.dumps({'translatedText': payload.get('q', '').upper()}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Keep benchmark output clean
+
+
+class StubTranscriptionHandler(BaseHTTPRequestHandler):
+    def _reply(self, data, content_type='application/json'):
+        body = (data if isinstance(data, str) else json.dumps(data)).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _begin(self):
+        # Count the request, wait, and maybe fail it; returns False if it failed.
+        server = self.server
+        with server.lock:
+            server.requests += 1
+        time.sleep(server.latency)
+        if random.random() < server.error_rate:
+            self.send_error(random.choice([429, 503]))
+            return False
+        return True
+
+    def do_POST(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if not self._begin():
+            return
+        if self.path == '/v2/upload':
+            token = uuid.uuid4().hex
+            with server.lock:
+                server.uploads[token] = len(body)
+                server.bytes_uploaded += len(body)
+            self._reply({'upload_url': f"https://cdn.example/{token}"})
+        elif self.path == '/v2/transcript':
+            payload = json.loads(body or b'{}')
+            job_id = uuid.uuid4().hex
+            with server.lock:
+                size = server.uploads.get(payload.get('audio_url', '').rsplit('/', 1)[-1], 0)
+                server.jobs[job_id] = {'submitted': time.monotonic(), 'size': size}
+            self._reply({'id': job_id, 'status': 'queued'})
+        else:
+            self.send_error(404)
+
+    def do_GET(self):
+        server = self.server
+        parts = self.path.strip('/').split('/')
+        if len(parts) < 3 or parts[:2] != ['v2', 'transcript'] or parts[2] not in server.jobs:
+            self.send_error(404)
+            return
+        if not self._begin():
+            return
+        job = server.jobs[parts[2]]
+        with server.lock:
+            server.polls += len(parts) == 3
+        elapsed = time.monotonic() - job['submitted']
+        if elapsed < server.processing * 0.2:
+            self._reply({'id': parts[2], 'status': 'queued'})
+            return
+        if elapsed < server.processing:
+            self._reply({'id': parts[2], 'status': 'processing'})
+            return
+        words = [{'text': f"word{i}" + ('.' if i % 8 == 7 else ''), 'start': i * 400, 'end': i * 400 + 350,
+                  'confidence': 0.9} for i in range(max(3, job['size'] // 2000))]
+        if len(parts) == 4 and parts[3] == 'srt':
+            cues = [words[i:i + 8] for i in range(0, len(words), 8)]
+            self._reply(''.join(f"{n}\n{_timestamp(c[0]['start'])} --> {_timestamp(c[-1]['end'])}\n"
+                                f"{' '.join(w['text'] for w in c)}\n\n" for n, c in enumerate(cues, 1)),
+                        'text/plain')
+            return
+        self._reply({'id': parts[2], 'status': 'completed', 'text': ' '.join(w['text'] for w in words),
+                     'words': words})
+
+    def log_message(self, format, *args):
+        pass  # Keep benchmark output clean
+
+
+def _timestamp(ms):
+    return f"{ms // 3600000:02}:{ms // 60000 % 60:02}:{ms // 1000 % 60:02},{ms % 1000:03}"
+
+
+class _StubServer(ThreadingHTTPServer):
+    # The default listen backlog of 5 drops connections when many workers connect at once.
+    request_queue_size = 128
+
+
+def start_translate_server(latency=0.05, error_rate=0.0, port=0):
+    """
+    Start the stub translation server on a background thread.
+
+    Args:
+        latency (float): Seconds to wait before answering each request.
+        error_rate (float): Share of requests answered with HTTP 429 or 503.
+        port (int): Port to listen on; 0 picks a free one.
+
+    Returns:
+        tuple: The server (call `shutdown()` to stop it) and its base URL.
+    """
+    server = _StubServer(('127.0.0.1', port), StubTranslateHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.error_rate = error_rate
+    server.requests = 0
+    server.lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def start_transcription_server(processing=2.0, latency=0.0, error_rate=0.0, port=0):
+    """
+    Start the stub transcription API on a background thread.
+
+    Args:
+        processing (float): Seconds from submission until a job completes (the first
+            fifth of it queued, the rest processing).
+        latency (float): Seconds to wait before answering each request.
+        error_rate (float): Share of requests answered with HTTP 429 or 503.
+        port (int): Port to listen on; 0 picks a free one.
+
+    Returns:
+        tuple: The server (call `shutdown()` to stop it; `requests`, `polls` and
+            `bytes_uploaded` count its traffic) and its base URL.
+    """
+    server = _StubServer(('127.0.0.1', port), StubTranscriptionHandler)
+    server.daemon_threads = True
+    server.processing = processing
+    server.latency = latency
+    server.error_rate = error_rate
+    server.requests = 0
+    server.polls = 0
+    server.bytes_uploaded = 0
+    server.uploads = {}
+    server.jobs = {}
+    server.lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run a local stub translation or transcription server.")
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--transcription', action='store_true', help="Mock the AssemblyAI API instead")
+    parser.add_argument('--processing', type=float, default=5.0, help="Seconds each transcription job takes")
+    args = parser.parse_args()
+    if args.transcription:
+        server, url = start_transcription_server(args.processing, args.latency, args.error_rate, args.port)
+        print(f"Stub transcription API listening on {url}")
+    else:
+        server, url = start_translate_server(args.latency, args.error_rate, args.port)
+        print(f"Stub translation server listening on {url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
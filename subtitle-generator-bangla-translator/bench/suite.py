@@ -0,0 +1,191 @@
+# Benchmark suite for the subtitle workflow, fully offline.
+# Runs every case on synthetic SRT corpora of each size and writes the results as
+# JSON, so runs on different commits can be compared:
+#
+#   python bench/suite.py --out before.json
+#   python bench/suite.py --out after.json --compare before.json
+#
+# Cases:
+#   parse, write        SRT reading and writing throughput
+#   group               sentence grouping
+#   reflow              cutting translated sentences into cues (process_group)
+#   tm_hit              translation memory lookups that all hit
+#   translate_warm      translate_srt with every sentence already in the memory
+#   translate_rerun     incremental translate_srt with every sentence in the manifest
+#   transcript_hit      transcribe_to_srt answered from the stage cache
+#   translate_stub      translate_srt against the stub HTTP server (latency, errors)
+#   transcribe_fake     transcribe_chunked against a fake transcriber (latency, errors)
+#
+# --compare exits with status 1 if any case got slower than --threshold times. The two
+# end-to-end cases wait out retry backoff on injected errors, so they vary between runs;
+# they are shown in the comparison but never count as a regression.
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from corpus import write_corpus
+from stage_cache import StageCache, file_hash
+from stub_server import start_translate_server
+from subtitle_core import process_group, transcribe_to_srt, translate_srt
+from sentences import group_sentences
+from srt import read_srt, write_srt
+from transcription import FakeAudio, FakeTranscriber, transcribe_chunked
+from translation_memory import TranslationMemory
+from translators import FakeTranslator, LibreTranslateBackend
+
+DEFAULT_SIZES = [100, 1000, 10000, 100000]
+
+# Cases whose time depends on injected errors and backoff.
+NOISY = ('translate_stub', 'transcribe_fake')
+
+
+def best_of(repeat, fn):
+    # Fastest of `repeat` runs; the minimum is the least noisy estimate.
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def run_cases(n, tmp, args):
+    """
+    Run every case on an `n`-cue corpus.
+
+    Returns:
+        dict: Case name -> seconds.
+    """
+    path = write_corpus(os.path.join(tmp, f'corpus_{n}.srt'), n)
+    cues = list(read_srt(path))
+    groups = list(group_sentences(cues))
+    texts = [' '.join(c.text for c in g) for g in groups]
+    out = os.path.join(tmp, 'out.srt')
+    repeat = args.repeat
+    results = {
+        'parse': best_of(repeat, lambda: sum(1 for _ in read_srt(path))),
+        'write': best_of(repeat, lambda: write_srt(out, cues)),
+        'group': best_of(repeat, lambda: list(group_sentences(cues))),
+        'reflow': best_of(repeat, lambda: [process_group(g, t.upper()) for g, t in zip(groups, texts)]),
+    }
+
+    memory = TranslationMemory(os.path.join(tmp, f'tm_{n}.sqlite'))
+    memory.put_many([(t, t.upper()) for t in texts], 'auto', 'bn', 'fake')
+    results['tm_hit'] = best_of(repeat, lambda: memory.get_many(texts, 'auto', 'bn', 'fake'))
+    translator = FakeTranslator('auto', 'bn')
+    results['translate_warm'] = best_of(repeat, lambda: translate_srt(path, out, translator, rate=None,
+                                                                      memory=memory))
+    assert not translator.calls, "warm run sent requests"
+    memory.close()
+    rerun = os.path.join(tmp, 'rerun.srt')
+    translate_srt(path, rerun, translator, rate=None, use_cache=False, incremental=True)
+    results['translate_rerun'] = best_of(repeat, lambda: translate_srt(path, rerun, translator, rate=None,
+                                                                       use_cache=False, incremental=True))
+
+    audio = os.path.join(tmp, f'audio_{n}.bin')
+    with open(audio, 'wb') as f:
+        f.write(os.urandom(min(n, 10000) * 1000))
+    fake = FakeTranscriber(cues)
+    cache = StageCache(os.path.join(tmp, 'stages'))
+    cache.put(cache.key(file_hash(audio), 'transcript', dict(fake.config(), chunked=False)),
+              fake.transcribe_json(audio))
+    results['transcript_hit'] = best_of(repeat, lambda: transcribe_to_srt(audio, out, client=fake, cache=cache))
+
+    if n <= args.e2e_max:
+        random.seed(n)
+        server, url = start_translate_server(args.latency, args.error_rate)
+        backend = LibreTranslateBackend(url, 'auto', 'bn')
+        results['translate_stub'] = best_of(1, lambda: translate_srt(path, out, backend, rate=None,
+                                                                     use_cache=False))
+        server.shutdown()
+        slow = FakeTranscriber(cues, latency=args.latency, error_rate=args.error_rate)
+        results['transcribe_fake'] = best_of(1, lambda: transcribe_chunked(
+            audio, out, client=slow, audio=FakeAudio(n * 2000), chunk_ms=60000, overlap_ms=2000, workers=8,
+            retries=5))
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(results, baseline, threshold):
+    """
+    Print the change against a baseline run.
+
+    Returns:
+        list: 'case@size' names that got slower than `threshold` times.
+    """
+    slower = []
+    print(f"\n{'case':<16} {'cues':>7} {'before s':>10} {'after s':>10} {'ratio':>7}")
+    for size, cases in results['results'].items():
+        for case, seconds in cases.items():
+            before = baseline['results'].get(size, {}).get(case)
+            if not before:
+                continue
+            ratio = seconds / before
+            flag = ''
+            if case in NOISY:
+                flag = '  (noisy)'
+            elif ratio > threshold:
+                flag = '  <- slower'
+                slower.append(f"{case}@{size}")
+            print(f"{case:<16} {size:>7} {before:>10.4f} {seconds:>10.4f} {ratio:>6.2f}x{flag}")
+    return slower
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run the offline benchmark suite.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="Corpus sizes, in cues")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per case; the fastest counts")
+    parser.add_argument('--latency', type=float, default=0.02, help="Fake server latency per request (s)")
+    parser.add_argument('--error-rate', type=float, default=0.05, help="Share of fake requests that fail")
+    parser.add_argument('--e2e-max', type=int, default=10000, help="Largest corpus for the end-to-end cases")
+    parser.add_argument('--out', help="Write the results to this JSON file")
+    parser.add_argument('--compare', help="Baseline JSON file to compare against")
+    parser.add_argument('--threshold', type=float, default=1.25, help="Slowdown ratio that counts as a regression")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix='bench_suite_')
+    results = {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'settings': {'repeat': args.repeat, 'latency': args.latency, 'error_rate': args.error_rate},
+        'results': {},
+    }
+    try:
+        print(f"{'case':<16} {'cues':>7} {'seconds':>10} {'us/cue':>10}")
+        for n in args.sizes:
+            cases = run_cases(n, tmp, args)
+            results['results'][str(n)] = cases
+            for case, seconds in cases.items():
+                print(f"{case:<16} {n:>7} {seconds:>10.4f} {seconds / n * 1e6:>10.2f}")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=1)
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            slower = compare(results, json.load(f), args.threshold)
+        if slower:
+            print(f"\nSlower than {args.threshold}x: {', '.join(slower)}")
+            sys.exit(1)
@@ -0,0 +1,339 @@
+# Headless batch tool: transcribe audio and translate SRT files in bulk, with no GUI.
+# Inputs may be files, glob patterns or directories (searched recursively). Audio is
+# transcribed to an English SRT; English SRTs are translated into every --targets
+# language. Files run in parallel and share one translation memory, transcript cache
+# and rate limit. Outputs that are newer than their input are skipped (see --force).
+#
+#   python cli.py "season1/*.srt" --targets bn hi --jobs 4
+#   python cli.py recordings/ --targets bn --json > progress.jsonl
+#   python cli.py "season1/*.srt" --daemon            # through a running worker_daemon.py
+#
+# Exit status: 0 if every file succeeded (or was skipped), 1 if any failed, 2 for
+# bad arguments or no inputs, 130 if interrupted.
+
+import argparse
+import glob
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import tracing
+from stage_cache import StageCache
+from subtitle_core import (transcribe_to_srt, translate_srt_multi, translated_path, AUDIO_EXTENSIONS,
+                           LANGUAGE_NAMES)
+from transcription import make_transcriber, DEFAULT_TRANSCRIBER
+from translation_memory import TranslationMemory
+from translators import Cancelled, RateLimiter, make_backend, DEFAULT_RATE, DEFAULT_WORKERS
+
+DEFAULT_JOBS = 2
+
+_TRANSLATED_SUFFIXES = tuple(f"_{name}.srt" for name in LANGUAGE_NAMES.values())
+
+
+def is_input(path, targets=()):
+    """
+    Check if a file is something this tool processes: audio, or an SRT that is not
+    itself a translation (e.g. not `talk_bangla.srt`, nor `talk_ta.srt` when `targets`
+    includes 'ta').
+    """
+    name = path.lower()
+    if name.endswith(AUDIO_EXTENSIONS):
+        return True
+    suffixes = _TRANSLATED_SUFFIXES + tuple(f"_{LANGUAGE_NAMES.get(t, t)}.srt".lower() for t in targets)
+    return name.endswith('.srt') and not name.endswith(suffixes)
+
+
+def expand_inputs(args, accept=is_input):
+    """
+    Turn file, glob and directory arguments into a list of input files.
+
+    Args:
+        args (list): Paths, glob patterns ('**' is recursive) or directories.
+        accept (callable): Which files found through a glob or directory are inputs;
+            files named outright always are. Defaults to `is_input`.
+
+    Returns:
+        tuple: The input files in a stable order without duplicates, and the
+            arguments that matched nothing.
+    """
+    files = []
+    unmatched = []
+    for arg in args:
+        if os.path.isdir(arg):
+            found = []
+            for dirpath, dirnames, filenames in os.walk(arg):
+                dirnames.sort()
+                found += [os.path.join(dirpath, n) for n in sorted(filenames)]
+        elif os.path.isfile(arg):
+            found = [arg]
+        else:
+            found = sorted(glob.glob(arg, recursive=True))
+        found = [f for f in found if os.path.isfile(f) and (f == arg or accept(f))]
+        if not found:
+            unmatched.append(arg)
+        files += found
+    seen = set()
+    unique = []
+    for f in files:
+        key = os.path.abspath(f)
+        if key not in seen:
+            seen.add(key)
+            unique.append(f)
+    return unique, unmatched
+
+
+def made_by_audio(files):
+    """
+    Find the SRT inputs that an audio input in the same list writes, e.g. `talk.srt`
+    next to `talk.mp3`. Processing both would transcribe over the SRT while it is
+    being translated, and write the same translations twice.
+
+    Returns:
+        set: The SRT paths to leave to their audio file.
+    """
+    stems = {os.path.abspath(os.path.splitext(f)[0]) for f in files if f.lower().endswith(AUDIO_EXTENSIONS)}
+    return {f for f in files if f.lower().endswith('.srt') and os.path.abspath(os.path.splitext(f)[0]) in stems}
+
+
+def _up_to_date(source, outputs):
+    mtime = os.path.getmtime(source)
+    return all(os.path.exists(out) and os.path.getmtime(out) >= mtime for out in outputs)
+
+
+class BatchRunner:
+    """
+    Process input files on a pool of threads, reporting events to a callback.
+
+    Events are dicts with an 'event' key ('start', 'progress', 'done', 'skipped',
+    'error' or 'cancelled') and the input 'file', followed by a final 'summary'.
+    """
+
+    def __init__(self, targets, jobs=DEFAULT_JOBS, transcriber=None, backend='google', url=None, model=None,
+                 workers=DEFAULT_WORKERS, rate=DEFAULT_RATE, memory=None, cache=None, force=False, incremental=False,
+                 trim=False, on_event=None, backends=None):
+        """
+        Args:
+            targets (list): Languages to translate into; empty to only transcribe audio.
+            jobs (int): Files processed at the same time.
+            transcriber (object): Transcription client for audio inputs; defaults to `make_transcriber()`.
+            backend (str): Translation backend name for `make_backend`.
+            url (str): Service URL for the 'libre' backend.
+            model (str): Model directory for the 'local' backend.
+            workers (int): Translation requests in flight per file and language.
+            rate (float): Requests per second across all files, or None for no limit (or a shared `RateLimiter`).
+            memory (TranslationMemory): Translation memory shared by all files, or None to not use one.
+            cache (StageCache): Transcript cache shared by all files, or None to not use one.
+            force (bool): Redo files whose outputs are already up to date.
+            incremental (bool): Only translate sentences changed since the last run of a file.
+            trim (bool): Cut silence out of audio before transcribing it.
+            on_event (callable): Called with each event dict, from worker threads.
+            backends (dict): Translation backends by settings and language, created on first
+                use; pass the same dict to several runners to share them.
+        """
+        self.targets = list(targets)
+        self.jobs = max(1, jobs)
+        self.transcriber = transcriber
+        self.backend = backend
+        self.url = url
+        self.model = model
+        self.workers = workers
+        self.limiter = rate if isinstance(rate, RateLimiter) else RateLimiter(rate) if rate else None
+        self.memory = memory
+        self.cache = cache
+        self.force = force
+        self.incremental = incremental
+        self.trim = trim
+        self.on_event = on_event or (lambda event: None)
+        self.backends = {} if backends is None else backends
+        self.cancel_event = threading.Event()
+        self._lock = threading.Lock()
+
+    def _emit(self, event, path, **fields):
+        with self._lock:
+            self.on_event(dict(event=event, file=path, **fields))
+
+    def run(self, files):
+        """
+        Process every file. An SRT whose audio file is also in `files` is skipped (see
+        `made_by_audio`): the audio's job transcribes and translates it.
+
+        Returns:
+            dict: The summary event, with counts of 'done', 'skipped', 'failed' and 'cancelled'.
+        """
+        start = time.perf_counter()
+        shadowed = made_by_audio(files)
+        statuses = []
+        for path in files:
+            if path in shadowed:
+                self._emit('skipped', path, reason='made from its audio file')
+                statuses.append('skipped')
+        with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+            statuses += pool.map(self._process, [f for f in files if f not in shadowed])
+        summary = {'event': 'summary', 'files': len(files), 'seconds': round(time.perf_counter() - start, 3)}
+        for status in ('done', 'skipped', 'failed', 'cancelled'):
+            summary[status] = statuses.count(status)
+        with self._lock:
+            self.on_event(summary)
+        return summary
+
+    def backend_for(self, target):
+        """
+        The translation backend for `target`, created on first use and kept for later files.
+        """
+        key = (self.backend, target, self.url, self.model)
+        backend = self.backends.get(key)
+        if backend is None:
+            backend = self.backends.setdefault(key, make_backend(self.backend, 'auto', target, url=self.url,
+                                                                 model=self.model))
+        return backend
+
+    def _process(self, path):
+        if self.cancel_event.is_set():
+            return 'cancelled'
+        is_audio = path.lower().endswith(AUDIO_EXTENSIONS)
+        srt_path = f"{os.path.splitext(path)[0]}.srt" if is_audio else path
+        outputs = ([srt_path] if is_audio else []) + [translated_path(srt_path, t) for t in self.targets]
+        if not outputs or (not self.force and _up_to_date(path, outputs)):
+            self._emit('skipped', path, outputs=outputs)
+            return 'skipped'
+        started = time.perf_counter()
+        self._emit('start', path)
+        try:
+            if is_audio:
+                transcribe_to_srt(path, srt_path, client=self.transcriber or make_transcriber(),
+                                  on_status=lambda status: self._emit('progress', path, stage='transcribe',
+                                                                      status=status),
+                                  cancel_event=self.cancel_event, cache=self.cache,
+                                  use_cache=self.cache is not None, trim=self.trim)
+            if self.targets:
+                translators = {t: self.backend_for(t) for t in self.targets}
+                translate_srt_multi(srt_path, self.targets, translators=translators, workers=self.workers,
+                                    rate=self.limiter, memory=self.memory, use_cache=self.memory is not None,
+                                    on_progress=lambda done, total: self._emit('progress', path, stage='translate',
+                                                                               done=done, total=total),
+                                    cancel_event=self.cancel_event, incremental=self.incremental)
+        except Cancelled:
+            self._emit('cancelled', path)
+            return 'cancelled'
+        except Exception as e:
+            self._emit('error', path, error=f"{type(e).__name__}: {e}")
+            return 'failed'
+        self._emit('done', path, outputs=outputs, seconds=round(time.perf_counter() - started, 3))
+        return 'done'
+
+
+def _print_human(event):
+    kind = event['event']
+    if kind == 'summary':
+        print(f"\n{event['done']} done, {event['skipped']} skipped, {event['failed']} failed, "
+              f"{event['cancelled']} cancelled in {event['seconds']:.1f}s", file=sys.stderr)
+    elif kind == 'progress':
+        detail = event.get('status') or f"{event['done']}/{event['total']}"
+        print(f"[{event['stage']}] {detail}  {event['file']}", file=sys.stderr)
+    else:
+        detail = event.get('error') or event.get('reason')
+        extra = f"  ({detail})" if detail else ''
+        print(f"[{kind:>9}] {event['file']}{extra}", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Transcribe audio and translate SRT files in bulk.")
+    parser.add_argument('inputs', nargs='+', help="Files, glob patterns or directories")
+    parser.add_argument('--targets', nargs='*', default=['bn'],
+                        help="Languages to translate into (default: bn); give none to only transcribe")
+    parser.add_argument('--jobs', type=int, default=DEFAULT_JOBS, help="Files processed at the same time")
+    parser.add_argument('--transcriber', default=DEFAULT_TRANSCRIBER, choices=['assemblyai', 'whisper'])
+    parser.add_argument('--backend', default='google', choices=['google', 'libre', 'local', 'fake'])
+    parser.add_argument('--url', help="Service URL for the 'libre' backend")
+    parser.add_argument('--model', help="CTranslate2 model directory for the 'local' backend")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help="Requests in flight per file")
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE,
+                        help="Requests per second across all files, 0 for no limit")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Use neither the translation memory nor the transcript cache")
+    parser.add_argument('--force', action='store_true', help="Redo files whose outputs are up to date")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Only translate sentences changed since the last run (keeps .manifest files)")
+    parser.add_argument('--trim-silence', action='store_true',
+                        help="Cut silence out of audio before uploading it (needs NumPy)")
+    parser.add_argument('--json', action='store_true', help="Print one JSON object per event on stdout")
+    parser.add_argument('--trace', help="Write a timing trace to this file (.json for Chrome, .jsonl)")
+    parser.add_argument('--daemon', nargs='?', const='', metavar='ADDRESS',
+                        help="Hand the files to a running worker_daemon.py (which applies its own --rate); "
+                             "processed here if none is running")
+    args = parser.parse_args(argv)
+    if args.trace:
+        tracing.enable(args.trace)
+
+    files, unmatched = expand_inputs(args.inputs, accept=lambda path: is_input(path, args.targets))
+    for arg in unmatched:
+        print(f"No input files match: {arg}", file=sys.stderr)
+    if not files:
+        return 2
+
+    def emit_json(event):
+        sys.stdout.write(json.dumps(event, ensure_ascii=False) + '\n')
+        sys.stdout.flush()
+
+    on_event = emit_json if args.json else _print_human
+    daemon = None
+    if args.daemon is not None:
+        from worker_daemon import connect
+        daemon = connect(args.daemon or None)
+        if daemon is None:
+            print("No worker daemon is running; processing the files here", file=sys.stderr)
+    memory = None
+    if daemon is not None:
+        cancel_event = threading.Event()
+        options = dict(targets=args.targets, jobs=args.jobs, transcriber=args.transcriber, backend=args.backend,
+                       url=args.url, model=args.model, workers=args.workers, force=args.force,
+                       incremental=args.incremental, trim=args.trim_silence, use_cache=not args.no_cache)
+
+        def run():
+            return daemon.run(files, on_event, cancel_event, **options)
+    else:
+        memory = None if args.no_cache else TranslationMemory()
+        needs_transcriber = any(f.lower().endswith(AUDIO_EXTENSIONS) for f in files)
+        runner = BatchRunner(args.targets, jobs=args.jobs,
+                             transcriber=make_transcriber(args.transcriber) if needs_transcriber else None,
+                             backend=args.backend, url=args.url, model=args.model, workers=args.workers,
+                             rate=args.rate or None, memory=memory, cache=None if args.no_cache else StageCache(),
+                             force=args.force, incremental=args.incremental, trim=args.trim_silence,
+                             on_event=on_event)
+        cancel_event = runner.cancel_event
+
+        def run():
+            return runner.run(files)
+    # Run in a thread so Ctrl+C reaches the main thread and can cancel the workers. Wait
+    # on an event rather than join(): on Python 3.11 a join() interrupted by Ctrl+C can
+    # leave the thread looking finished, and a daemon run needs a moment to cancel.
+    result = {}
+    finished = threading.Event()
+
+    def work():
+        try:
+            result.update(run() or {})
+        finally:
+            finished.set()
+
+    threading.Thread(target=work, daemon=True).start()
+    try:
+        while not finished.wait(0.2):
+            pass
+    except KeyboardInterrupt:
+        cancel_event.set()
+        finished.wait()
+        return 130
+    finally:
+        if memory is not None:
+            memory.close()
+    if not result:
+        return 1
+    return 1 if result['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,274 @@
+import json
+import os
+import threading
+import uuid
+
+import tracing
+from translators import Cancelled
+
+# Job Queue
+#
+# A persistent list of audio files to transcribe (and optionally translate). The
+# queue is saved to disk after every change, and each job remembers which stages
+# it has finished, so after a crash or restart unfinished jobs pick up where they
+# left off instead of starting over.
+
+DEFAULT_JOBS_PATH = os.getenv(
+    'SUBTITLE_JOBS_PATH',
+    os.path.join(os.path.expanduser('~'), '.cache', 'subtitle-generator', 'jobs.json'),
+)
+DEFAULT_CONCURRENCY = 2
+
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+
+class Job:
+    """
+    One audio file and the subtitle outputs to produce from it.
+    """
+
+    __slots__ = ('id', 'audio_path', 'translate', 'status', 'stage', 'stages_done', 'error', 'attempts',
+                 'detail')
+
+    def __init__(self, audio_path, translate=False, id=None, status=PENDING, stage=None, stages_done=None,
+                 error=None, attempts=0, detail=''):
+        """
+        Args:
+            audio_path (str): Path to the audio file.
+            translate (bool): Also produce the Bangla SRT.
+            id (str): Unique job id; generated if not given.
+            status (str): 'pending', 'running', 'done', 'failed' or 'cancelled'.
+            stage (str): The stage currently running ('transcribe' or 'translate').
+            stages_done (list): Stages already finished.
+            error (str): Message of the last failure.
+            attempts (int): How many times the job has been started.
+            detail (str): Progress of the running stage, for display (e.g. 'processing', '40%').
+        """
+        self.id = id or uuid.uuid4().hex[:12]
+        self.audio_path = audio_path
+        self.translate = translate
+        self.status = status
+        self.stage = stage
+        self.stages_done = list(stages_done or [])
+        self.error = error
+        self.attempts = attempts
+        self.detail = detail
+
+    @property
+    def eng_srt(self):
+        return f"{os.path.splitext(self.audio_path)[0]}.srt"
+
+    @property
+    def bn_srt(self):
+        return f"{os.path.splitext(self.audio_path)[0]}_bangla.srt"
+
+    def stages(self):
+        """
+        The stages this job needs, in order.
+        """
+        return ['transcribe', 'translate'] if self.translate else ['transcribe']
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class JobQueue:
+    """
+    Run jobs with a concurrency limit, persisting the queue to a JSON file.
+
+    The stage functions are passed in so the queue does not depend on the GUI
+    module: `transcribe(audio_path, srt_path, on_status=..., cancel_event=...)` and
+    `translate(srt_path, out_path, on_progress=..., cancel_event=...)`.
+    """
+
+    def __init__(self, transcribe, translate, path=DEFAULT_JOBS_PATH, concurrency=DEFAULT_CONCURRENCY,
+                 on_update=None):
+        """
+        Args:
+            transcribe (callable): Function running the transcription stage.
+            translate (callable): Function running the translation stage.
+            path (str): JSON file the queue is saved to, or None to keep it in memory only.
+            concurrency (int): Maximum number of jobs running at once.
+            on_update (callable): Called with a job whenever its status changes (from worker threads).
+        """
+        self.transcribe = transcribe
+        self.translate = translate
+        self.path = path
+        self.concurrency = max(1, concurrency)
+        self.on_update = on_update or (lambda job: None)
+        self.jobs = []
+        self.cancel_event = threading.Event()
+        self._lock = threading.RLock()
+        self._threads = []
+        self.load()
+
+    def load(self):
+        """
+        Load the saved queue. Jobs that were running when the app stopped go back to pending.
+        """
+        if not self.path or not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        with self._lock:
+            self.jobs = [Job(**entry) for entry in data.get('jobs', [])]
+            for job in self.jobs:
+                if job.status == RUNNING:
+                    job.status, job.stage, job.detail = PENDING, None, ''
+
+    def save(self):
+        """
+        Write the queue to disk atomically.
+        """
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with self._lock:
+            data = {'jobs': [job.to_dict() for job in self.jobs]}
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=1)
+            os.replace(tmp, self.path)
+
+    def add(self, audio_paths, translate=False, reuse_existing=False):
+        """
+        Add audio files to the queue. Files already queued and not finished are skipped.
+
+        Args:
+            audio_paths (list): Paths to the audio files.
+            translate (bool): Also produce Bangla SRTs.
+            reuse_existing (bool): Treat an existing English SRT as an already finished
+                transcription stage.
+
+        Returns:
+            list: The jobs that were added.
+        """
+        added = []
+        with self._lock:
+            queued = {os.path.abspath(j.audio_path) for j in self.jobs if j.status != DONE}
+            for path in audio_paths:
+                if os.path.abspath(path) in queued:
+                    continue
+                job = Job(path, translate)
+                if reuse_existing and os.path.exists(job.eng_srt):
+                    job.stages_done.append('transcribe')
+                self.jobs.append(job)
+                added.append(job)
+        self.save()
+        return added
+
+    def retry_failed(self):
+        """
+        Put failed and cancelled jobs back in the queue; finished stages are kept.
+
+        Returns:
+            int: Number of jobs re-queued.
+        """
+        count = 0
+        with self._lock:
+            for job in self.jobs:
+                if job.status in (FAILED, CANCELLED):
+                    job.status, job.error = PENDING, None
+                    count += 1
+        self.save()
+        return count
+
+    def clear_finished(self):
+        """
+        Remove finished jobs from the queue.
+        """
+        with self._lock:
+            self.jobs = [j for j in self.jobs if j.status != DONE]
+        self.save()
+
+    def start(self):
+        """
+        Start worker threads for the pending jobs; returns immediately.
+        """
+        self.cancel_event.clear()
+        self._threads = [threading.Thread(target=self._worker, daemon=True) for _ in range(self.concurrency)]
+        for t in self._threads:
+            t.start()
+
+    def stop(self):
+        """
+        Ask running jobs to stop; they are marked cancelled and can be retried.
+        """
+        self.cancel_event.set()
+
+    def is_running(self):
+        return any(t.is_alive() for t in self._threads)
+
+    def wait(self):
+        """
+        Block until every worker thread has finished.
+        """
+        for t in self._threads:
+            t.join()
+
+    def counts(self):
+        """
+        Count jobs by status.
+
+        Returns:
+            dict: Status -> number of jobs.
+        """
+        with self._lock:
+            counts = {}
+            for job in self.jobs:
+                counts[job.status] = counts.get(job.status, 0) + 1
+            return counts
+
+    def _next_job(self):
+        with self._lock:
+            for job in self.jobs:
+                if job.status == PENDING:
+                    job.status = RUNNING
+                    job.attempts += 1
+                    return job
+        return None
+
+    def _update(self, job):
+        self.save()
+        self.on_update(job)
+
+    def _worker(self):
+        while not self.cancel_event.is_set():
+            job = self._next_job()
+            if job is None:
+                return
+            self._update(job)
+            self._run(job)
+
+    def _run(self, job):
+        def status(text):
+            job.detail = text
+            self.on_update(job)
+
+        def progress(done, total):
+            status(f"{100 * done // total}%" if total else '')
+
+        try:
+            for stage in job.stages():
+                if stage in job.stages_done:
+                    continue
+                job.stage, job.detail = stage, ''
+                self._update(job)
+                with tracing.span(f'job.{stage}', job=job.id):
+                    if stage == 'transcribe':
+                        self.transcribe(job.audio_path, job.eng_srt, on_status=status,
+                                        cancel_event=self.cancel_event)
+                    else:
+                        self.translate(job.eng_srt, job.bn_srt, on_progress=progress, cancel_event=self.cancel_event)
+                job.stages_done.append(stage)
+            job.status, job.error = DONE, None
+        except Cancelled:
+            job.status = CANCELLED
+        except Exception as e:
+            job.status, job.error = FAILED, str(e)
+        job.stage, job.detail = None, ''
+        self._update(job)
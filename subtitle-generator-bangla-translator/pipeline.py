@@ -0,0 +1,286 @@
+# Headless end-to-end pipeline: video (or audio) -> audio chunks -> transcript -> translation.
+#
+# The stages run at the same time and hand work to each other over bounded queues,
+# so translation of the first sentences starts while later audio is still being
+# extracted and transcribed. A full queue makes the stage feeding it wait.
+#
+#   python pipeline.py lecture.mp4 --translate
+
+import argparse
+import os
+import queue
+import sys
+import threading
+
+import tracing
+from srt import SrtWriter
+from sentences import SentenceGrouper
+from subtitle_core import translate_groups
+from transcription import (FfmpegAudio, Stitcher, make_transcriber, plan_chunks,
+                           DEFAULT_CHUNK_MS, DEFAULT_OVERLAP_MS, DEFAULT_CHUNK_WORKERS, DEFAULT_TRANSCRIBER,
+                           DEFAULT_WHISPER_MODEL)
+from translation_memory import TranslationMemory
+from translators import (BatchTranslator, Cancelled, RateLimiter, call_with_retry, make_backend, DEFAULT_RATE,
+                         DEFAULT_WORKERS)
+
+_POLL_SECONDS = 0.1
+
+
+class PipelineCancelled(Cancelled):
+    """
+    Raised by `Pipeline.run` when the run was cancelled.
+    """
+
+
+class Pipeline:
+    """
+    Run extraction, transcription and translation as overlapping stages.
+
+    `cancel()` may be called from any thread; every stage checks for it between
+    steps and `run` then raises `PipelineCancelled`.
+    """
+
+    def __init__(self, client=None, audio=None, translator=None, memory=None, chunk_ms=DEFAULT_CHUNK_MS,
+                 overlap_ms=DEFAULT_OVERLAP_MS, transcribe_workers=DEFAULT_CHUNK_WORKERS,
+                 translate_workers=DEFAULT_WORKERS, rate=DEFAULT_RATE, queue_size=2, scan_silence=True, retries=2):
+        """
+        Args:
+            client (object): Transcription client; defaults to `make_transcriber()`.
+            audio (object): Audio tool for probing and cutting; defaults to `FfmpegAudio`.
+            translator (object): Translation backend; defaults to Google Translate (Bangla).
+            memory (TranslationMemory): Translation cache; defaults to the on-disk memory.
+            chunk_ms (int): Target audio chunk length in milliseconds.
+            overlap_ms (int): Overlap added on each side of a cut, in milliseconds.
+            transcribe_workers (int): Chunks transcribed at the same time.
+            translate_workers (int): Translation requests in flight at once.
+            rate (float): Maximum translation requests per second, or None for no limit.
+            queue_size (int): Capacity of each queue between stages.
+            scan_silence (bool): Look for silences to cut at; otherwise cut at fixed intervals.
+            retries (int): Extra attempts per chunk after a retryable transcription error.
+        """
+        self.client = client
+        self.audio = audio or FfmpegAudio()
+        self.translator = translator
+        self.memory = memory
+        self.chunk_ms = chunk_ms
+        self.overlap_ms = overlap_ms
+        self.transcribe_workers = max(1, transcribe_workers)
+        self.translate_workers = translate_workers
+        self.rate = rate
+        self.queue_size = queue_size
+        self.scan_silence = scan_silence
+        self.retries = retries
+        self._cancel = threading.Event()
+        self._errors = []
+
+    def cancel(self):
+        """
+        Ask a running pipeline to stop as soon as possible.
+        """
+        self._cancel.set()
+
+    def run(self, media_path, srt_path, translated_path=None, work_dir=None, on_progress=None):
+        """
+        Process one video or audio file.
+
+        Args:
+            media_path (str): Path to the input video or audio file.
+            srt_path (str): Path to save the English SRT file.
+            translated_path (str): Path to save the translated SRT file, or None to skip translation.
+            work_dir (str): Directory for temporary audio chunks; defaults to the input's directory.
+            on_progress (callable): Called as `on_progress(stage, done, total)` from worker threads.
+
+        Raises:
+            PipelineCancelled: If `cancel()` was called.
+        """
+        self._cancel.clear()
+        self._errors = []
+        progress = on_progress or (lambda stage, done, total: None)
+        client = self.client or make_transcriber()
+        silences = self.audio.silences(media_path) if self.scan_silence else []
+        chunks = plan_chunks(self.audio.duration(media_path), silences, self.chunk_ms, self.overlap_ms)
+        work_dir = work_dir or os.path.dirname(os.path.abspath(media_path))
+        base = os.path.splitext(os.path.basename(media_path))[0]
+
+        chunk_q = queue.Queue(self.queue_size)
+        result_q = queue.Queue(self.queue_size)
+        cue_q = queue.Queue(self.queue_size) if translated_path else None
+
+        def extract():
+            for n, chunk in enumerate(chunks):
+                path = os.path.join(work_dir, f'.{base}.chunk_{n}_{chunk[0]}_{chunk[1]}.flac')
+                with tracing.span('extract.chunk', chunk=n):
+                    self.audio.extract(media_path, chunk[0], chunk[1], path)
+                progress('extract', n + 1, len(chunks))
+                self._put(chunk_q, (n, chunk, path))
+            for _ in range(self.transcribe_workers):
+                self._put(chunk_q, None)
+
+        def transcribe_chunk(path):
+            return client.transcribe_srt(path, cancel_event=self._cancel)
+
+        def transcribe():
+            while True:
+                item = self._get(chunk_q)
+                if item is None:
+                    self._put(result_q, None)
+                    return
+                n, chunk, path = item
+                try:
+                    with tracing.span('transcribe.chunk', chunk=n):
+                        srt_text = call_with_retry(transcribe_chunk, path, retries=self.retries)
+                finally:
+                    os.remove(path)
+                self._put(result_q, (n, chunk, srt_text))
+
+        threads = [self._spawn(extract)]
+        threads += [self._spawn(transcribe) for _ in range(self.transcribe_workers)]
+        if cue_q is not None:
+            threads.append(self._spawn(self._translate_stage, cue_q, translated_path, progress))
+
+        try:
+            self._stitch_stage(result_q, cue_q, srt_path, len(chunks), progress)
+        except PipelineCancelled:
+            pass
+        except Exception as e:
+            self._fail(e)
+        for t in threads:
+            t.join()
+        # Remove chunks that were extracted but never transcribed (after a cancel or error).
+        while not chunk_q.empty():
+            item = chunk_q.get_nowait()
+            if item is not None and os.path.exists(item[2]):
+                os.remove(item[2])
+        if self._errors:
+            raise self._errors[0]
+        if self._cancel.is_set():
+            raise PipelineCancelled("Pipeline was cancelled")
+
+    def _stitch_stage(self, result_q, cue_q, srt_path, total, progress):
+        # Chunks finish out of order; hold them until their predecessors are stitched.
+        stitcher = Stitcher()
+        pending = {}
+        next_n = 0
+        finished_workers = 0
+        with SrtWriter(srt_path) as writer:
+            while finished_workers < self.transcribe_workers:
+                item = self._get(result_q)
+                if item is None:
+                    finished_workers += 1
+                    continue
+                n, chunk, srt_text = item
+                pending[n] = (chunk, srt_text)
+                while next_n in pending:
+                    cues = stitcher.add(*pending.pop(next_n))
+                    writer.write_all(cues)
+                    writer.flush()
+                    next_n += 1
+                    progress('transcribe', next_n, total)
+                    if cue_q is not None and cues:
+                        self._put(cue_q, cues)
+        if cue_q is not None:
+            self._put(cue_q, None)
+
+    def _translate_stage(self, cue_q, out_path, progress):
+        translator = self.translator or make_backend('google', source='auto', target='bn')
+        memory = self.memory if self.memory is not None else TranslationMemory()
+        engine = BatchTranslator(translator, workers=self.translate_workers,
+                                 rate_limiter=RateLimiter(self.rate) if self.rate else None, memory=memory,
+                                 cancel_event=self._cancel)
+        # The last group of a chunk may continue into the next one; the grouper holds it.
+        grouper = SentenceGrouper()
+        done = 0
+        try:
+            with SrtWriter(out_path, renumber=True) as writer:
+                while True:
+                    cues = self._get(cue_q)
+                    if cues is None:
+                        groups = grouper.flush()
+                    else:
+                        groups = [group for cue in cues for group in grouper.feed(cue)]
+                    # The grouper's held cues follow these groups; after a chunk boundary
+                    # with nothing held, the next start is not known yet.
+                    next_start = grouper.group[0].start if grouper.group else None
+                    for translated in translate_groups(engine, groups, next_start=next_start):
+                        writer.write_all(translated)
+                        done += len(translated)
+                    writer.flush()
+                    progress('translate', done, None)
+                    if cues is None:
+                        return
+        finally:
+            if self.memory is None:
+                memory.close()
+
+    def _spawn(self, target, *args):
+        def guarded():
+            try:
+                target(*args)
+            except Cancelled:
+                pass
+            except Exception as e:
+                self._fail(e)
+        t = threading.Thread(target=guarded, daemon=True)
+        t.start()
+        return t
+
+    def _fail(self, error):
+        self._errors.append(error)
+        self._cancel.set()
+
+    def _put(self, q, item):
+        while not self._cancel.is_set():
+            try:
+                q.put(item, timeout=_POLL_SECONDS)
+                return
+            except queue.Full:
+                pass
+        raise PipelineCancelled()
+
+    def _get(self, q):
+        while not self._cancel.is_set():
+            try:
+                return q.get(timeout=_POLL_SECONDS)
+            except queue.Empty:
+                pass
+        raise PipelineCancelled()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate (and translate) subtitles for a video or audio file.")
+    parser.add_argument('media', help="Input video or audio file")
+    parser.add_argument('--translate', action='store_true', help="Also write a Bangla SRT")
+    parser.add_argument('--chunk-minutes', type=float, default=DEFAULT_CHUNK_MS / 60000)
+    parser.add_argument('--transcribe-workers', type=int, default=DEFAULT_CHUNK_WORKERS)
+    parser.add_argument('--translate-workers', type=int, default=DEFAULT_WORKERS)
+    parser.add_argument('--no-silence-scan', action='store_true', help="Cut at fixed intervals")
+    parser.add_argument('--transcriber', default=DEFAULT_TRANSCRIBER, choices=['assemblyai', 'whisper'],
+                        help="'whisper' transcribes offline on this machine")
+    parser.add_argument('--whisper-model', default=DEFAULT_WHISPER_MODEL, help="Whisper model size or path")
+    parser.add_argument('--trace', help="Write a timing trace to this file (.json for Chrome, .jsonl)")
+    args = parser.parse_args(argv)
+    if args.trace:
+        tracing.enable(args.trace)
+
+    base, _ = os.path.splitext(args.media)
+    eng_srt = f"{base}.srt"
+    bn_srt = f"{base}_bangla.srt" if args.translate else None
+    options = {'model': args.whisper_model} if args.transcriber == 'whisper' else {}
+    pipeline = Pipeline(make_transcriber(args.transcriber, **options), chunk_ms=int(args.chunk_minutes * 60000),
+                        transcribe_workers=args.transcribe_workers, translate_workers=args.translate_workers,
+                        scan_silence=not args.no_silence_scan)
+
+    def report(stage, done, total):
+        print(f"{stage}: {done}/{total}" if total else f"{stage}: {done}", file=sys.stderr)
+
+    try:
+        pipeline.run(args.media, eng_srt, bn_srt, on_progress=report)
+    except KeyboardInterrupt:
+        pipeline.cancel()
+        return 130
+    print(f"Generated: {eng_srt}" + (f"\n{bn_srt}" if bn_srt else ''))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,194 @@
+import re
+
+from srt import Cue
+
+# Segmentation
+#
+# Builds subtitle cues from word-level timestamps under the usual subtitling
+# constraints: characters per line, lines per cue, minimum and maximum duration and
+# reading speed. Words are taken one at a time and a cue is closed as soon as the
+# next word would break a limit, at a long pause, or at the end of a sentence, so
+# the work is linear in the number of words.
+#
+# Translated text has no timestamps of its own. `Segmenter.reflow` lays it over the
+# time the source was spoken, in proportion to its characters, and runs the same
+# segmentation, so translated cues are cut to the same limits as the source.
+
+DEFAULT_MAX_CHARS = 42      # Characters per line
+DEFAULT_MAX_LINES = 2
+DEFAULT_MIN_MS = 1000
+DEFAULT_MAX_MS = 7000
+DEFAULT_MAX_CPS = 17.0      # Reading speed, in characters per second
+DEFAULT_MAX_GAP_MS = 1500   # A pause at least this long always ends a cue
+MIN_CUE_GAP_MS = 80         # Cues are never extended closer than this to the next one
+
+_SENTENCE_END_RE = re.compile(r'[.!?…।]["\'”’)\]]*$')
+_CLAUSE_END_RE = re.compile(r'[,;:—]["\'”’)\]]*$')
+
+
+def wrap_lines(words, max_chars, max_lines):
+    """
+    Break a cue's words into lines of roughly equal length.
+
+    The narrowest width that still fits the words into as few lines as a plain
+    greedy fill needs is used, so a two-line cue gets two similar lines instead of
+    a full one and a short one.
+
+    Args:
+        words (list): The words of the cue.
+        max_chars (int): Maximum characters per line.
+        max_lines (int): Maximum number of lines.
+
+    Returns:
+        list: The lines. A single word longer than `max_chars` gets a line of its own.
+    """
+    lines = _fill(words, max_chars)
+    if len(lines) <= 1:
+        return lines
+    target = len(lines)
+    width = max(max(len(w) for w in words), -(-len(' '.join(words)) // target))
+    while width < max_chars:
+        balanced = _fill(words, width)
+        if len(balanced) <= target:
+            return balanced
+        width += 1
+    return lines
+
+
+def _fill(words, width):
+    lines = []
+    line = ''
+    for word in words:
+        if line and len(line) + 1 + len(word) > width:
+            lines.append(line)
+            line = word
+        else:
+            line = f"{line} {word}" if line else word
+    if line:
+        lines.append(line)
+    return lines
+
+
+class Segmenter:
+    """
+    Turn timed words into subtitle cues.
+    """
+
+    def __init__(self, max_chars=DEFAULT_MAX_CHARS, max_lines=DEFAULT_MAX_LINES, min_ms=DEFAULT_MIN_MS,
+                 max_ms=DEFAULT_MAX_MS, max_cps=DEFAULT_MAX_CPS, max_gap_ms=DEFAULT_MAX_GAP_MS):
+        """
+        Args:
+            max_chars (int): Maximum characters per line.
+            max_lines (int): Maximum lines per cue.
+            min_ms (int): Shortest time a cue stays on screen.
+            max_ms (int): Longest time a cue stays on screen.
+            max_cps (float): Fastest reading speed; short cues are held longer to stay below it.
+            max_gap_ms (int): A pause between words at least this long always ends a cue.
+        """
+        self.max_chars = max_chars
+        self.max_lines = max_lines
+        self.min_ms = min_ms
+        self.max_ms = max_ms
+        self.max_cps = max_cps
+        self.max_gap_ms = max_gap_ms
+
+    def segment(self, words, first_index=1, limit=None):
+        """
+        Group timed words into cues.
+
+        Args:
+            words (list): Dicts with 'text', 'start' and 'end' (milliseconds), in
+                order, as stored in a transcript (see `transcription`).
+            first_index (int): Number of the first cue.
+            limit (int): When the next cue after these starts, if known; the last cue
+                is never held on screen into it.
+
+        Returns:
+            list: The cues, with wrapped lines.
+        """
+        groups = []
+        current = []
+        line_len = 0
+        lines = 0
+        for word in words:
+            text = word['text'].strip()
+            if not text:
+                continue
+            if current:
+                prev = current[-1]
+                start = current[0]['start']
+                fits_line = line_len + 1 + len(text) <= self.max_chars
+                if (
+                    (not fits_line and lines >= self.max_lines)
+                    or word['end'] - start > self.max_ms
+                    or word['start'] - prev['end'] >= self.max_gap_ms
+                    or (_SENTENCE_END_RE.search(prev['text']) and prev['end'] - start >= self.min_ms)
+                    or (_CLAUSE_END_RE.search(prev['text'])
+                        and (lines - 1) * self.max_chars + line_len >= self.max_chars * self.max_lines // 2)
+                ):
+                    groups.append(current)
+                    current, line_len, lines = [], 0, 0
+            if current and line_len + 1 + len(text) <= self.max_chars:
+                line_len += 1 + len(text)
+            else:
+                line_len = len(text)
+                lines += 1
+            current.append({'text': text, 'start': word['start'], 'end': word['end']})
+        if current:
+            groups.append(current)
+        return self._timed_cues(groups, first_index, limit)
+
+    def _timed_cues(self, groups, first_index, limit=None):
+        cues = []
+        for n, group in enumerate(groups):
+            texts = [w['text'] for w in group]
+            start, end = group[0]['start'], group[-1]['end']
+            # Hold short or dense cues longer, but never into the next cue.
+            wanted = start + max(self.min_ms, int(len(' '.join(texts)) * 1000 / self.max_cps))
+            if wanted > end:
+                next_start = groups[n + 1][0]['start'] if n + 1 < len(groups) else limit
+                if next_start is not None:
+                    wanted = min(wanted, next_start - MIN_CUE_GAP_MS)
+                end = max(end, min(wanted, start + self.max_ms))
+            cues.append(Cue(first_index + n, start, end, wrap_lines(texts, self.max_chars, self.max_lines)))
+        return cues
+
+    def reflow(self, text, spans, first_index=1, limit=None):
+        """
+        Lay text without timestamps over the times the source was spoken, then segment it.
+
+        Words are spread over the spoken time in proportion to their length, skipping
+        the pauses between spans, so a long pause in the source ends a cue in the
+        result too.
+
+        Args:
+            text (str): The text to place, e.g. a translated sentence.
+            spans (list): (start, end) tuples in milliseconds when the source was
+                spoken, in order: its word timestamps, or its cues' timings.
+            first_index (int): Number of the first cue.
+            limit (int): When the next cue after the source starts, if known (see `segment`).
+
+        Returns:
+            list: The cues; empty if `text` has no words.
+        """
+        tokens = text.split()
+        spans = [(s, e) for s, e in spans if e > s] or spans[:1]
+        if not tokens or not spans:
+            return []
+        spoken = sum(e - s for s, e in spans)
+        weights = [len(t) + 1 for t in tokens]
+        scale = spoken / sum(weights)
+        words = []
+        span = 0
+        offset = 0          # Spoken time before the current span
+        position = 0.0      # Spoken time at the start of the current word
+        for token, weight in zip(tokens, weights):
+            start_pos, position = position, position + weight * scale
+            while span < len(spans) - 1 and start_pos >= offset + spans[span][1] - spans[span][0]:
+                offset += spans[span][1] - spans[span][0]
+                span += 1
+            start = spans[span][0] + int(start_pos - offset)
+            # A word never runs on across a pause.
+            end = min(spans[span][1], spans[span][0] + int(position - offset))
+            words.append({'text': token, 'start': start, 'end': max(start, end)})
+        return self.segment(words, first_index, limit)
@@ -0,0 +1,217 @@
+import re
+
+# Sentence Boundaries
+#
+# Decides where sentences end, so cues can be grouped and translated a sentence at a
+# time. Only the end of each piece of text is inspected, so grouping is a single
+# pass over the cues. A '.' after a known abbreviation does not end a sentence. An
+# ellipsis does, unless the next cue carries on from it (starts with an ellipsis or
+# a lowercase letter). So does a '.' after a word that is only sometimes an
+# abbreviation ("No. 5" but "I said no.") unless a number or a lowercase word
+# follows, and after an initial ("J. Smith" but "Vitamin E.") unless any word
+# follows. A group that never reaches a full stop is cut after `MAX_GROUP_CHARS`
+# so one missing period cannot swallow the rest of the file.
+
+MAX_GROUP_CHARS = 600
+
+ABBREVIATIONS = frozenset({
+    'mr', 'mrs', 'ms', 'dr', 'prof', 'sr', 'jr', 'mt', 'vs', 'vol', 'approx', 'e.g', 'i.e', 'cf',
+    'dept', 'gov', 'lt', 'sgt', 'capt', 'inc', 'ltd', 'corp', 'u.s', 'u.k', 'a.m', 'p.m', 'feb',
+    'apr', 'jun', 'jul', 'aug', 'sep', 'sept', 'oct', 'nov',
+})
+
+# Abbreviations that are also everyday words: they end a sentence unless a number or
+# a lowercase word comes next.
+AMBIGUOUS_ABBREVIATIONS = frozenset({
+    'no', 'st', 'co', 'est', 'gen', 'col', 'rev', 'fig', 'jan', 'mar', 'dec',
+})
+
+_CLOSERS = '"\'”’)]'
+_OPENERS = '"\'“‘(['
+_TERMINAL = '?!।'           # Always end a sentence ('।' is the Bangla full stop)
+_CONTINUES_RE = re.compile(r'\s*["“‘(\[]*(?:\.\.\.|…|[a-z])')
+_AFTER_ABBREVIATION_RE = re.compile(r'\s*[(\[]*[0-9a-z]')
+_AFTER_INITIAL_RE = re.compile(r'\s*[(\[]*[0-9A-Za-z]')
+# A run of sentence punctuation followed by whitespace or the end of the text. A
+# decimal point is followed by a digit, so it never matches.
+_BOUNDARY_RE = re.compile(r'(?:\.\.\.|[.!?…।])+[' + re.escape(_CLOSERS) + r']*(?=\s|$)')
+
+END = 'end'
+ELLIPSIS = 'ellipsis'
+ABBREVIATION = 'abbreviation'
+INITIAL = 'initial'
+
+
+def ending(text):
+    """
+    Classify how a piece of text ends.
+
+    Args:
+        text (str): A cue's text, or the text up to a candidate boundary.
+
+    Returns:
+        str: `END` for a sentence end, or None. `ELLIPSIS`, `ABBREVIATION` and
+            `INITIAL` (a trailing ellipsis, a word in `AMBIGUOUS_ABBREVIATIONS` or a
+            single capital letter before a '.') are ends unless the next text carries
+            on from them; see `carries_on`.
+    """
+    tail = text.rstrip().rstrip(_CLOSERS)
+    if not tail:
+        return None
+    last = tail[-1]
+    if last in _TERMINAL:
+        return END
+    if last == '…' or tail.endswith('...'):
+        return ELLIPSIS
+    if last != '.':
+        return None
+    words = tail.rsplit(None, 2)
+    word = words[-1][:-1].lstrip(_OPENERS)
+    if word.lower() in ABBREVIATIONS:
+        return None
+    if word.lower() in AMBIGUOUS_ABBREVIATIONS:
+        return ABBREVIATION
+    # An initial, as in "J. Smith" or "John F. Kennedy"; after a lowercase word
+    # ("take vitamin E.") a capital letter is not a name.
+    if len(word) == 1 and word.isupper() and word != 'I' and (len(words) < 2 or not words[-2][:1].islower()):
+        return INITIAL
+    return END
+
+
+def continues(text):
+    """
+    Check if text carries on the sentence before it (starts with an ellipsis or lowercase).
+    """
+    return bool(_CONTINUES_RE.match(text))
+
+
+def carries_on(kind, next_text):
+    """
+    Check if `next_text` carries on a sentence whose text so far ended as `kind`
+    (see `ending`), so that it does not end there after all.
+    """
+    if kind == ELLIPSIS:
+        return continues(next_text)
+    if kind == ABBREVIATION:
+        return bool(_AFTER_ABBREVIATION_RE.match(next_text))
+    if kind == INITIAL:
+        return bool(_AFTER_INITIAL_RE.match(next_text))
+    return False
+
+
+def is_sentence_end(text, next_text=None):
+    """
+    Check if a sentence ends at the end of `text`.
+
+    Args:
+        text (str): The text to check.
+        next_text (str): The text that follows, used to tell whether an ellipsis,
+            abbreviation or initial ends the sentence. Without it, they count as an end.
+
+    Returns:
+        bool: True if the sentence ends here.
+    """
+    kind = ending(text)
+    if kind is None:
+        return False
+    return not (next_text and carries_on(kind, next_text))
+
+
+def split_sentences(text):
+    """
+    Split running text into sentences in one pass.
+
+    Args:
+        text (str): The text to split.
+
+    Returns:
+        list: The sentences, stripped.
+    """
+    sentences = []
+    start = 0
+    for m in _BOUNDARY_RE.finditer(text):
+        following = text[m.end():m.end() + 8]
+        # A lowercase word after '?' or '!' (as in '"Really?" she asked.') carries on.
+        if not continues(following) and is_sentence_end(text[start:m.end()], following):
+            sentences.append(text[start:m.end()].strip())
+            start = m.end()
+    rest = text[start:].strip()
+    if rest:
+        sentences.append(rest)
+    return sentences
+
+
+class SentenceGrouper:
+    """
+    Group cues into sentences as they arrive, for streaming.
+
+    `feed` each cue in order and collect the groups it completes; `flush` at the end
+    returns the last, unfinished group.
+    """
+
+    def __init__(self, max_chars=MAX_GROUP_CHARS):
+        """
+        Args:
+            max_chars (int): Close a group once its text reaches this many characters,
+                even without a sentence end.
+        """
+        self.max_chars = max_chars
+        self.group = []
+        self._chars = 0
+        self._pending = None
+
+    def feed(self, cue):
+        """
+        Add the next cue.
+
+        Returns:
+            list: Groups (lists of cues) completed by this cue; usually zero or one.
+                A group ending in an ellipsis, an ambiguous abbreviation or an initial
+                is held until the next cue shows whether the sentence continues, so
+                up to two can be returned.
+        """
+        text = cue.text
+        done = []
+        if self._pending:
+            pending, self._pending = self._pending, None
+            if not carries_on(pending, text):
+                done.append(self._take())
+        self.group.append(cue)
+        self._chars += len(text) + 1
+        kind = ending(text)
+        if kind == END or self._chars >= self.max_chars:
+            done.append(self._take())
+        elif kind is not None:
+            self._pending = kind
+        return done
+
+    def flush(self):
+        """
+        Return the remaining cues as a final group (empty list if there are none).
+        """
+        self._pending = None
+        return [self._take()] if self.group else []
+
+    def _take(self):
+        group, self.group, self._chars = self.group, [], 0
+        return group
+
+
+def group_sentences(cues, max_chars=MAX_GROUP_CHARS):
+    """
+    Group consecutive cues into full sentences.
+
+    A group ends at a cue that ends a sentence, so each group can be translated as
+    one sentence. See `SentenceGrouper`.
+
+    Args:
+        cues (iterable): The cues to group, in order.
+        max_chars (int): Longest group, in characters, before it is cut anyway.
+
+    Yields:
+        list: The cues of each sentence group.
+    """
+    grouper = SentenceGrouper(max_chars)
+    for cue in cues:
+        yield from grouper.feed(cue)
+    yield from grouper.flush()
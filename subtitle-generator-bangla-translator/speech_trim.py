@@ -0,0 +1,231 @@
+import io
+import os
+import subprocess
+import wave
+
+from audio_extract import find_ffmpeg, ENCODERS
+from srt import Cue, SrtWriter, read_srt
+
+# Silence Trimming
+#
+# Cuts the silence and pauses out of a recording before it is uploaded, so neither
+# the upload nor the transcription pays for them. A frame-energy voice activity
+# detector (NumPy, vectorized over all frames at once) finds the speech; the speech
+# regions are joined with a short gap between them and the `OffsetTable` maps every
+# timestamp of the transcript back to where it was spoken in the original file.
+#
+# NumPy is imported when trimming is first used, so importing this module is cheap.
+
+TRIM_RATE = 16000           # Sample rate the audio is analysed and uploaded at
+FRAME_MS = 20               # Length of one analysis frame
+MARGIN_DB = 12.0            # How far above the noise floor a frame must be to count as speech
+SPEECH_RANGE_DB = 30.0      # ...but never require more than this far below the loud parts
+ABS_FLOOR_DB = -55.0        # Frames quieter than this (dB below full scale) are never speech
+MIN_SILENCE_MS = 700        # Shorter pauses are kept as they are
+MIN_SPEECH_MS = 100         # Shorter bursts (clicks, breaths) are dropped
+PAD_MS = 200                # Audio kept on each side of a speech region
+GAP_MS = 150                # Silence put between two joined regions
+
+
+def detect_speech(samples, rate=TRIM_RATE, frame_ms=FRAME_MS, margin_db=MARGIN_DB, min_silence_ms=MIN_SILENCE_MS,
+                  min_speech_ms=MIN_SPEECH_MS, pad_ms=PAD_MS):
+    """
+    Find the speech regions of mono 16-bit audio.
+
+    The level of every frame is computed at once; frames louder than the noise floor
+    (the quietest tenth of the frames) plus `margin_db` count as speech. Pauses shorter
+    than `min_silence_ms` are bridged, bursts shorter than `min_speech_ms` dropped, and
+    each region is padded by `pad_ms` on both sides.
+
+    Args:
+        samples (numpy.ndarray): int16 samples.
+        rate (int): Sample rate in Hz.
+
+    Returns:
+        list: (start, end) sample ranges of speech, in order and not overlapping.
+    """
+    import numpy as np
+    frame = max(1, rate * frame_ms // 1000)
+    count = len(samples) // frame
+    if count == 0:
+        return [(0, len(samples))] if len(samples) else []
+    frames = samples[:count * frame].astype(np.float32).reshape(count, frame) / 32768.0
+    level = 10 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+    floor, loud = np.percentile(level, [10, 95])
+    threshold = max(ABS_FLOOR_DB, min(floor + margin_db, loud - SPEECH_RANGE_DB))
+    starts, ends = _runs(level > threshold)
+    starts, ends = _bridge(starts, ends, min_silence_ms // frame_ms)
+    long = ends - starts >= max(1, min_speech_ms // frame_ms)
+    pad = rate * pad_ms // 1000
+    starts = np.maximum(starts[long] * frame - pad, 0)
+    ends = np.minimum(ends[long] * frame + pad, len(samples))
+    starts, ends = _bridge(starts, ends, 1)
+    return list(zip(starts.tolist(), ends.tolist()))
+
+
+def _runs(mask):
+    # Start and end (exclusive) indices of each run of True.
+    import numpy as np
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], mask.astype(np.int8), [0]))))
+    return edges[0::2], edges[1::2]
+
+
+def _bridge(starts, ends, min_gap):
+    # Join runs separated by less than `min_gap`.
+    import numpy as np
+    if len(starts) < 2:
+        return starts, ends
+    keep = starts[1:] - ends[:-1] >= min_gap
+    return np.concatenate((starts[:1], starts[1:][keep])), np.concatenate((ends[:-1][keep], ends[-1:]))
+
+
+class OffsetTable:
+    """
+    Maps times on the trimmed audio back onto the original recording.
+
+    Region k of the original, [start_k, start_k + length_k), is at [c_k, c_k + length_k)
+    in the trimmed audio, followed by a gap of silence. A time is looked up with one
+    binary search; times that fall in a gap are moved to the edge of the nearest
+    region (forward for start times, back for end times).
+    """
+
+    def __init__(self, regions, rate=TRIM_RATE, gap_ms=GAP_MS):
+        """
+        Args:
+            regions (list): (start, end) sample ranges kept from the original.
+            rate (int): Sample rate in Hz.
+            gap_ms (int): Silence between regions in the trimmed audio.
+        """
+        import numpy as np
+        bounds = np.array(regions, dtype=np.float64).reshape(-1, 2) * 1000 / rate
+        self.original_start = bounds[:, 0]
+        self.length = bounds[:, 1] - bounds[:, 0]
+        self.trimmed_start = np.concatenate(([0.0], np.cumsum(self.length + gap_ms)[:-1]))
+        self.gap_ms = gap_ms
+
+    @property
+    def kept_ms(self):
+        """
+        Milliseconds of the original that were kept.
+        """
+        return float(self.length.sum())
+
+    def to_original(self, times, end=False):
+        """
+        Map trimmed-audio times to the original recording.
+
+        Args:
+            times (list): Times in milliseconds on the trimmed audio.
+            end (bool): The times end something (a word, a cue): at a region boundary
+                or in a gap they stay with the region before.
+
+        Returns:
+            numpy.ndarray: Original times in whole milliseconds.
+        """
+        import numpy as np
+        t = np.asarray(times, dtype=np.float64)
+        if not len(self.length):
+            return np.zeros(t.shape, dtype=np.int64)
+        last = len(self.length) - 1
+        k = np.clip(np.searchsorted(self.trimmed_start, t, side='left' if end else 'right') - 1, 0, last)
+        offset = np.maximum(t - self.trimmed_start[k], 0)
+        if end:
+            offset = np.minimum(offset, self.length[k])
+        else:
+            in_gap = (offset > self.length[k]) & (k < last)
+            k = np.where(in_gap, k + 1, k)
+            offset = np.where(in_gap, 0, np.minimum(offset, self.length[k]))
+        return np.rint(self.original_start[k] + offset).astype(np.int64)
+
+
+def read_audio(path, rate=TRIM_RATE):
+    """
+    Decode audio to mono 16-bit samples.
+
+    16-bit WAV files are read directly; anything else is decoded with ffmpeg.
+
+    Returns:
+        tuple: The samples (numpy.ndarray of int16) and their sample rate.
+    """
+    import numpy as np
+    if path.lower().endswith('.wav'):
+        with wave.open(path, 'rb') as w:
+            if w.getsampwidth() == 2:
+                data = np.frombuffer(w.readframes(w.getnframes()), dtype='<i2')
+                channels = w.getnchannels()
+                if channels > 1:
+                    data = data.reshape(-1, channels).mean(axis=1).astype(np.int16)
+                return data, w.getframerate()
+    out = subprocess.run([find_ffmpeg(), '-v', 'error', '-i', path, '-vn', '-ac', '1', '-ar', str(rate),
+                          '-f', 's16le', 'pipe:1'], capture_output=True, check=True).stdout
+    return np.frombuffer(out, dtype='<i2'), rate
+
+
+def write_audio(samples, rate, path):
+    """
+    Write mono 16-bit samples; the format comes from the extension of `path`.
+    """
+    fmt = os.path.splitext(path)[1].lstrip('.').lower()
+    if fmt == 'wav':
+        with wave.open(path, 'wb') as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(rate)
+            w.writeframes(samples.astype('<i2').tobytes())
+        return
+    subprocess.run([find_ffmpeg(), '-y', '-v', 'error', '-f', 's16le', '-ar', str(rate), '-ac', '1', '-i', 'pipe:0']
+                   + ENCODERS[fmt] + [path], input=samples.astype('<i2').tobytes(), check=True)
+
+
+def trim_silence(audio_path, out_path, gap_ms=GAP_MS, **options):
+    """
+    Write the speech of a recording, without the silence, to `out_path`.
+
+    Args:
+        audio_path (str): The original audio (or video) file.
+        out_path (str): Trimmed audio to write (e.g. '.flac' or '.wav').
+        gap_ms (int): Silence put between joined regions, so words do not run together.
+        **options: Detector settings for `detect_speech`.
+
+    Returns:
+        tuple: The `OffsetTable` for the trimmed audio, and the original duration in milliseconds.
+    """
+    import numpy as np
+    samples, rate = read_audio(audio_path)
+    regions = detect_speech(samples, rate, **options)
+    gap = np.zeros(rate * gap_ms // 1000, dtype=np.int16)
+    pieces = []
+    for start, end in regions:
+        if pieces:
+            pieces.append(gap)
+        pieces.append(samples[start:end])
+    write_audio(np.concatenate(pieces) if pieces else samples[:0], rate, out_path)
+    return OffsetTable(regions, rate, gap_ms), len(samples) * 1000 // rate
+
+
+def remap_transcript(transcript, table):
+    """
+    Move the word and cue timestamps of a transcript of trimmed audio back onto the
+    original recording.
+
+    Args:
+        transcript (dict): Transcript as returned by a client's `transcribe_json`.
+        table (OffsetTable): The table from `trim_silence`.
+
+    Returns:
+        dict: A copy of the transcript with remapped 'words' and 'srt'.
+    """
+    result = dict(transcript)
+    words = transcript.get('words')
+    if words:
+        starts = table.to_original([w['start'] for w in words])
+        ends = table.to_original([w['end'] for w in words], end=True)
+        result['words'] = [dict(w, start=int(s), end=int(max(s, e))) for w, s, e in zip(words, starts, ends)]
+    if transcript.get('srt'):
+        cues = list(read_srt(io.StringIO(transcript['srt'])))
+        starts = table.to_original([c.start for c in cues])
+        ends = table.to_original([c.end for c in cues], end=True)
+        out = io.StringIO()
+        SrtWriter(out).write_all(Cue(c.index, int(s), int(max(s, e)), c.lines) for c, s, e in zip(cues, starts, ends))
+        result['srt'] = out.getvalue()
+    return result
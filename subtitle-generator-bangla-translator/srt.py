@@ -0,0 +1,234 @@
+import re
+
+# SRT Reading and Writing
+#
+# `read_srt` is a generator that yields one `Cue` at a time and `SrtWriter` writes
+# cues out as soon as they are ready, so neither keeps the whole file in memory.
+
+_TIMESTAMP_RE = re.compile(r'^(?:(\d+):)?(\d{1,2}):(\d{1,2})(?:[,.](\d{1,3}))?$')
+_TIMING_RE = re.compile(r'^\s*(\S+)\s*-->\s*(\S+)')
+
+
+class Cue:
+    """
+    A single subtitle: its index, start/end times in milliseconds and text lines.
+    """
+
+    __slots__ = ('index', 'start', 'end', 'lines')
+
+    def __init__(self, index, start, end, lines):
+        """
+        Args:
+            index (int): The cue number.
+            start (int): Start time in milliseconds.
+            end (int): End time in milliseconds.
+            lines (list): The text lines of the cue.
+        """
+        self.index = index
+        self.start = start
+        self.end = end
+        self.lines = lines
+
+    @property
+    def text(self):
+        """
+        The cue's text lines joined with spaces.
+        """
+        return ' '.join(self.lines)
+
+    def timing(self):
+        """
+        Format the cue's timing line, e.g. '00:00:01,000 --> 00:00:02,500'.
+        """
+        return f"{format_timestamp(self.start)} --> {format_timestamp(self.end)}"
+
+    def __eq__(self, other):
+        if not isinstance(other, Cue):
+            return NotImplemented
+        return (self.index, self.start, self.end, self.lines) == (other.index, other.start, other.end, other.lines)
+
+    def __repr__(self):
+        return f"Cue({self.index}, {self.start}, {self.end}, {self.lines!r})"
+
+
+def parse_timestamp(text):
+    """
+    Parse an SRT timestamp such as '01:02:03,456' into milliseconds.
+
+    The hours and milliseconds are optional, and '.' is accepted in place of ','.
+
+    Args:
+        text (str): The timestamp.
+
+    Returns:
+        int: The time in milliseconds.
+
+    Raises:
+        ValueError: If the timestamp is malformed.
+    """
+    m = _TIMESTAMP_RE.match(text.strip())
+    if not m:
+        raise ValueError(f"Invalid SRT timestamp: {text!r}")
+    hours, minutes, seconds, millis = m.groups()
+    millis = int(millis.ljust(3, '0')) if millis else 0
+    return ((int(hours or 0) * 60 + int(minutes)) * 60 + int(seconds)) * 1000 + millis
+
+
+def format_timestamp(ms):
+    """
+    Format milliseconds as an SRT timestamp ('HH:MM:SS,mmm').
+
+    Args:
+        ms (int): The time in milliseconds; negative values are clamped to zero.
+
+    Returns:
+        str: The formatted timestamp.
+    """
+    ms = max(0, int(ms))
+    seconds, millis = divmod(ms, 1000)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d},{millis:03d}"
+
+
+def parse_timing(line):
+    """
+    Parse a timing line into start and end times.
+
+    Args:
+        line (str): A line such as '00:00:01,000 --> 00:00:02,500'.
+
+    Returns:
+        tuple: (start, end) in milliseconds, or None if the line is not a valid timing line.
+    """
+    m = _TIMING_RE.match(line)
+    if not m:
+        return None
+    try:
+        return parse_timestamp(m.group(1)), parse_timestamp(m.group(2))
+    except ValueError:
+        return None
+
+
+def _parse_block(lines, next_index):
+    # A block is the run of lines between blank lines. It normally holds one cue, but
+    # a missing blank line can merge several, so every valid timing line starts a cue.
+    timings = [(i, t) for i, t in ((i, parse_timing(line)) for i, line in enumerate(lines)) if t]
+    cues = []
+    for k, (pos, (start, end)) in enumerate(timings):
+        stop = timings[k + 1][0] if k + 1 < len(timings) else len(lines)
+        # The line just before the next timing line is that cue's index, if numeric.
+        if k + 1 < len(timings) and stop - 1 > pos and lines[stop - 1].isdigit():
+            stop -= 1
+        if pos > 0 and lines[pos - 1].isdigit():
+            index = int(lines[pos - 1])
+        else:
+            index = next_index
+        cues.append(Cue(index, start, end, lines[pos + 1:stop]))
+        next_index = index + 1
+    return cues
+
+
+def read_srt(source):
+    """
+    Yield the cues of an SRT file one at a time.
+
+    Handles a UTF-8 BOM, CRLF line endings, multi-line cues and text lines that are
+    just numbers. Blocks without a valid timing line are skipped.
+
+    Args:
+        source (str or file): Path to the SRT file, or an open text file.
+
+    Yields:
+        Cue: Each cue in file order.
+    """
+    if isinstance(source, str):
+        with open(source, 'r', encoding='utf-8-sig') as f:
+            yield from read_srt(f)
+        return
+    block = []
+    next_index = 1
+    for line in source:
+        line = line.strip().lstrip('\ufeff')
+        if line:
+            block.append(line)
+            continue
+        if block:
+            for cue in _parse_block(block, next_index):
+                next_index = cue.index + 1
+                yield cue
+            block = []
+    if block:
+        yield from _parse_block(block, next_index)
+
+
+class SrtWriter:
+    """
+    Write cues to an SRT file as they become available.
+
+    Use as a context manager; the file is closed on exit.
+    """
+
+    def __init__(self, target, renumber=False):
+        """
+        Args:
+            target (str or file): Output path, or an open text file.
+            renumber (bool): Number cues 1, 2, 3... instead of keeping their indexes.
+        """
+        self._own = isinstance(target, str)
+        self._file = open(target, 'w', encoding='utf-8') if self._own else target
+        self.renumber = renumber
+        self.count = 0
+
+    def write(self, cue):
+        """
+        Write one cue.
+
+        Args:
+            cue (Cue): The cue to write.
+        """
+        self.count += 1
+        index = self.count if self.renumber else cue.index
+        self._file.write(f"{index}\n{cue.timing()}\n")
+        for line in cue.lines:
+            self._file.write(line + '\n')
+        self._file.write('\n')
+
+    def write_all(self, cues):
+        """
+        Write every cue from an iterable.
+        """
+        for cue in cues:
+            self.write(cue)
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        if self._own:
+            self._file.close()
+        else:
+            self._file.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_srt(path, cues, renumber=False):
+    """
+    Write cues to an SRT file.
+
+    Args:
+        path (str): Output file path.
+        cues (iterable): The cues to write.
+        renumber (bool): Number cues 1, 2, 3... instead of keeping their indexes.
+
+    Returns:
+        int: Number of cues written.
+    """
+    with SrtWriter(path, renumber) as writer:
+        writer.write_all(cues)
+        return writer.count
@@ -0,0 +1,112 @@
+import hashlib
+import json
+import mmap
+import os
+
+# Stage Cache
+#
+# Content-addressed store for the results of expensive stages. A result is keyed on
+# a hash of the input file's bytes plus the stage name and its configuration, so
+# re-running with the same audio and settings never re-uploads or re-transcribes,
+# no matter where the file was moved or what it is called.
+
+DEFAULT_CACHE_DIR = os.getenv(
+    'SUBTITLE_CACHE_DIR',
+    os.path.join(os.path.expanduser('~'), '.cache', 'subtitle-generator', 'stages'),
+)
+HASH_BLOCK = 8 << 20
+
+
+def file_hash(path):
+    """
+    Hash a file's contents without loading it into memory.
+
+    The file is memory-mapped and fed to BLAKE2b in fixed-size slices, so multi-GB
+    files cost only page cache, not process memory.
+
+    Args:
+        path (str): The file to hash.
+
+    Returns:
+        str: Hex BLAKE2b digest (160 bits).
+    """
+    h = hashlib.blake2b(digest_size=20)
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return h.hexdigest()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            view = memoryview(m)
+            try:
+                for offset in range(0, len(m), HASH_BLOCK):
+                    h.update(view[offset:offset + HASH_BLOCK])
+            finally:
+                view.release()
+    return h.hexdigest()
+
+
+class StageCache:
+    """
+    JSON results on disk, addressed by input hash, stage name and configuration.
+    """
+
+    def __init__(self, root=DEFAULT_CACHE_DIR):
+        """
+        Args:
+            root (str): Directory holding the cached results.
+        """
+        self.root = root
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(input_hash, stage, config):
+        """
+        Build the cache key for a stage result.
+
+        Args:
+            input_hash (str): Content hash of the input file (see `file_hash`).
+            stage (str): Stage name, e.g. 'transcript'.
+            config (dict): Everything that affects the result (provider, model, options).
+
+        Returns:
+            str: Hex key.
+        """
+        blob = json.dumps([input_hash, stage, config], sort_keys=True, separators=(',', ':'))
+        return hashlib.blake2b(blob.encode('utf-8'), digest_size=20).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.root, key[:2], f"{key}.json")
+
+    def get(self, key):
+        """
+        Load a cached result.
+
+        Args:
+            key (str): Key from `key()`.
+
+        Returns:
+            dict: The stored result, or None if there is none.
+        """
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return data
+
+    def put(self, key, data):
+        """
+        Store a result, replacing any previous one atomically.
+
+        Args:
+            key (str): Key from `key()`.
+            data (dict): JSON-serializable result.
+        """
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, path)
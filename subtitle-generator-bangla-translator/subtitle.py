@@ -1,137 +1,18 @@
 import os
-import assemblyai as aai
-from deep_translator import GoogleTranslator
-import re
+import queue
+import threading
+from functools import partial
 import tkinter as tk
-from tkinter import filedialog, messagebox
-
-# Configuration
-API_KEY = os.getenv('ASSEMBLYAI_API_KEY', 'YOUR_API_KEY_HERE')
-aai.settings.api_key = API_KEY
-
-# Translation Utilities
-
-def ends_with_punctuation(text):
-    """
-    Check if the text ends with a punctuation mark (., !, ?, or …).
-
-    Args:
-        text (str): The input text to check.
-
-    Returns:
-        bool: True if the text ends with punctuation, False otherwise.
-    """
-    return bool(re.search(r'[.!?…]$', text.strip()))
-
-def split_text(translated_text, proportions):
-    """
-    Split translated text into parts based on given proportions to maintain subtitle timing.
-
-    Args:
-        translated_text (str): The text to split.
-        proportions (list): A list of proportions to divide the text.
-
-    Returns:
-        list: A list of text segments based on the proportions.
-    """
-    words = translated_text.split()
-    total = len(words)
-    if total == 0:
-        return [''] * len(proportions)
-    cum = 0
-    splits = []
-    indices = []
-    for p in proportions[:-1]:
-        cum += p
-        indices.append(round(cum * total))
-    start = 0
-    for idx in indices:
-        splits.append(' '.join(words[start:idx]))
-        start = idx
-    splits.append(' '.join(words[start:]))
-    return splits
-
-def translate_srt(input_path, output_path):
-    """
-    Translate an SRT subtitle file from English to Bangla.
-
-    Args:
-        input_path (str): Path to the input SRT file.
-        output_path (str): Path to save the translated SRT file.
-    """
-    with open(input_path, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
-    translated_lines = []
-    group = []
-    buffer = ""
-    for line in lines:
-        strip = line.strip()
-        if not strip:
-            continue
-        if strip.isdigit():
-            if group and ends_with_punctuation(buffer):
-                process_group(group, buffer, translated_lines)
-                group, buffer = [], ""
-            group.append([strip])
-        elif '-->' in strip:
-            group[-1].append(strip)
-        else:
-            buffer += strip + ' '
-            group[-1].append(strip)
-            if ends_with_punctuation(strip):
-                process_group(group, buffer, translated_lines)
-                group, buffer = [], ""
-    if group:
-        process_group(group, buffer, translated_lines)
-    with open(output_path, 'w', encoding='utf-8') as f:
-        for l in translated_lines:
-            f.write(l + '\n')
-
-def process_group(group, buffer, out_lines):
-    """
-    Process a group of subtitle lines and translate the text.
-
-    Args:
-        group (list): List of subtitle lines (number, timestamp, text).
-        buffer (str): Accumulated text to translate.
-        out_lines (list): List to store the translated lines.
-    """
-    if not group:
-        return
-    text = buffer.strip()
-    trans = GoogleTranslator(source='auto', target='bn').translate(text)
-    if len(group) == 1:
-        block = group[0]
-        out_lines.extend(block[:2] + [trans, ''])
-        return
-    lengths = [len(' '.join(b[2:])) for b in group]
-    total_len = sum(lengths)
-    proportions = [l/total_len for l in lengths]
-    parts = split_text(trans, proportions)
-    for i, b in enumerate(group):
-        out_lines.extend(b[:2] + [parts[i], ''])
-
-# Subtitle Generation
-def transcribe_to_srt(audio_path, srt_path):
-    """
-    Convert an audio file into an SRT subtitle file using AssemblyAI.
-
-    Args:
-        audio_path (str): Path to the input audio file.
-        srt_path (str): Path to save the generated SRT file.
-
-    Raises:
-        RuntimeError: If transcription fails due to an error from AssemblyAI.
-    """
-    config = aai.TranscriptionConfig(speech_model=aai.SpeechModel.best)
-    transcriber = aai.Transcriber(config=config)
-    transcript = transcriber.transcribe(audio_path)
-    if transcript.status == 'error':
-        raise RuntimeError(f"Transcription failed: {transcript.error}")
-    srt = transcript.export_subtitles_srt()
-    with open(srt_path, 'w', encoding='utf-8') as f:
-        f.write(srt)
-    return srt_path
+from tkinter import filedialog, messagebox, ttk
+from job_queue import JobQueue, CANCELLED, DEFAULT_CONCURRENCY, DONE, FAILED, PENDING, RUNNING
+# The workflow functions used to live here; they are re-exported for existing callers.
+from subtitle_core import (ends_with_punctuation, process_group, transcribe_to_srt, translate_groups,
+                           translate_srt, translate_srt_multi, translated_path, write_transcript,
+                           AUDIO_EXTENSIONS, LANGUAGE_NAMES, TRANSLATE_WINDOW)
+from worker_daemon import connect as connect_daemon
+
+# How often the GUI checks for updates from the worker threads (milliseconds)
+POLL_MS = 100
 
 # GUI Implementation
 class SubtitleApp:
@@ -145,93 +26,257 @@ class SubtitleApp:
         self.root = root
         self.root.title("Subtitle Generator & Translator")
         self.root.configure(bg='#111111')  # Dark background for better visibility
-        self.file_path = None
 
-        # Button to select audio file
-        self.select_btn = tk.Button(root, text="Select Audio File", command=self.select_file,
+        # Buttons to add audio files (several at once) or a whole folder to the job list
+        buttons = tk.Frame(root, bg='#111111')
+        buttons.pack(pady=10)
+        self.select_btn = tk.Button(buttons, text="Add Audio Files", command=self.select_file,
                                     bg='#333333', fg='white', activebackground='#555555')
-        self.select_btn.pack(pady=10)
+        self.select_btn.pack(side='left', padx=5)
+        self.folder_btn = tk.Button(buttons, text="Add Folder", command=self.select_folder,
+                                    bg='#333333', fg='white', activebackground='#555555')
+        self.folder_btn.pack(side='left', padx=5)
 
-        # Label to display selected file name
+        # Label to display how many jobs are queued
         self.file_label = tk.Label(root, text="No file selected", bg='#111111', fg='white')
         self.file_label.pack(pady=5)
 
-        # Checkbox to enable Bangla translation
+        # Job list: one row per audio file with its status and progress
+        self.job_list = ttk.Treeview(root, columns=('status', 'progress'), height=8)
+        self.job_list.heading('#0', text="File")
+        self.job_list.heading('status', text="Status")
+        self.job_list.heading('progress', text="Progress")
+        self.job_list.column('#0', width=260)
+        self.job_list.column('status', width=110)
+        self.job_list.column('progress', width=110)
+        self.job_list.pack(padx=10, pady=5, fill='both', expand=True)
+
+        # Checkbox to enable Bangla translation (applies to files added afterwards)
         self.translate_var = tk.BooleanVar(value=False)
         self.toggle = tk.Checkbutton(root, text="Enable Bangla Translation", var=self.translate_var,
                                      bg='#111111', fg='white', selectcolor='#111111', activebackground='#111111')
         self.toggle.pack(pady=10)
 
-        # Button to start the process
-        self.run_btn = tk.Button(root, text="Run", command=self.run_process,
+        # How many files are processed at the same time
+        limit = tk.Frame(root, bg='#111111')
+        limit.pack(pady=5)
+        tk.Label(limit, text="Files at once:", bg='#111111', fg='white').pack(side='left')
+        self.concurrency_var = tk.IntVar(value=DEFAULT_CONCURRENCY)
+        tk.Spinbox(limit, from_=1, to=8, width=3, textvariable=self.concurrency_var).pack(side='left', padx=5)
+
+        # Buttons to start, stop and retry jobs
+        controls = tk.Frame(root, bg='#111111')
+        controls.pack(pady=15)
+        self.run_btn = tk.Button(controls, text="Run", command=self.run_process,
                                  bg='#444444', fg='white', activebackground='#666666')
-        self.run_btn.pack(pady=20)
+        self.run_btn.pack(side='left', padx=5)
+        self.cancel_btn = tk.Button(controls, text="Cancel", command=self.cancel_process, state='disabled',
+                                    bg='#444444', fg='white', activebackground='#666666')
+        self.cancel_btn.pack(side='left', padx=5)
+        self.retry_btn = tk.Button(controls, text="Retry Failed", command=self.retry_failed,
+                                   bg='#444444', fg='white', activebackground='#666666')
+        self.retry_btn.pack(side='left', padx=5)
+        self.clear_btn = tk.Button(controls, text="Clear Finished", command=self.clear_finished,
+                                   bg='#444444', fg='white', activebackground='#666666')
+        self.clear_btn.pack(side='left', padx=5)
+
+        # Overall progress across all jobs
+        self.progress = ttk.Progressbar(root, length=260, mode='determinate', maximum=100)
+        self.progress.pack(pady=5)
 
         # Status label to show processing steps
         self.status_label = tk.Label(root, text="", bg='#111111', fg='white')
         self.status_label.pack(pady=5)
 
+        # Worker threads report job updates through this queue; the Tk thread polls it
+        self.events = queue.Queue()
+        # Incremental translation: an interrupted job resumes mid-file, and re-running a
+        # job after editing the English SRT only translates the edited sentences.
+        self.jobs = JobQueue(transcribe_to_srt, partial(translate_srt, incremental=True),
+                             on_update=self.events.put)
+        # If a worker daemon is running, it does the work with its warm translators and caches.
+        # Looking for one can take seconds, so it is done off the Tk thread.
+        self.daemon_probe = queue.Queue()
+        threading.Thread(target=lambda: self.daemon_probe.put(connect_daemon()), daemon=True).start()
+        self.root.after(POLL_MS, self._use_daemon)
+        for job in self.jobs.jobs:
+            self._show_job(job)
+        self._update_summary()
+        unfinished = self.jobs.counts().get(PENDING, 0)
+        if unfinished:
+            self.status_label.config(text=f"{unfinished} unfinished job(s) from last time. Press Run to resume.")
+
+    def _use_daemon(self):
+        """
+        Hand the jobs to the worker daemon once the background probe has found one.
+        """
+        try:
+            daemon = self.daemon_probe.get_nowait()
+        except queue.Empty:
+            self.root.after(POLL_MS, self._use_daemon)
+            return
+        if daemon is not None:
+            self.jobs.transcribe = daemon.transcribe_to_srt
+            self.jobs.translate = daemon.translate_srt
+
     def select_file(self):
         """
-        Open a file dialog to select an audio file and update the label with validation.
+        Open a file dialog to select one or more audio files and add them to the job list.
         """
-        path = filedialog.askopenfilename(
+        paths = filedialog.askopenfilenames(
             filetypes=[("Audio files", "*.mp3 *.wav *.m4a *.flac *.aac"), ("All files", "*")]
         )
-        if path:
-            # Check if the selected file is a supported audio format
-            valid_extensions = ['.mp3', '.wav', '.m4a', '.flac', '.aac']
-            if not any(path.lower().endswith(ext) for ext in valid_extensions):
-                messagebox.showwarning("Invalid File", "Please select a supported audio file (.mp3, .wav, .m4a, .flac, .aac).")
+        if not paths:
+            return
+        # Check that the selected files are in a supported audio format
+        valid = [p for p in paths if p.lower().endswith(AUDIO_EXTENSIONS)]
+        if len(valid) < len(paths):
+            messagebox.showwarning("Invalid File",
+                                   "Please select a supported audio file (.mp3, .wav, .m4a, .flac, .aac).")
+        self.add_files(valid)
+
+    def select_folder(self):
+        """
+        Add every audio file in a folder (and its subfolders) to the job list.
+        """
+        folder = filedialog.askdirectory()
+        if not folder:
+            return
+        paths = []
+        for dirpath, dirnames, filenames in os.walk(folder):
+            dirnames.sort()
+            paths += [os.path.join(dirpath, n) for n in sorted(filenames) if n.lower().endswith(AUDIO_EXTENSIONS)]
+        if not paths:
+            messagebox.showwarning("No Files", "No supported audio files found in that folder.")
+            return
+        self.add_files(paths)
+
+    def add_files(self, paths):
+        """
+        Queue audio files, asking whether existing English subtitles should be redone.
+
+        Args:
+            paths (list): Paths to the audio files.
+        """
+        if not paths:
+            return
+        existing = [p for p in paths if os.path.exists(f"{os.path.splitext(p)[0]}.srt")]
+        reuse = False
+        if existing:
+            answer = messagebox.askyesnocancel(
+                "File Exists",
+                f"{len(existing)} of these files already have an English .srt. Overwrite?\n"
+                "(No keeps the existing subtitles and only runs the missing steps.)"
+            )
+            if answer is None:
                 return
-            self.file_path = path
-            fname = os.path.basename(path)
-            self.file_label.config(text=fname)
+            reuse = not answer
+        for job in self.jobs.add(paths, self.translate_var.get(), reuse_existing=reuse):
+            self._show_job(job)
+        self._update_summary()
 
     def run_process(self):
         """
-        Run the transcription and optional translation process with status updates.
+        Start working through the pending jobs on background threads.
 
-        Checks for file selection, handles file overwrite prompts, and displays success/error messages.
+        Progress and the final summary arrive through `_poll` so the window stays responsive.
         """
-        if not self.file_path:
-            messagebox.showwarning("No File", "Please select an audio file first.")
+        if self.jobs.is_running():
+            return
+        if not self.jobs.counts().get(PENDING):
+            messagebox.showwarning("No File", "Please add an audio file first.")
             return
-        base, _ = os.path.splitext(self.file_path)
-        eng_srt = f"{base}.srt"
-        bn_srt = f"{base}_bangla.srt" if self.translate_var.get() else None
+        self.jobs.concurrency = max(1, self.concurrency_var.get())
+        self.run_btn.config(state='disabled', text="Processing...")
+        self.cancel_btn.config(state='normal')
+        self.status_label.config(text="Processing...")
+        self.jobs.start()
+        self.root.after(POLL_MS, self._poll)
 
-        if os.path.exists(eng_srt):
-            if not messagebox.askyesno("File Exists", f"{eng_srt} already exists. Overwrite?"):
-                return
-        if bn_srt and os.path.exists(bn_srt):
-            if not messagebox.askyesno("File Exists", f"{bn_srt} already exists. Overwrite?"):
-                return
+    def cancel_process(self):
+        """
+        Stop all running jobs; they can be resumed with "Retry Failed".
+        """
+        self.jobs.stop()
+        self.cancel_btn.config(state='disabled')
+        self.status_label.config(text="Cancelling...")
 
-        self.run_btn.config(state='disabled', text="Processing...")
-        self.status_label.config(text="Transcribing...")
-        self.root.update()
+    def retry_failed(self):
+        """
+        Re-queue failed and cancelled jobs (finished steps are not redone) and run them.
+        """
+        if self.jobs.retry_failed():
+            for job in self.jobs.jobs:
+                self._show_job(job)
+            self.run_process()
 
-        try:
-            transcribe_to_srt(self.file_path, eng_srt)
-            if self.translate_var.get():
-                self.status_label.config(text="Translating...")
-                self.root.update()
-                translate_srt(eng_srt, bn_srt)
-                messagebox.showinfo("Success", f"Generated:\n{eng_srt}\n{bn_srt}")
-            else:
-                messagebox.showinfo("Success", f"Generated: {eng_srt}")
-        except aai.AssemblyAIError as e:
-            messagebox.showerror("Transcription Error", f"AssemblyAI error: {str(e)}")
-        except IOError as e:
-            messagebox.showerror("File Error", f"File operation failed: {str(e)}")
-        except Exception as e:
-            import traceback
-            traceback.print_exc()  # Print full traceback to console for debugging
-            messagebox.showerror("Unexpected Error", f"An unexpected error occurred: {str(e)}")
-        finally:
-            self.run_btn.config(state='normal', text="Run")
-            self.status_label.config(text="Done!")
+    def clear_finished(self):
+        """
+        Remove finished jobs from the list.
+        """
+        self.jobs.clear_finished()
+        keep = {job.id for job in self.jobs.jobs}
+        for item in self.job_list.get_children():
+            if item not in keep:
+                self.job_list.delete(item)
+        self._update_summary()
+
+    def _show_job(self, job):
+        """
+        Insert or refresh a job's row in the job list.
+        """
+        if job.status == RUNNING:
+            status = {'transcribe': "Transcribing", 'translate': "Translating"}.get(job.stage, "Starting")
+        elif job.status == FAILED:
+            status = "Failed"
+        else:
+            status = job.status.capitalize()
+        detail = job.error if job.status == FAILED else job.detail
+        if self.job_list.exists(job.id):
+            self.job_list.item(job.id, values=(status, detail))
+        else:
+            self.job_list.insert('', 'end', iid=job.id, text=os.path.basename(job.audio_path),
+                                 values=(status, detail))
+
+    def _update_summary(self):
+        """
+        Update the job count label and the overall progress bar.
+        """
+        counts = self.jobs.counts()
+        total = sum(counts.values())
+        done = counts.get(DONE, 0)
+        self.file_label.config(text=f"{total} file(s) in the list, {done} done" if total else "No file selected")
+        self.progress.config(value=100 * done / total if total else 0)
+
+    def _poll(self):
+        """
+        Apply job updates posted by the worker threads; reschedule until the queue stops.
+        """
+        while True:
+            try:
+                self._show_job(self.events.get_nowait())
+            except queue.Empty:
+                break
+        self._update_summary()
+        if self.jobs.is_running():
+            self.root.after(POLL_MS, self._poll)
+        else:
+            self._finish()
+
+    def _finish(self):
+        """
+        Restore the controls and report how the run ended.
+        """
+        self.run_btn.config(state='normal', text="Run")
+        self.cancel_btn.config(state='disabled')
+        counts = self.jobs.counts()
+        failed, cancelled = counts.get(FAILED, 0), counts.get(CANCELLED, 0)
+        summary = f"{counts.get(DONE, 0)} done, {failed} failed, {cancelled} cancelled"
+        self.status_label.config(text=summary)
+        if failed:
+            messagebox.showerror("Some Jobs Failed", f"{summary}.\nSee the job list for details.")
+        elif not cancelled:
+            messagebox.showinfo("Success", f"All jobs finished ({summary}).")
 
 if __name__ == '__main__':
     root = tk.Tk()
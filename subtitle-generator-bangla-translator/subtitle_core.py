@@ -0,0 +1,374 @@
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import tracing
+from segmentation import Segmenter
+from sentences import group_sentences, is_sentence_end
+from speech_trim import remap_transcript, trim_silence, GAP_MS, MIN_SILENCE_MS
+from srt import Cue, SrtWriter, read_srt, write_srt
+from stage_cache import StageCache, file_hash
+from transcription import make_transcriber, transcribe_chunked
+from translation_manifest import TranslationManifest, manifest_path
+from translation_memory import TranslationMemory
+from translators import BatchTranslator, RateLimiter, make_backend, DEFAULT_RATE, DEFAULT_WORKERS
+
+# Subtitle Workflow
+#
+# Transcribing audio to an English SRT and translating SRTs, without any GUI. The
+# transcription and translation SDKs are only imported when a client or backend is
+# first created, so importing this module is cheap; command-line tools and the GUI
+# in `subtitle.py` both build on it.
+
+# Sentence groups translated per round; bounds memory use on long files.
+TRANSLATE_WINDOW = 500
+
+# Audio files that can be transcribed
+AUDIO_EXTENSIONS = ('.mp3', '.wav', '.m4a', '.flac', '.aac')
+
+# Language code -> suffix of the translated SRT's file name
+LANGUAGE_NAMES = {'bn': 'bangla', 'hi': 'hindi', 'ur': 'urdu'}
+
+# Trimmed audio is only uploaded if it is at most this share of the original.
+TRIM_MAX_KEPT = 0.95
+
+# Translation Utilities
+
+def ends_with_punctuation(text):
+    """
+    Check if the text ends a sentence (., !, ?, … or ।, but not an abbreviation like "Mr.").
+
+    Args:
+        text (str): The input text to check.
+
+    Returns:
+        bool: True if the text ends with punctuation, False otherwise.
+    """
+    return is_sentence_end(text)
+
+def translated_path(srt_path, target):
+    """
+    Name the translated SRT for a target language, e.g. `talk.srt` -> `talk_bangla.srt`.
+
+    Args:
+        srt_path (str): Path of the English SRT.
+        target (str): Target language code.
+
+    Returns:
+        str: The output path.
+    """
+    return f"{os.path.splitext(srt_path)[0]}_{LANGUAGE_NAMES.get(target, target)}.srt"
+
+def translate_srt(input_path, output_path, translator=None, workers=DEFAULT_WORKERS, rate=DEFAULT_RATE,
+                  memory=None, use_cache=True, window=TRANSLATE_WINDOW, on_progress=None, cancel_event=None,
+                  segmenter=None, incremental=False):
+    """
+    Translate an SRT subtitle file from English to Bangla.
+
+    The file is streamed: cues are read and grouped into sentences, and every
+    `window` groups are translated together in batched, concurrent requests and
+    written out before the next groups are read. Groups already in the translation
+    memory are not sent at all.
+
+    Args:
+        input_path (str): Path to the input SRT file.
+        output_path (str): Path to save the translated SRT file.
+        translator (object): Translation backend to use; defaults to Google Translate.
+        workers (int): Number of translation requests in flight at once.
+        rate (float): Maximum requests started per second, or None for no limit (or a shared `RateLimiter`).
+        memory (TranslationMemory): Translation cache; defaults to the on-disk memory.
+        use_cache (bool): Set to False to skip the translation memory entirely.
+        window (int): Number of sentence groups translated per round.
+        on_progress (callable): Called as `on_progress(cues_done, cues_total)` as translation proceeds.
+        cancel_event (threading.Event): When set, stop translating and raise `Cancelled`.
+        segmenter (Segmenter): Line, duration and reading-speed limits for the translated cues.
+        incremental (bool): Keep a manifest next to the output and only translate sentence
+            groups that are new or were edited since the last run (see `translation_manifest`).
+            An interrupted run picks up where it stopped.
+    """
+    if translator is None:
+        translator = make_backend('google', source='auto', target='bn')
+    _translate_outputs(input_path, [(translator, output_path)], workers, rate, memory, use_cache, window,
+                       on_progress, cancel_event, segmenter, incremental)
+
+def translate_srt_multi(input_path, targets, output_paths=None, backend='google', url=None, translators=None,
+                        workers=DEFAULT_WORKERS, rate=DEFAULT_RATE, memory=None, use_cache=True,
+                        window=TRANSLATE_WINDOW, on_progress=None, cancel_event=None, segmenter=None,
+                        incremental=False):
+    """
+    Translate an SRT subtitle file into several languages at once.
+
+    The file is read and grouped into sentences once; each window of groups is then
+    translated into every language at the same time, sharing the translation memory
+    and one rate limit, so the run takes about as long as a single language.
+
+    Args:
+        input_path (str): Path to the input SRT file.
+        targets (list): Target language codes, e.g. ['bn', 'hi', 'ur'].
+        output_paths (dict): Language code -> output path; defaults to `translated_path`.
+        backend (str): Backend name for `make_backend` ('google', 'libre' or 'fake').
+        url (str): Service URL for the 'libre' backend.
+        translators (dict): Language code -> backend object, overriding `backend`.
+        workers (int): Translation requests in flight at once, per language.
+        rate (float): Maximum requests started per second across all languages, or None for no limit.
+            A `RateLimiter` may be passed instead to share one limit with other calls.
+        memory (TranslationMemory): Translation cache; defaults to the on-disk memory.
+        use_cache (bool): Set to False to skip the translation memory entirely.
+        window (int): Number of sentence groups translated per round.
+        on_progress (callable): Called as `on_progress(cues_done, cues_total)`, counting
+            each cue once per language.
+        cancel_event (threading.Event): When set, stop translating and raise `Cancelled`.
+        segmenter (Segmenter): Line, duration and reading-speed limits for the translated cues.
+        incremental (bool): Only translate sentence groups that changed since the last run,
+            using a manifest next to each output (see `translate_srt`).
+
+    Returns:
+        dict: Language code -> path of the written SRT.
+    """
+    output_paths = output_paths or {}
+    translators = translators or {}
+    paths = {t: output_paths.get(t) or translated_path(input_path, t) for t in targets}
+    outputs = [(translators.get(t) or make_backend(backend, source='auto', target=t, url=url), paths[t])
+               for t in targets]
+    _translate_outputs(input_path, outputs, workers, rate, memory, use_cache, window, on_progress,
+                       cancel_event, segmenter, incremental)
+    return paths
+
+def _translate_outputs(input_path, outputs, workers, rate, memory, use_cache, window, on_progress,
+                       cancel_event, segmenter, incremental=False):
+    # Translate one parse of `input_path` into every (translator, output_path) in `outputs`.
+    limiter = rate if isinstance(rate, RateLimiter) else RateLimiter(rate) if rate else None
+    own_memory = use_cache and memory is None
+    if own_memory:
+        memory = TranslationMemory()
+    engines = [BatchTranslator(translator, workers=workers, rate_limiter=limiter,
+                               memory=memory if use_cache else None, cancel_event=cancel_event)
+               for translator, _ in outputs]
+    manifests = [TranslationManifest(manifest_path(output_path), translator.name,
+                                     getattr(translator, 'source', 'auto'), getattr(translator, 'target', ''))
+                 if incremental else None
+                 for translator, output_path in outputs]
+    total = sum(1 for _ in read_srt(input_path)) * len(outputs) if on_progress else 0
+    done = 0
+    lock = threading.Lock()
+
+    def count(n):
+        nonlocal done
+        with lock:
+            done += n
+            on_progress(done, total)
+
+    def flush(groups, next_start):
+        with tracing.span('translate.window', groups=len(groups), languages=len(engines)):
+            if len(engines) == 1:
+                results = [translate_groups(engines[0], groups, count if on_progress else None, segmenter,
+                                            manifests[0], next_start)]
+            else:
+                futures = [pool.submit(translate_groups, engine, groups, count if on_progress else None,
+                                       segmenter, manifest, next_start)
+                           for engine, manifest in zip(engines, manifests)]
+                results = [future.result() for future in futures]
+        with tracing.span('srt.write', groups=len(groups), files=len(writers)):
+            for writer, translated in zip(writers, results):
+                for cues in translated:
+                    writer.write_all(cues)
+
+    writers = []
+    try:
+        with tracing.span('translate', file=os.path.basename(input_path), languages=len(engines)), \
+                ThreadPoolExecutor(max_workers=len(engines)) as pool:
+            for _, output_path in outputs:
+                writers.append(SrtWriter(output_path, renumber=True))
+            # One group more than a window is read first, so the window's last cues know
+            # when the next group starts and are not held on screen into it.
+            pending = []
+            for group in group_sentences(read_srt(input_path)):
+                pending.append(group)
+                if len(pending) > window:
+                    flush(pending[:-1], group[0].start)
+                    pending = pending[-1:]
+            if pending:
+                flush(pending, None)
+        for manifest in filter(None, manifests):
+            manifest.finish()
+    finally:
+        for writer in writers:
+            writer.close()
+        for manifest in filter(None, manifests):
+            manifest.close()
+        if own_memory:
+            memory.close()
+
+def translate_groups(engine, groups, on_cues=None, segmenter=None, manifest=None, next_start=None):
+    """
+    Translate sentence groups in one batched round.
+
+    Args:
+        engine (BatchTranslator): The translation engine.
+        groups (list): Sentence groups, each a list of cues.
+        on_cues (callable): Called with the number of cues whose group just finished.
+        segmenter (Segmenter): Segmentation limits for the translated cues.
+        manifest (TranslationManifest): Earlier translations to reuse; new ones are recorded in it.
+        next_start (int): Start time of the cue after the last group, if known.
+
+    Returns:
+        list: The translated cues of each group.
+    """
+    texts = [' '.join(c.text for c in g) for g in groups]
+    if manifest is None:
+        translations = engine.translate_many(texts, _cue_counter(groups, range(len(groups)), on_cues))
+    else:
+        translations = [manifest.get(text) for text in texts]
+        todo = [i for i, trans in enumerate(translations) if trans is None]
+        if on_cues and len(todo) < len(groups):
+            on_cues(sum(len(g) for g in groups) - sum(len(groups[i]) for i in todo))
+        done = engine.translate_many(
+            [texts[i] for i in todo], _cue_counter(groups, todo, on_cues),
+            lambda pairs: manifest.add([(texts[todo[j]], trans) for j, trans in pairs]))
+        for i, trans in zip(todo, done):
+            translations[i] = trans
+    limits = [group[0].start for group in groups[1:]] + [next_start]
+    return [process_group(group, trans, segmenter, limit)
+            for group, trans, limit in zip(groups, translations, limits)]
+
+def _cue_counter(groups, positions, on_cues):
+    # Turn `translate_many` progress (indices into `positions`) into cue counts.
+    if not on_cues:
+        return None
+    return lambda indices: on_cues(sum(len(groups[positions[j]]) for j in indices))
+
+def process_group(group, trans, segmenter=None, limit=None):
+    """
+    Cut the translation of a sentence group into cues over the time it was spoken.
+
+    The translated words are laid over the group's cue timings and re-segmented, so
+    every cue keeps to the line, duration and reading-speed limits instead of taking
+    whatever share of the words fell to each English cue.
+
+    Args:
+        group (list): The cues of the sentence group.
+        trans (str): Translated text of the whole group.
+        segmenter (Segmenter): Segmentation limits; defaults to `Segmenter()`.
+        limit (int): Start time of the next group, if known; no cue is held on screen into it.
+
+    Returns:
+        list: New cues with the translated text (numbered from 1; the writer renumbers them).
+            If the translation is empty, the group's own cues are kept so none go missing.
+    """
+    segmenter = segmenter or Segmenter()
+    if not trans.split():
+        tracing.count('translate.empty')
+        return [Cue(c.index, c.start, c.end, c.lines) for c in group]
+    return segmenter.reflow(trans, [(c.start, c.end) for c in group], limit=limit)
+
+# Subtitle Generation
+def transcribe_to_srt(audio_path, srt_path, chunked=False, client=None, on_status=None, cancel_event=None,
+                      cache=None, use_cache=True, segmenter=None, trim=False):
+    """
+    Convert an audio file into an SRT subtitle file using AssemblyAI.
+
+    The transcript is cached under a hash of the audio's contents and the client's
+    settings, so transcribing the same audio again (even renamed or moved) is
+    answered from disk without uploading anything.
+
+    Args:
+        audio_path (str): Path to the input audio file.
+        srt_path (str): Path to save the generated SRT file.
+        chunked (bool): Split long audio at silences and transcribe the chunks concurrently.
+        client (object): Transcription client to use; defaults to `make_transcriber()` (AssemblyAI
+            unless SUBTITLE_TRANSCRIBER says otherwise).
+        on_status (callable): Called with each transcription phase ('uploading', 'queued', 'processing').
+        cancel_event (threading.Event): When set, stop waiting and raise `Cancelled`.
+        cache (StageCache): Where transcripts are cached; defaults to the shared cache directory.
+        use_cache (bool): Look up and store transcripts in the cache.
+        segmenter (Segmenter): Limits for cutting the word timestamps into cues; defaults to `Segmenter()`.
+        trim (bool): Cut silence out of the audio before transcribing it (needs NumPy); the
+            timestamps are mapped back onto the original recording (see `speech_trim`).
+
+    Raises:
+        RuntimeError: If transcription fails due to an error from AssemblyAI.
+    """
+    client = client or make_transcriber()
+    with tracing.span('transcribe', file=os.path.basename(audio_path), chunked=chunked) as span:
+        _transcribe_to_srt(audio_path, srt_path, chunked, client, on_status, cancel_event, cache, use_cache,
+                           segmenter, span, trim)
+    return srt_path
+
+def _transcribe_to_srt(audio_path, srt_path, chunked, client, on_status, cancel_event, cache, use_cache,
+                       segmenter, span, trim):
+    key = None
+    if use_cache and hasattr(client, 'config'):
+        cache = cache or StageCache()
+        config = dict(client.config(), chunked=chunked)
+        if trim:
+            config['trim'] = {'min_silence_ms': MIN_SILENCE_MS, 'gap_ms': GAP_MS}
+        with tracing.span('cache.hash'):
+            key = cache.key(file_hash(audio_path), 'transcript', config)
+        cached = cache.get(key)
+        tracing.count('cache.transcript.misses' if cached is None else 'cache.transcript.hits')
+        span.set(cached=cached is not None)
+        if cached is not None:
+            if on_status:
+                on_status('cached')
+            write_transcript(cached, srt_path, segmenter)
+            return
+
+    tmp_dir = tempfile.mkdtemp(prefix='subtitle_trim_') if trim else None
+    try:
+        table = None
+        source = audio_path
+        if trim:
+            if on_status:
+                on_status('trimming silence')
+            trimmed = os.path.join(tmp_dir, 'speech.flac')
+            with tracing.span('trim') as trim_span:
+                table, duration_ms = trim_silence(audio_path, trimmed)
+                trim_span.set(kept_ms=round(table.kept_ms), duration_ms=duration_ms)
+            if table.kept_ms <= TRIM_MAX_KEPT * duration_ms:
+                source = trimmed
+            else:
+                table = None    # Hardly any silence; upload the original
+        if table is not None and table.kept_ms == 0:
+            # Nothing but silence: there is nothing to upload, and no subtitles.
+            transcript = {'id': None, 'text': '', 'words': [], 'srt': ''}
+        else:
+            transcript = _transcribe(source, srt_path, chunked, client, on_status, cancel_event)
+            if table is not None:
+                transcript = remap_transcript(transcript, table)
+    finally:
+        if tmp_dir:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    if key is not None:
+        cache.put(key, transcript)
+    if not chunked or table is not None:
+        write_transcript(transcript, srt_path, segmenter)
+
+def _transcribe(audio_path, srt_path, chunked, client, on_status, cancel_event):
+    # Run the client on one file and return its transcript dict.
+    if chunked:
+        transcribe_chunked(audio_path, srt_path, client=client, on_status=on_status, cancel_event=cancel_event)
+        # Chunks are stitched at the cue level, so only the SRT is kept.
+        with open(srt_path, 'r', encoding='utf-8') as f:
+            return {'id': None, 'text': None, 'words': None, 'srt': f.read()}
+    if hasattr(client, 'transcribe_json'):
+        return client.transcribe_json(audio_path, on_status=on_status, cancel_event=cancel_event)
+    return {'srt': client.transcribe_srt(audio_path, on_status=on_status, cancel_event=cancel_event)}
+
+def write_transcript(transcript, srt_path, segmenter=None):
+    """
+    Write a transcript as SRT, cutting the cues from its word timestamps when it has them.
+
+    Args:
+        transcript (dict): Transcript as returned by a client's `transcribe_json`.
+        srt_path (str): Path to save the SRT file.
+        segmenter (Segmenter): Segmentation limits; defaults to `Segmenter()`.
+    """
+    with tracing.span('srt.write', words=len(transcript.get('words') or ())):
+        if transcript.get('words'):
+            write_srt(srt_path, (segmenter or Segmenter()).segment(transcript['words']))
+        else:
+            with open(srt_path, 'w', encoding='utf-8') as f:
+                f.write(transcript['srt'])
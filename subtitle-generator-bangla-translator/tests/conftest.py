@@ -0,0 +1,12 @@
+# Shared setup for the offline test suite:
+#
+#   python -m pytest tests
+#
+# The modules live at the top of the project, and the fakes (corpus, stub server)
+# under bench/. Nothing here talks to a real service; the scripts in test/ do.
+
+import os
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'bench')]
@@ -0,0 +1,53 @@
+import os
+
+import batch_convert
+from batch_convert import _convert_one, _source_record, is_up_to_date
+
+
+def make_video(tmp_path):
+    video = tmp_path / 'ep1.mp4'
+    video.write_bytes(b'video' * 100)
+    return str(video)
+
+
+def test_failed_conversion_leaves_no_audio(tmp_path, monkeypatch):
+    video = make_video(tmp_path)
+    audio = str(tmp_path / 'ep1.mp3')
+
+    def interrupted(video_path, out_path, for_transcription=False):
+        with open(out_path, 'wb') as f:
+            f.write(b'half an mp3')
+        raise RuntimeError("ffmpeg failed: killed")
+
+    monkeypatch.setattr(batch_convert, 'extract_audio', interrupted)
+    result = _convert_one(video, audio, False, True)
+    assert result['status'] == 'error'
+    assert os.listdir(tmp_path) == ['ep1.mp4']
+    assert not is_up_to_date(video, audio)
+
+
+def test_finished_conversion_replaces_audio(tmp_path, monkeypatch):
+    video = make_video(tmp_path)
+    audio = str(tmp_path / 'ep1.mp3')
+
+    def extract(video_path, out_path, for_transcription=False):
+        assert out_path.endswith('.mp3') and out_path != audio
+        with open(out_path, 'wb') as f:
+            f.write(b'an mp3')
+        return 'encode'
+
+    monkeypatch.setattr(batch_convert, 'extract_audio', extract)
+    result = _convert_one(video, audio, False, True)
+    assert result['status'] == 'done'
+    assert sorted(os.listdir(tmp_path)) == ['ep1.mp3', 'ep1.mp4']
+
+
+def test_manifest_checks_conversion_settings(tmp_path):
+    video = make_video(tmp_path)
+    audio = tmp_path / 'ep1.mp3'
+    audio.write_bytes(b'an mp3')
+    manifest = {os.path.abspath(audio): _source_record(video, str(audio), False)}
+    assert is_up_to_date(video, str(audio), manifest)
+    assert not is_up_to_date(video, str(audio), manifest, for_transcription=True)
+    manifest[os.path.abspath(audio)].pop('settings')
+    assert not is_up_to_date(video, str(audio), manifest)
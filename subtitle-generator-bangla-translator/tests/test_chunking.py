@@ -0,0 +1,51 @@
+import pytest
+
+from corpus import make_cues
+from srt import read_srt
+from transcription import FakeAudio, FakeTranscriber, Stitcher, plan_chunks, transcribe_chunked
+
+
+def as_tuples(cues):
+    return [(c.index, c.start, c.end, c.text) for c in cues]
+
+
+def srt_text(*cues):
+    return ''.join(f"{n}\n{start} --> {end}\n{text}\n\n" for n, (start, end, text) in enumerate(cues, 1))
+
+
+def ms(value):
+    return f"00:{value // 60000:02}:{value // 1000 % 60:02},{value % 1000:03}"
+
+
+@pytest.mark.parametrize('chunk_ms, overlap_ms', [(10000, 0), (15000, 1500), (21000, 3000), (7000, 2500)])
+@pytest.mark.parametrize('with_silences', [False, True])
+def test_every_cue_is_stitched_exactly_once(tmp_path, chunk_ms, overlap_ms, with_silences):
+    cues = make_cues(80, seed=chunk_ms)
+    # Pauses between every fifth cue; otherwise the cuts land in the middle of cues.
+    silences = [(c.end - 300, c.end + 300) for c in cues[4::5]] if with_silences else []
+    srt_path = str(tmp_path / 'talk.srt')
+    transcribe_chunked('talk.mp3', srt_path, client=FakeTranscriber(cues), audio=FakeAudio(cues[-1].end, silences),
+                       chunk_ms=chunk_ms, overlap_ms=overlap_ms, workers=4)
+    assert as_tuples(read_srt(srt_path)) == as_tuples(cues)
+
+
+def test_cue_starting_at_a_cut_belongs_to_the_later_chunk():
+    first, second = plan_chunks(20000, [], chunk_ms=10000, overlap_ms=1000)
+    assert first == (0, 11000, 0, 10000) and second == (9000, 20000, 10000, 20000)
+    stitcher = Stitcher()
+    cues = stitcher.add(first, srt_text((ms(8000), ms(9500), "Before the cut."), (ms(10000), ms(11000), "At the cut.")))
+    cues += stitcher.add(second, srt_text((ms(1000), ms(2000), "At the cut."), (ms(2500), ms(4000), "After it.")))
+    assert [(c.index, c.start, c.text) for c in cues] == [
+        (1, 8000, "Before the cut."), (2, 10000, "At the cut."), (3, 11500, "After it.")]
+
+
+def test_repeated_cue_at_a_seam_is_dropped_but_new_speech_is_kept():
+    first, second = plan_chunks(20000, [], chunk_ms=10000, overlap_ms=1000)
+    stitcher = Stitcher()
+    cues = stitcher.add(first, srt_text((ms(9000), ms(10600), "The quick brown fox jumps.")))
+    # The next chunk hears the same sentence, timed a little later, then new speech that
+    # starts before the repeated one ends.
+    cues += stitcher.add(second, srt_text((ms(1100), ms(1700), "the quick brown fox jumps"),
+                                          (ms(1300), ms(3000), "Over the lazy dog.")))
+    assert [(c.index, c.start, c.end, c.text) for c in cues] == [
+        (1, 9000, 10600, "The quick brown fox jumps."), (2, 10300, 12000, "Over the lazy dog.")]
@@ -0,0 +1,23 @@
+import os
+
+from cli import is_input, main
+from corpus import write_corpus
+
+
+def run(folder, *options):
+    return main([str(folder), '--backend', 'fake', '--rate', '0', '--no-cache', *options])
+
+
+def test_rerun_does_not_translate_outputs_again(tmp_path):
+    write_corpus(str(tmp_path / 'talk.srt'), 20)
+    assert run(tmp_path, '--targets', 'ta') == 0
+    assert run(tmp_path, '--targets', 'ta', '--force') == 0
+    assert sorted(os.listdir(tmp_path)) == ['talk.srt', 'talk_ta.srt']
+
+
+def test_known_and_requested_translations_are_not_inputs():
+    assert is_input('talk.srt')
+    assert is_input('talk.mp3')
+    assert not is_input('talk_bangla.srt')
+    assert not is_input('talk_ta.srt', targets=['ta'])
+    assert is_input('talk_ta.srt', targets=['bn'])
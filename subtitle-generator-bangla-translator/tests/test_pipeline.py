@@ -0,0 +1,38 @@
+import threading
+
+from corpus import make_cues
+from pipeline import Pipeline
+from srt import read_srt
+from transcription import FakeAudio, FakeTranscriber
+from translators import TranslationHTTPError
+
+
+class FlakyTranscriber(FakeTranscriber):
+    """
+    Fails the first request for every chunk with a 503 and records the cancel event.
+    """
+
+    def __init__(self, cues):
+        super().__init__(cues)
+        self.failed = set()
+        self.cancel_events = []
+
+    def transcribe_srt(self, audio_path, on_status=None, cancel_event=None):
+        self.cancel_events.append(cancel_event)
+        if audio_path not in self.failed:
+            self.failed.add(audio_path)
+            raise TranslationHTTPError(503, "injected error")
+        return super().transcribe_srt(audio_path)
+
+
+def test_chunk_errors_are_retried_with_the_cancel_event(tmp_path):
+    cues = make_cues(60)
+    client = FlakyTranscriber(cues)
+    pipeline = Pipeline(client, FakeAudio(cues[-1].end), chunk_ms=30000, overlap_ms=1000, scan_silence=False)
+    srt_path = str(tmp_path / 'talk.srt')
+    pipeline.run('talk.mp3', srt_path, work_dir=str(tmp_path))
+
+    assert [(c.start, c.end, c.text) for c in read_srt(srt_path)] == [(c.start, c.end, c.text) for c in cues]
+    assert len(client.cancel_events) == 2 * len(client.calls) == 2 * len(client.failed)
+    assert all(isinstance(event, threading.Event) for event in client.cancel_events)
+    assert all(event is client.cancel_events[0] for event in client.cancel_events)
@@ -0,0 +1,14 @@
+import statistics
+
+import pytest
+
+from bench_startup import BUDGETS, HEAVY, import_profile
+
+RUNS = 3
+
+
+@pytest.mark.parametrize('module', BUDGETS)
+def test_import_stays_light_and_within_budget(module):
+    profiles = [import_profile(module) for _ in range(RUNS)]
+    assert not {name for _, imported in profiles for name in imported if name in HEAVY}
+    assert statistics.median(ms for ms, _ in profiles) <= BUDGETS[module]
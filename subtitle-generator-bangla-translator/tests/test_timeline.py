@@ -0,0 +1,36 @@
+from srt import read_srt
+from timeline import main, retimed_path
+
+SRT = """1
+00:00:01,000 --> 00:00:01,000
+A cue with no duration.
+
+2
+00:00:02,000 --> 00:00:02,200
+A short one.
+
+3
+00:00:06,000 --> 00:00:09,000
+A long one.
+
+"""
+
+
+def retime(tmp_path, *options):
+    path = tmp_path / 'talk.srt'
+    path.write_text(SRT, encoding='utf-8')
+    assert main([str(path), *options]) == 0
+    return [(cue.start, cue.end) for cue in read_srt(retimed_path(str(path)))]
+
+
+def test_shift_alone_keeps_every_cue_as_it_was(tmp_path):
+    assert retime(tmp_path, '--shift', '500') == [(1500, 1500), (2500, 2700), (6500, 9500)]
+
+
+def test_times_shifted_before_zero_are_cut(tmp_path):
+    assert retime(tmp_path, '--shift', '-2100') == [(0, 100), (3900, 6900)]
+
+
+def test_durations_are_enforced_only_when_asked(tmp_path):
+    assert retime(tmp_path, '--min-duration', '500') == [(1000, 1500), (2000, 2500), (6000, 9000)]
+    assert retime(tmp_path, '--max-duration', '2000') == [(2000, 2200), (6000, 8000)]
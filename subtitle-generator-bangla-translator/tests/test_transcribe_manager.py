@@ -0,0 +1,82 @@
+import os
+from functools import partial
+
+import pytest
+
+import transcribe_manager
+from srt import read_srt
+from stage_cache import StageCache
+from stub_server import start_transcription_server
+from transcribe_manager import AssemblyAIRestClient, TranscriptionManager
+from translators import call_with_retry
+
+
+@pytest.fixture
+def api():
+    server, url = start_transcription_server(processing=0.3)
+    yield server, AssemblyAIRestClient(api_key='stub', base_url=url)
+    server.shutdown()
+    server.server_close()
+
+
+def make_files(folder, n, size=20000):
+    pairs = []
+    for i in range(n):
+        audio = folder / f'episode_{i}.mp3'
+        audio.write_bytes(os.urandom(size + i))
+        pairs.append((str(audio), str(folder / f'episode_{i}.srt')))
+    return pairs
+
+
+def make_manager(client, **options):
+    return TranscriptionManager(client, concurrency=4, min_poll=0.05, max_poll=0.2, **options)
+
+
+def test_every_file_is_transcribed(api, tmp_path):
+    server, client = api
+    pairs = make_files(tmp_path, 6)
+    events = []
+    results = make_manager(client, use_cache=False, on_event=events.append).transcribe_many(pairs)
+
+    assert {audio: r['event'] for audio, r in results.items()} == {audio: 'done' for audio, _ in pairs}
+    for _, srt_path in pairs:
+        assert [cue.text for cue in read_srt(srt_path)][0].startswith('word0 word1')
+    for audio, _ in pairs:
+        kinds = [e['event'] for e in events if e['file'] == audio]
+        assert kinds[0] == 'uploading' and kinds[-1] == 'done' and 'processing' in kinds
+    assert server.bytes_uploaded == sum(os.path.getsize(audio) for audio, _ in pairs)
+
+
+def test_requests_failing_with_429_and_503_are_retried(api, tmp_path, monkeypatch):
+    server, client = api
+    server.error_rate = 0.3
+    monkeypatch.setattr(transcribe_manager, 'call_with_retry', partial(call_with_retry, base_delay=0.001))
+    pairs = make_files(tmp_path, 6)
+    results = make_manager(client, use_cache=False, retries=50).transcribe_many(pairs)
+    assert all(r['event'] == 'done' for r in results.values())
+    assert all(os.path.exists(srt_path) for _, srt_path in pairs)
+
+
+def test_cached_transcripts_are_not_uploaded_again(api, tmp_path):
+    server, client = api
+    pairs = make_files(tmp_path, 3)
+    cache = StageCache(str(tmp_path / 'cache'))
+    make_manager(client, cache=cache).transcribe_many(pairs)
+    first = [open(srt_path, encoding='utf-8').read() for _, srt_path in pairs]
+    requests = server.requests
+
+    results = make_manager(client, cache=cache).transcribe_many(pairs)
+    assert all(r['event'] == 'cached' for r in results.values())
+    assert server.requests == requests
+    assert [open(srt_path, encoding='utf-8').read() for _, srt_path in pairs] == first
+
+
+def test_cancel_stops_waiting_for_jobs(api, tmp_path):
+    server, client = api
+    server.processing = 60
+    pairs = make_files(tmp_path, 3)
+    manager = make_manager(client, use_cache=False)
+    manager.on_event = lambda event: event['event'] == 'queued' and manager.cancel_event.set()
+    results = manager.transcribe_many(pairs)
+    assert {r['event'] for r in results.values()} == {'cancelled'}
+    assert not any(os.path.exists(srt_path) for _, srt_path in pairs)
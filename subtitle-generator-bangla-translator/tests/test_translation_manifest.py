@@ -0,0 +1,37 @@
+from translation_manifest import TranslationManifest
+
+
+def open_manifest(path):
+    return TranslationManifest(str(path), 'fake', 'en', 'bn')
+
+
+def test_resume_after_torn_last_line(tmp_path):
+    path = tmp_path / 'talk_bangla.srt.manifest'
+    manifest = open_manifest(path)
+    manifest.add([('One.', 'এক।'), ('Two.', 'দুই।')])
+    manifest.close()
+    with open(path, 'ab') as f:
+        f.write(b'{"hash": "0123", "te')   # The process died in the middle of a write
+
+    manifest = open_manifest(path)
+    assert manifest.get('One.') == 'এক।' and manifest.get('Three.') is None
+    manifest.add([('Three.', 'তিন।')])
+    manifest.close()
+
+    manifest = open_manifest(path)
+    assert [manifest.get(text) for text in ('One.', 'Two.', 'Three.')] == ['এক।', 'দুই।', 'তিন।']
+
+
+def test_complete_line_without_newline_is_not_glued_to(tmp_path):
+    path = tmp_path / 'talk_bangla.srt.manifest'
+    manifest = open_manifest(path)
+    manifest.add([('One.', 'এক।'), ('Two.', 'দুই।')])
+    manifest.close()
+    path.write_bytes(path.read_bytes()[:-1])
+
+    manifest = open_manifest(path)
+    manifest.add([('Three.', 'তিন।')])
+    manifest.close()
+
+    manifest = open_manifest(path)
+    assert [manifest.get(text) for text in ('One.', 'Two.', 'Three.')] == ['এক।', None, 'তিন।']
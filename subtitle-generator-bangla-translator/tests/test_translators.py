@@ -0,0 +1,99 @@
+import threading
+import time
+from functools import partial
+
+import pytest
+
+import translators
+from stub_server import start_translate_server
+from translators import (SENTINEL, BatchTranslator, FakeTranslator, LibreTranslateBackend, RateLimiter,
+                         TranslationHTTPError, call_with_retry)
+
+
+@pytest.fixture
+def flaky_server():
+    server, url = start_translate_server(latency=0.0, error_rate=0.5)
+    yield server, url
+    server.shutdown()
+    server.server_close()
+
+
+def test_batch_is_one_request_split_at_sentinels():
+    backend = FakeTranslator()
+    texts = ["Hello there.", "", "How are you?", "Fine."]
+    assert BatchTranslator(backend).translate_many(texts) == ["HELLO THERE.", "", "HOW ARE YOU?", "FINE."]
+    assert backend.calls == [f"\n{SENTINEL}\n".join(["Hello there.", "How are you?", "Fine."])]
+
+
+def test_respaced_sentinels_still_split():
+    backend = FakeTranslator(transform=lambda text: text.upper().replace(SENTINEL, ' | | | '))
+    assert BatchTranslator(backend).translate_batch(["one", "two", "three"]) == ["ONE", "TWO", "THREE"]
+    assert len(backend.calls) == 1
+
+
+def test_lost_sentinel_falls_back_to_one_request_per_item():
+    backend = FakeTranslator(transform=lambda text: text.upper().replace(SENTINEL, ''))
+    assert BatchTranslator(backend).translate_batch(["one", "two", "three"]) == ["ONE", "TWO", "THREE"]
+    assert backend.calls[1:] == ["one", "two", "three"]
+
+
+def test_batches_respect_max_chars_and_keep_order():
+    backend = FakeTranslator()
+    texts = [f"sentence {i}." for i in range(50)]
+    translator = BatchTranslator(backend, max_chars=60, workers=4)
+    assert translator.translate_many(texts) == [text.upper() for text in texts]
+    assert len(backend.calls) > 1
+    assert all(len(call) <= 60 for call in backend.calls)
+
+
+def test_call_with_retry_rides_out_429_and_503(flaky_server):
+    server, url = flaky_server
+    backend = LibreTranslateBackend(url)
+    texts = [f"line {i}" for i in range(20)]
+    assert [call_with_retry(backend.translate, text, retries=50, base_delay=0.001) for text in texts] == \
+        [text.upper() for text in texts]
+    assert server.requests > len(texts)
+
+
+def test_call_with_retry_gives_up_after_retries(flaky_server):
+    server, url = flaky_server
+    server.error_rate = 1.0
+    with pytest.raises(TranslationHTTPError) as info:
+        call_with_retry(LibreTranslateBackend(url).translate, "line", retries=3, base_delay=0.001)
+    assert info.value.status in (429, 503)
+    assert server.requests == 4
+
+
+def test_call_with_retry_does_not_retry_client_errors():
+    calls = []
+
+    def bad_request(text):
+        calls.append(text)
+        raise TranslationHTTPError(400, "bad request")
+
+    with pytest.raises(TranslationHTTPError):
+        call_with_retry(bad_request, "line", base_delay=0.001)
+    assert calls == ["line"]
+
+
+def test_rate_limiter_is_shared_between_threads():
+    limiter = RateLimiter(50, burst=1)
+    start = time.monotonic()
+    threads = [threading.Thread(target=lambda: [limiter.acquire() for _ in range(5)]) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert time.monotonic() - start >= 19 / 50 * 0.95
+
+
+def test_batch_translator_limits_and_retries_against_the_server(flaky_server, monkeypatch):
+    server, url = flaky_server
+    monkeypatch.setattr(translators, 'call_with_retry', partial(call_with_retry, base_delay=0.001))
+    server.error_rate = 0.2
+    texts = [f"sentence {i}." for i in range(10)]
+    translator = BatchTranslator(LibreTranslateBackend(url), max_chars=20, workers=4,
+                                 rate_limiter=RateLimiter(50, burst=1), retries=50)
+    start = time.monotonic()
+    assert translator.translate_many(texts) == [text.upper() for text in texts]
+    assert time.monotonic() - start >= 9 / 50 * 0.95
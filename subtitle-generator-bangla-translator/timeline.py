@@ -0,0 +1,388 @@
+import argparse
+import io
+import os
+import re
+import sys
+import time
+
+from srt import Cue, read_srt
+
+# Cue Timeline
+#
+# Bulk retiming of subtitles: shifting, frame rate conversion (23.976 <-> 25),
+# minimum and maximum durations, minimum gaps, merging short cues and fixing
+# overlaps. Cues are held as columns -- start and end times as int64 arrays of
+# milliseconds, cue numbers, and an index into a list of texts -- so every operation
+# is a handful of NumPy calls over the whole file instead of a loop over cues.
+# Texts are only touched when cues are merged.
+#
+# Well-formed SRT files are parsed with one regular expression over the whole text
+# and converted to columns in one go; anything unusual goes through `read_srt`.
+#
+#   python timeline.py "season1/*.srt" --fps 23.976 25 --min-gap 80 --in-place
+#   python timeline.py talk.srt --shift -1500     # writes talk_retimed.srt
+#
+# NumPy is imported when a timeline is first built, so importing this module is cheap.
+
+# Frame rates written as 23.976 and so on are really 24000/1001 and so on.
+FRAME_RATES = {'23.976': 24000 / 1001, '29.97': 30000 / 1001, '47.952': 48000 / 1001, '59.94': 60000 / 1001}
+
+RETIMED_SUFFIX = '_retimed'
+
+# One canonical cue: index line, 'HH:MM:SS,mmm --> HH:MM:SS,mmm', text lines, blank line.
+# Text lines must not start or end with whitespace (`read_srt` would strip it), and
+# digits are ASCII only. The timing line is always 29 characters, so a match is 32
+# characters plus the index and text.
+_CUE_RE = re.compile(r'([0-9]+)\n([0-9]{2}:[0-9]{2}:[0-9]{2}[,.][0-9]{3} --> [0-9]{2}:[0-9]{2}:[0-9]{2}[,.][0-9]{3})\n'
+                     r'((?:\S(?:.*\S)?\n)*)\n')
+_CUE_FIXED_CHARS = 32
+_TIMING_CHARS = 29
+# Position, width and unit in milliseconds of the hours, minutes, seconds and
+# milliseconds of a timestamp, and where the end timestamp starts in the line.
+_TIMING_FIELDS = ((0, 2, 3600000), (3, 2, 60000), (6, 2, 1000), (9, 3, 1))
+_END_TIMESTAMP = 17
+
+
+def frame_rate(value):
+    """
+    Turn a frame rate as written ('25', '23.976') into frames per second, using the
+    exact NTSC rate for 23.976, 29.97 and so on.
+    """
+    return FRAME_RATES.get(str(value).strip(), None) or float(value)
+
+
+class Timeline:
+    """
+    Subtitle cues as columns.
+
+    `start` and `end` are int64 arrays of milliseconds, `index` holds the cue numbers
+    and `text_id` points into `texts`, where each cue's text is stored as its lines,
+    each ending in a newline. Operations return a new timeline and leave this one
+    unchanged; the texts are shared between them, not copied.
+    """
+
+    def __init__(self, start, end, text_id, texts, index=None):
+        """
+        Args:
+            start (array): Start times in milliseconds.
+            end (array): End times in milliseconds.
+            text_id (array): Position of each cue's text in `texts`.
+            texts (list): Cue texts, each line followed by '\\n'.
+            index (array): Cue numbers; defaults to 1, 2, 3...
+        """
+        import numpy as np
+        self.start = np.asarray(start, dtype=np.int64)
+        self.end = np.asarray(end, dtype=np.int64)
+        self.text_id = np.asarray(text_id, dtype=np.int64)
+        self.texts = texts
+        self.index = np.arange(1, len(self.start) + 1, dtype=np.int64) if index is None else \
+            np.asarray(index, dtype=np.int64)
+
+    @classmethod
+    def from_cues(cls, cues):
+        """
+        Build a timeline from `Cue` objects (e.g. from `read_srt`).
+        """
+        cues = list(cues)
+        texts = [''.join(line + '\n' for line in cue.lines) for cue in cues]
+        return cls([c.start for c in cues], [c.end for c in cues], range(len(cues)), texts,
+                   [c.index for c in cues])
+
+    @classmethod
+    def from_srt(cls, source):
+        """
+        Read an SRT file into a timeline.
+
+        Args:
+            source (str or file): Path to the SRT file, or an open text file.
+
+        Returns:
+            Timeline: The cues, exactly as `read_srt` would return them.
+        """
+        if isinstance(source, str):
+            with open(source, 'r', encoding='utf-8-sig') as f:
+                return cls.from_srt(f)
+        text = source.read()
+        timeline = cls._parse_canonical(text)
+        if timeline is None:
+            timeline = cls.from_cues(read_srt(io.StringIO(text)))
+        return timeline
+
+    @classmethod
+    def _parse_canonical(cls, text):
+        # Parse the whole file with `_CUE_RE`, or return None if it is not laid out the
+        # usual way (the matches must cover the text exactly, with one timing line per cue;
+        # runs of blank lines also go to `read_srt`).
+        import numpy as np
+        if '\ufeff' in text or '\r' in text or '\n\n\n' in text:
+            return None
+        text = text.strip('\n') + '\n\n'
+        rows = _CUE_RE.findall(text)
+        if not rows or len(rows) != text.count('-->'):
+            return None
+        numbers, timings, texts = zip(*rows)
+        if _CUE_FIXED_CHARS * len(rows) + sum(map(len, numbers)) + sum(map(len, texts)) != len(text):
+            return None
+        # Every timing line is ASCII and the same length, so read all their digits at once.
+        digits = np.frombuffer(''.join(timings).encode('ascii'), dtype=np.uint8).reshape(-1, _TIMING_CHARS)
+        digits = digits.astype(np.int64) - ord('0')
+        start = np.zeros(len(rows), dtype=np.int64)
+        end = np.zeros(len(rows), dtype=np.int64)
+        for offset, width, unit in _TIMING_FIELDS:
+            for i in range(width):
+                place = unit * 10 ** (width - 1 - i)
+                start += digits[:, offset + i] * place
+                end += digits[:, _END_TIMESTAMP + offset + i] * place
+        index = np.fromiter(map(int, numbers), dtype=np.int64, count=len(rows))
+        return cls(start, end, np.arange(len(rows)), list(texts), index)
+
+    def __len__(self):
+        return len(self.start)
+
+    def cues(self):
+        """
+        Yield the cues as `Cue` objects.
+        """
+        texts = self.texts
+        for index, start, end, text_id in zip(self.index.tolist(), self.start.tolist(), self.end.tolist(),
+                                              self.text_id.tolist()):
+            yield Cue(index, start, end, texts[text_id].split('\n')[:-1])
+
+    def _replace(self, start=None, end=None, keep=None):
+        # A new timeline with new times and/or only the cues selected by `keep`.
+        start = self.start if start is None else start
+        end = self.end if end is None else end
+        text_id, index = self.text_id, self.index
+        if keep is not None:
+            start, end, text_id, index = start[keep], end[keep], text_id[keep], index[keep]
+        return Timeline(start, end, text_id, self.texts, index)
+
+    def sorted(self):
+        """
+        The cues in order of start time (cues that start together keep their order).
+        """
+        import numpy as np
+        if len(self) < 2 or (self.start[1:] >= self.start[:-1]).all():
+            return self
+        return self._replace(keep=np.argsort(self.start, kind='stable'))
+
+    def shift(self, ms, after=None):
+        """
+        Move cues by `ms` milliseconds (negative is earlier).
+
+        Args:
+            ms (int): The offset.
+            after (int): Only move cues starting at or after this time, e.g. after an
+                advert break; None moves all.
+
+        Times before zero are kept; `clamp()` drops or cuts them.
+        """
+        import numpy as np
+        if after is None:
+            return self._replace(self.start + int(ms), self.end + int(ms))
+        offset = np.where(self.start >= after, int(ms), 0)
+        return self._replace(self.start + offset, self.end + offset)
+
+    def scale(self, factor, origin=0):
+        """
+        Stretch times by `factor` around `origin` (in milliseconds), rounding to whole milliseconds.
+        """
+        import numpy as np
+        start = np.rint(origin + (self.start - origin) * factor).astype(np.int64)
+        end = np.rint(origin + (self.end - origin) * factor).astype(np.int64)
+        return self._replace(start, end)
+
+    def retime(self, from_fps, to_fps):
+        """
+        Convert subtitles timed for a video at `from_fps` to the same video played at
+        `to_fps` (e.g. 23.976 -> 25 when a film is sped up for PAL: every time gets shorter).
+        """
+        return self.scale(frame_rate(from_fps) / frame_rate(to_fps))
+
+    def clamp(self, min_duration=0, max_duration=None, lo=0, hi=None):
+        """
+        Enforce cue durations and keep every time within [lo, hi].
+
+        Short cues are lengthened to `min_duration` and long ones cut to `max_duration`
+        (lengthening can make a cue run into the next; `resolve_overlaps` fixes that).
+        Cues left with no time inside the range are dropped.
+        """
+        import numpy as np
+        start = np.maximum(self.start, lo)
+        end = np.maximum(self.end, self.start + min_duration)
+        if max_duration is not None:
+            end = np.minimum(end, self.start + max_duration)
+        end = np.maximum(end, lo)
+        if hi is not None:
+            start = np.minimum(start, hi)
+            end = np.minimum(end, hi)
+        return self._replace(start, end, keep=end > start)
+
+    def resolve_overlaps(self, min_gap=0):
+        """
+        Make sure every cue ends at least `min_gap` milliseconds before the next starts.
+
+        Cues are sorted first. A cue that starts within `min_gap` of the one before is
+        merged into it; otherwise the earlier cue's end is cut back.
+        """
+        import numpy as np
+        timeline = self.sorted()
+        if len(timeline) < 2:
+            return timeline
+        first = np.ones(len(timeline), dtype=bool)
+        first[1:] = timeline.start[1:] - timeline.start[:-1] > min_gap
+        timeline = timeline._join(first)
+        end = timeline.end.copy()
+        end[:-1] = np.minimum(end[:-1], timeline.start[1:] - min_gap)
+        return timeline._replace(end=end)
+
+    def merge(self, min_duration, max_gap=500):
+        """
+        Join short cues to their neighbours.
+
+        A cue is joined to the one before it when either of the two is shorter than
+        `min_duration` and the gap between them is at most `max_gap` milliseconds.
+        The joined cue spans both, and its text is their lines in order.
+        """
+        import numpy as np
+        timeline = self.sorted()
+        if len(timeline) < 2:
+            return timeline
+        short = timeline.end - timeline.start < min_duration
+        close = timeline.start[1:] - timeline.end[:-1] <= max_gap
+        first = np.ones(len(timeline), dtype=bool)
+        first[1:] = ~(close & (short[1:] | short[:-1]))
+        return timeline._join(first)
+
+    def _join(self, first):
+        # Join each run of cues into the cue where `first` is True before it.
+        import numpy as np
+        if first.all():
+            return self
+        starts = np.flatnonzero(first)
+        sizes = np.diff(np.append(starts, len(first)))
+        end = np.maximum.reduceat(self.end, starts)
+        text_id = self.text_id[starts].copy()
+        texts = list(self.texts)
+        ids = self.text_id.tolist()
+        for group in np.flatnonzero(sizes > 1).tolist():
+            begin = starts[group]
+            text_id[group] = len(texts)
+            texts.append(''.join(self.texts[i] for i in ids[begin:begin + sizes[group]]))
+        return Timeline(self.start[starts], end, text_id, texts, self.index[starts])
+
+    def to_srt(self, target=None, renumber=False):
+        """
+        Serialize the cues as SRT, the same as `SrtWriter` would.
+
+        All timestamps are formatted in one `%` operation over the columns, so even
+        100,000 cues take a fraction of a second.
+
+        Args:
+            target (str or file): Output path or open text file; None to return the text.
+            renumber (bool): Number cues 1, 2, 3... instead of keeping their indexes.
+
+        Returns:
+            str: The SRT text if `target` is None, otherwise the number of cues written.
+        """
+        import numpy as np
+        n = len(self)
+        table = np.empty((n, 10), dtype=object)
+        table[:, 0] = np.arange(1, n + 1) if renumber else self.index
+        for column, times in ((1, self.start), (5, self.end)):
+            times = np.maximum(times, 0)
+            table[:, column] = times // 3600000
+            table[:, column + 1] = times // 60000 % 60
+            table[:, column + 2] = times // 1000 % 60
+            table[:, column + 3] = times % 1000
+        texts = np.empty(len(self.texts), dtype=object)
+        texts[:] = self.texts
+        table[:, 9] = texts[self.text_id]
+        text = ('%d\n%02d:%02d:%02d,%03d --> %02d:%02d:%02d,%03d\n%s\n' * n) % tuple(table.ravel().tolist())
+        if target is None:
+            return text
+        if isinstance(target, str):
+            with open(target, 'w', encoding='utf-8') as f:
+                f.write(text)
+        else:
+            target.write(text)
+        return n
+
+
+def retimed_path(srt_path):
+    """
+    Name the output of retiming, e.g. `talk.srt` -> `talk_retimed.srt`.
+    """
+    return f"{os.path.splitext(srt_path)[0]}{RETIMED_SUFFIX}.srt"
+
+
+def is_retime_input(path):
+    """
+    Check if a file found in a folder or glob is retimed: any SRT, translated tracks
+    (`talk_bangla.srt`) included, except the output of an earlier retiming.
+    """
+    name = path.lower()
+    return name.endswith('.srt') and not name.endswith(f'{RETIMED_SUFFIX}.srt')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Shift, convert and clean up the timing of SRT files in bulk.")
+    parser.add_argument('inputs', nargs='+', help="SRT files, glob patterns or directories")
+    parser.add_argument('--shift', type=int, default=0, help="Milliseconds to move every cue (negative: earlier)")
+    parser.add_argument('--fps', nargs=2, metavar=('FROM', 'TO'), help="Convert between frame rates, e.g. 23.976 25")
+    parser.add_argument('--merge-short', type=int, default=0, metavar='MS',
+                        help="Join cues shorter than this to their neighbour (within --max-gap)")
+    parser.add_argument('--max-gap', type=int, default=500, help="Largest gap bridged by --merge-short")
+    parser.add_argument('--min-duration', type=int, help="Lengthen shorter cues to this many ms")
+    parser.add_argument('--max-duration', type=int, help="Cut longer cues to this many ms")
+    parser.add_argument('--min-gap', type=int, help="Milliseconds kept between cues; fixes overlaps (also done, "
+                                                   "with no gap, when a duration option is given)")
+    parser.add_argument('--renumber', action='store_true', help="Number the cues 1, 2, 3... again")
+    parser.add_argument('--in-place', action='store_true', help=f"Overwrite the inputs instead of writing "
+                                                                f"*{RETIMED_SUFFIX}.srt files")
+    args = parser.parse_args(argv)
+
+    from cli import expand_inputs
+    files, unmatched = expand_inputs(args.inputs, accept=is_retime_input)
+    durations = args.min_duration is not None or args.max_duration is not None
+    fix_overlaps = args.min_gap is not None or durations
+    for arg in unmatched:
+        print(f"No input files match: {arg}", file=sys.stderr)
+    if not files:
+        return 2
+
+    failed = 0
+    cues = 0
+    started = time.perf_counter()
+    for path in files:
+        try:
+            timeline = Timeline.from_srt(path)
+            if args.shift:
+                timeline = timeline.shift(args.shift)
+            if args.fps:
+                timeline = timeline.retime(*args.fps)
+            if args.merge_short:
+                timeline = timeline.merge(args.merge_short, args.max_gap)
+            if durations:
+                timeline = timeline.clamp(args.min_duration or 0, args.max_duration)
+            elif args.shift < 0:
+                timeline = timeline.clamp()     # Only cut or drop what moved before zero
+            if fix_overlaps:
+                timeline = timeline.resolve_overlaps(args.min_gap or 0)
+            out = path if args.in_place else retimed_path(path)
+            tmp = f"{out}.{os.getpid()}.tmp"
+            timeline.to_srt(tmp, renumber=args.renumber)
+            os.replace(tmp, out)
+        except Exception as e:
+            print(f"[    error] {path}  ({type(e).__name__}: {e})", file=sys.stderr)
+            failed += 1
+            continue
+        cues += len(timeline)
+        print(f"[     done] {out}", file=sys.stderr)
+    print(f"\n{len(files) - failed} files, {cues} cues retimed in {time.perf_counter() - started:.2f}s",
+          file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,226 @@
+import atexit
+import json
+import os
+import threading
+import time
+
+# Tracing
+#
+# Timed spans and counters that show where a job's time goes: extraction, upload,
+# polling, every translation request, cache lookups and SRT writing. Tracing is off
+# unless the SUBTITLE_TRACE environment variable names an output file or `enable()`
+# is called. While it is off, `span()` hands back one shared do-nothing object and
+# `count()` returns at once, so the instrumented code runs at full speed.
+#
+#   SUBTITLE_TRACE=trace.json python cli.py talk.mp3    # Chrome trace (chrome://tracing, Perfetto)
+#   SUBTITLE_TRACE=trace.jsonl python cli.py talk.mp3   # One JSON object per line
+#
+# Spans nest per thread, so the trace viewer shows each worker thread as its own row.
+
+TRACE_PATH = os.getenv('SUBTITLE_TRACE')
+
+
+class _NoSpan:
+    # Returned by `span()` while tracing is off.
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **args):
+        pass
+
+
+_NO_SPAN = _NoSpan()
+
+
+class Span:
+    """
+    A timed section of work; use it as a context manager.
+    """
+
+    __slots__ = ('tracer', 'name', 'args', 'start')
+
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+        self.start = 0
+
+    def set(self, **args):
+        """
+        Attach more details to the span, e.g. a size only known once the work is done.
+        """
+        self.args.update(args)
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter_ns()
+        if exc_type is not None:
+            self.args['error'] = exc_type.__name__
+        self.tracer.record(self.name, self.start, end - self.start, self.args)
+        return False
+
+
+class Tracer:
+    """
+    Collects spans and counters from every thread and writes them out.
+    """
+
+    def __init__(self):
+        self.spans = []         # (name, start_ns, duration_ns, thread id, args)
+        self.counters = {}      # name -> total
+        self.samples = []       # (name, time_ns, total after the change)
+        self.origin = time.perf_counter_ns()
+        self.pid = os.getpid()
+        self._threads = {}      # thread id -> thread name
+        self._lock = threading.Lock()
+
+    def span(self, name, **args):
+        """
+        Start a span; see the module-level `span`.
+        """
+        return Span(self, name, args)
+
+    def record(self, name, start, duration, args):
+        thread = threading.get_ident()
+        with self._lock:
+            if thread not in self._threads:
+                self._threads[thread] = threading.current_thread().name
+            self.spans.append((name, start, duration, thread, args))
+
+    def count(self, name, n=1):
+        """
+        Add `n` to a counter.
+        """
+        now = time.perf_counter_ns()
+        with self._lock:
+            total = self.counters.get(name, 0) + n
+            self.counters[name] = total
+            self.samples.append((name, now, total))
+
+    def summary(self):
+        """
+        Total up the spans by name.
+
+        Returns:
+            dict: 'spans' (name -> 'count', 'total_s' and 'max_s') and 'counters' (name -> total).
+        """
+        totals = {}
+        with self._lock:
+            spans = list(self.spans)
+            counters = dict(self.counters)
+        for name, _, duration, _, _ in spans:
+            entry = totals.setdefault(name, {'count': 0, 'total_s': 0.0, 'max_s': 0.0})
+            entry['count'] += 1
+            entry['total_s'] += duration / 1e9
+            entry['max_s'] = max(entry['max_s'], duration / 1e9)
+        return {'spans': totals, 'counters': counters}
+
+    def export(self, path, format=None):
+        """
+        Write everything recorded so far to a file.
+
+        Args:
+            path (str): Output file.
+            format (str): 'chrome' for the Chrome trace-viewer format or 'jsonl' for one
+                object per line; by default '.jsonl' files get 'jsonl' and others 'chrome'.
+        """
+        if format is None:
+            format = 'jsonl' if path.lower().endswith('.jsonl') else 'chrome'
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s[1])
+            samples = list(self.samples)
+            counters = dict(self.counters)
+            threads = dict(self._threads)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            if format == 'jsonl':
+                for name, start, duration, thread, args in spans:
+                    f.write(json.dumps({'type': 'span', 'name': name, 'start_s': (start - self.origin) / 1e9,
+                                        'duration_s': duration / 1e9, 'thread': threads[thread], 'args': args},
+                                       ensure_ascii=False) + '\n')
+                for name, total in sorted(counters.items()):
+                    f.write(json.dumps({'type': 'counter', 'name': name, 'value': total}) + '\n')
+            else:
+                # Timestamps and durations are in microseconds.
+                events = [{'name': 'thread_name', 'ph': 'M', 'pid': self.pid, 'tid': thread,
+                           'args': {'name': name}} for thread, name in threads.items()]
+                events += [{'name': name, 'cat': name.split('.')[0], 'ph': 'X', 'pid': self.pid, 'tid': thread,
+                            'ts': (start - self.origin) / 1000, 'dur': duration / 1000, 'args': args}
+                           for name, start, duration, thread, args in spans]
+                events += [{'name': name, 'ph': 'C', 'pid': self.pid, 'ts': (at - self.origin) / 1000,
+                            'args': {name: total}} for name, at, total in samples]
+                json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+
+_tracer = None
+
+
+def enable(path=None):
+    """
+    Start recording spans and counters.
+
+    Args:
+        path (str): File the trace is written to when the program exits, or None to
+            only keep it in memory (see `get_tracer`).
+
+    Returns:
+        Tracer: The active tracer.
+    """
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer()
+        if path:
+            atexit.register(_tracer.export, path)
+    return _tracer
+
+
+def disable():
+    """
+    Stop recording; later spans and counts are dropped.
+    """
+    global _tracer
+    _tracer = None
+
+
+def get_tracer():
+    """
+    Return the active tracer, or None while tracing is off.
+    """
+    return _tracer
+
+
+def span(name, **args):
+    """
+    Time a section of work: `with span('translate.request', chars=120): ...`.
+
+    Args:
+        name (str): Span name; the part before the first dot is its category.
+        **args: Details shown with the span in the trace.
+
+    Returns:
+        object: A context manager (a shared no-op while tracing is off).
+    """
+    if _tracer is None:
+        return _NO_SPAN
+    return Span(_tracer, name, args)
+
+
+def count(name, n=1):
+    """
+    Add `n` to a counter, e.g. `count('translate.retries')`.
+    """
+    if _tracer is not None:
+        _tracer.count(name, n)
+
+
+if TRACE_PATH:
+    enable(TRACE_PATH)
@@ -0,0 +1,381 @@
+# Transcribe many audio files with AssemblyAI at once.
+# Every file is uploaded and submitted straight away (a bounded number of requests at
+# a time), then all jobs are polled from one loop, and each SRT is written the moment
+# its job completes. Transcripts go into the same stage cache as `transcribe_to_srt`,
+# so files already transcribed are written from disk without uploading anything.
+#
+#   python transcribe_manager.py episodes/*.mp3 --concurrency 8
+#   ASSEMBLYAI_URL=http://127.0.0.1:8000 python transcribe_manager.py a.mp3   # against a mock API
+#
+# Exit status: 0 if every file succeeded, 1 if any failed, 2 if no input matched,
+# 130 if interrupted.
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import tracing
+from stage_cache import StageCache, file_hash
+from subtitle_core import write_transcript, AUDIO_EXTENSIONS
+from transcription import API_KEY
+from translators import Cancelled, call_with_retry
+
+# Base URL of the AssemblyAI REST API; point it at a local mock for testing.
+ASSEMBLYAI_URL = os.getenv('ASSEMBLYAI_URL', 'https://api.assemblyai.com')
+
+DEFAULT_CONCURRENCY = 8     # HTTP requests (uploads, submissions, polls) in flight at once
+MIN_POLL_S = 1.0            # First poll of a job, and again after its status changes
+MAX_POLL_S = 30.0           # Longest wait between polls of one job
+POLL_BACKOFF = 1.5          # Growth of a job's poll interval while its status stays the same
+
+
+class TranscriptionHTTPError(Exception):
+    """
+    Raised when the transcription API answers with an error status.
+    """
+
+    def __init__(self, status, message=''):
+        super().__init__(f"HTTP {status}: {message}" if message else f"HTTP {status}")
+        self.status = status
+
+
+class AssemblyAIRestClient:
+    """
+    Blocking client for the few AssemblyAI REST endpoints the manager needs.
+
+    Uses only the standard library, so it needs no SDK and can be pointed at a mock
+    server through `base_url`.
+    """
+
+    name = 'assemblyai'
+
+    def __init__(self, api_key=None, base_url=ASSEMBLYAI_URL, speech_model='best', webhook_url=None, timeout=60):
+        """
+        Args:
+            api_key (str): API key; defaults to `API_KEY`.
+            base_url (str): API base URL.
+            speech_model (str): Name of the AssemblyAI speech model.
+            webhook_url (str): URL AssemblyAI calls when a job finishes (see `TranscriptionManager.notify`).
+            timeout (float): Seconds to wait for each response.
+        """
+        self.api_key = api_key or API_KEY
+        self.base_url = base_url.rstrip('/')
+        self.speech_model = speech_model
+        self.webhook_url = webhook_url
+        self.timeout = timeout
+
+    def config(self):
+        """
+        Describe the settings that affect the transcript, for cache keys (the same as
+        `AssemblyAITranscriber.config`).
+        """
+        return {'provider': self.name, 'speech_model': self.speech_model}
+
+    def _request(self, method, path, data=None, headers=None, raw=False):
+        import urllib.error
+        import urllib.request
+        req = urllib.request.Request(self.base_url + path, data=data, method=method,
+                                     headers=dict(headers or {}, authorization=self.api_key))
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+                body = resp.read()
+        except urllib.error.HTTPError as e:
+            raise TranscriptionHTTPError(e.code, e.reason) from e
+        return body.decode('utf-8') if raw else json.loads(body)
+
+    def upload(self, audio_path):
+        """
+        Upload an audio file (streamed from disk).
+
+        Returns:
+            str: The URL to submit for transcription.
+        """
+        size = os.path.getsize(audio_path)
+        with open(audio_path, 'rb') as f:
+            return self._request('POST', '/v2/upload', data=f, headers={
+                'Content-Type': 'application/octet-stream', 'Content-Length': str(size)})['upload_url']
+
+    def submit(self, audio_url):
+        """
+        Start a transcription job.
+
+        Returns:
+            dict: The job, with 'id' and 'status'.
+        """
+        payload = {'audio_url': audio_url, 'speech_model': self.speech_model}
+        if self.webhook_url:
+            payload['webhook_url'] = self.webhook_url
+        return self._request('POST', '/v2/transcript', json.dumps(payload).encode('utf-8'),
+                             {'Content-Type': 'application/json'})
+
+    def get(self, transcript_id):
+        """
+        Fetch a job: its 'status' ('queued', 'processing', 'completed' or 'error'), and
+        once completed its 'text' and 'words'.
+        """
+        return self._request('GET', f'/v2/transcript/{transcript_id}')
+
+    def srt(self, transcript_id):
+        """
+        Fetch a completed transcript as SRT text.
+        """
+        return self._request('GET', f'/v2/transcript/{transcript_id}/srt', raw=True)
+
+
+class _Job:
+    __slots__ = ('audio_path', 'srt_path', 'key', 'id', 'status', 'interval', 'next_poll')
+
+    def __init__(self, audio_path, srt_path):
+        self.audio_path = audio_path
+        self.srt_path = srt_path
+        self.key = None
+        self.id = None
+        self.status = None
+        self.interval = 0.0
+        self.next_poll = 0.0
+
+
+class TranscriptionManager:
+    """
+    Upload, submit and poll many transcription jobs concurrently on one asyncio loop.
+
+    Blocking work (HTTP requests, hashing, writing SRTs) runs on a pool of
+    `concurrency` threads, which also bounds the open connections. A job is polled
+    after `min_poll` seconds, then less and less often (up to `max_poll`) while its
+    status stays the same. `notify()` makes a job be polled at once, for use from a
+    webhook handler.
+
+    Events are dicts with an 'event' key ('cached', 'uploading', 'queued',
+    'processing', 'done', 'error' or 'cancelled') and the audio 'file'.
+    """
+
+    def __init__(self, client=None, concurrency=DEFAULT_CONCURRENCY, min_poll=MIN_POLL_S, max_poll=MAX_POLL_S,
+                 backoff=POLL_BACKOFF, retries=5, cache=None, use_cache=True, segmenter=None, on_event=None,
+                 cancel_event=None):
+        """
+        Args:
+            client (AssemblyAIRestClient): API client; defaults to one for `ASSEMBLYAI_URL`.
+            concurrency (int): Blocking operations (mostly HTTP requests) running at once.
+            min_poll (float): Seconds before the first poll of a job.
+            max_poll (float): Longest wait between two polls of a job.
+            backoff (float): Factor the poll interval grows by while the status stays the same.
+            retries (int): Retries per request on HTTP 429/5xx.
+            cache (StageCache): Transcript cache; defaults to the shared cache directory.
+            use_cache (bool): Look up and store transcripts in the cache.
+            segmenter (Segmenter): Limits for cutting word timestamps into cues.
+            on_event (callable): Called with each event dict, on the event loop's thread.
+            cancel_event (threading.Event): When set, stop submitting and waiting; unfinished
+                files are reported as cancelled.
+        """
+        self.client = client or AssemblyAIRestClient()
+        self.concurrency = max(1, concurrency)
+        self.min_poll = min_poll
+        self.max_poll = max_poll
+        self.backoff = backoff
+        self.retries = retries
+        self.cache = (cache or StageCache()) if use_cache else None
+        self.segmenter = segmenter
+        self.on_event = on_event or (lambda event: None)
+        self.cancel_event = cancel_event or threading.Event()
+        self.polls = 0
+        self._loop = None
+
+    def transcribe_many(self, pairs):
+        """
+        Transcribe files and wait until all have finished. See `run`.
+        """
+        return asyncio.run(self.run(pairs))
+
+    async def run(self, pairs):
+        """
+        Transcribe files, writing each SRT as soon as its job completes.
+
+        Args:
+            pairs (list): (audio path, SRT path) tuples.
+
+        Returns:
+            dict: Audio path -> final event ('cached', 'done', 'error' or 'cancelled').
+        """
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._polling = {}
+        self._results = {}
+        self._submitting = True
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            self._pool = pool
+            poller = asyncio.create_task(self._poll_loop())
+            await asyncio.gather(*(self._start(_Job(audio, srt)) for audio, srt in pairs))
+            self._submitting = False
+            self._wake.set()
+            await poller
+        return self._results
+
+    def notify(self, transcript_id):
+        """
+        Poll a job right away, e.g. when a webhook reports it finished. Thread-safe.
+        """
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._poll_now, transcript_id)
+
+    def _poll_now(self, transcript_id):
+        job = self._polling.get(transcript_id)
+        if job is not None:
+            job.next_poll = 0.0
+            self._wake.set()
+
+    def _emit(self, event, job, **fields):
+        self.on_event(dict(event=event, file=job.audio_path, **fields))
+
+    def _finish(self, job, event, **fields):
+        self._polling.pop(job.id, None)
+        self._results[job.audio_path] = dict(event=event, file=job.audio_path, **fields)
+        self._emit(event, job, **fields)
+
+    async def _run(self, fn, *args):
+        return await self._loop.run_in_executor(self._pool, partial(fn, *args))
+
+    async def _call(self, fn, *args):
+        # An API request, retried with backoff on rate limiting and server errors.
+        return await self._run(partial(call_with_retry, fn, retries=self.retries), *args)
+
+    async def _start(self, job):
+        # Answer from the cache, or upload and submit the file for polling.
+        try:
+            if self.cache is not None:
+                config = dict(self.client.config(), chunked=False)
+                job.key = self.cache.key(await self._run(file_hash, job.audio_path), 'transcript', config)
+                cached = await self._run(self.cache.get, job.key)
+                tracing.count('cache.transcript.misses' if cached is None else 'cache.transcript.hits')
+                if cached is not None:
+                    await self._run(write_transcript, cached, job.srt_path, self.segmenter)
+                    self._finish(job, 'cached', srt=job.srt_path)
+                    return
+            if self.cancel_event.is_set():
+                raise Cancelled("Transcription was cancelled")
+            self._emit('uploading', job)
+            with tracing.span('transcribe.upload', file=os.path.basename(job.audio_path)):
+                url = await self._call(self.client.upload, job.audio_path)
+            tracing.count('transcribe.bytes_uploaded', os.path.getsize(job.audio_path))
+            if self.cancel_event.is_set():
+                raise Cancelled("Transcription was cancelled")
+            submitted = await self._call(self.client.submit, url)
+        except Cancelled:
+            self._finish(job, 'cancelled')
+            return
+        except Exception as e:
+            self._finish(job, 'error', error=f"{type(e).__name__}: {e}")
+            return
+        job.id = submitted['id']
+        job.status = submitted.get('status', 'queued')
+        job.interval = self.min_poll
+        job.next_poll = self._loop.time() + job.interval
+        self._polling[job.id] = job
+        self._emit(job.status, job, id=job.id)
+        self._wake.set()
+
+    async def _poll_loop(self):
+        # Poll every job that is due, then sleep until the next one is (or until woken).
+        while self._submitting or self._polling:
+            if self.cancel_event.is_set():
+                for job in list(self._polling.values()):
+                    self._finish(job, 'cancelled', id=job.id)
+                if not self._submitting:
+                    return
+            now = self._loop.time()
+            due = [job for job in self._polling.values() if job.next_poll <= now]
+            if due:
+                await asyncio.gather(*(self._poll(job) for job in due))
+                continue
+            wait = min((job.next_poll for job in self._polling.values()), default=now + self.max_poll) - now
+            self._wake.clear()
+            try:
+                # Wake up regularly to notice the cancel event, which is not awaitable.
+                await asyncio.wait_for(self._wake.wait(), timeout=min(wait, 0.5))
+            except asyncio.TimeoutError:
+                pass
+
+    async def _poll(self, job):
+        try:
+            self.polls += 1
+            tracing.count('transcribe.polls')
+            data = await self._call(self.client.get, job.id)
+            status = data['status']
+            if status == 'completed':
+                words = [{'text': w['text'], 'start': w['start'], 'end': w['end'], 'confidence': w.get('confidence')}
+                         for w in data.get('words') or []]
+                transcript = {'id': job.id, 'text': data.get('text') or '', 'words': words,
+                              'srt': await self._call(self.client.srt, job.id)}
+                await self._run(write_transcript, transcript, job.srt_path, self.segmenter)
+                if self.cache is not None:
+                    await self._run(self.cache.put, job.key, transcript)
+                self._finish(job, 'done', id=job.id, srt=job.srt_path)
+            elif status == 'error':
+                self._finish(job, 'error', id=job.id, error=f"Transcription failed: {data.get('error')}")
+            else:
+                if status != job.status:
+                    job.status = status
+                    job.interval = self.min_poll
+                    self._emit(status, job, id=job.id)
+                else:
+                    job.interval = min(self.max_poll, job.interval * self.backoff)
+                job.next_poll = self._loop.time() + job.interval
+        except Exception as e:
+            self._finish(job, 'error', id=job.id, error=f"{type(e).__name__}: {e}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Transcribe many audio files with AssemblyAI at once.")
+    parser.add_argument('inputs', nargs='+', help="Audio files, glob patterns or directories")
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help="HTTP requests in flight")
+    parser.add_argument('--speech-model', default='best', help="AssemblyAI speech model")
+    parser.add_argument('--max-poll', type=float, default=MAX_POLL_S, help="Longest wait between polls of a job")
+    parser.add_argument('--no-cache', action='store_true', help="Do not use the transcript cache")
+    parser.add_argument('--json', action='store_true', help="Print one JSON object per event on stdout")
+    parser.add_argument('--trace', help="Write a timing trace to this file (.json for Chrome, .jsonl)")
+    args = parser.parse_args(argv)
+    if args.trace:
+        tracing.enable(args.trace)
+
+    from cli import expand_inputs
+    files, unmatched = expand_inputs(args.inputs)
+    files = [f for f in files if f.lower().endswith(AUDIO_EXTENSIONS)]
+    for arg in unmatched:
+        print(f"No input files match: {arg}", file=sys.stderr)
+    if not files:
+        return 2
+
+    def report(event):
+        if args.json:
+            sys.stdout.write(json.dumps(event, ensure_ascii=False) + '\n')
+            sys.stdout.flush()
+        else:
+            extra = f"  ({event['error']})" if 'error' in event else ''
+            print(f"[{event['event']:>10}] {event['file']}{extra}", file=sys.stderr)
+
+    manager = TranscriptionManager(AssemblyAIRestClient(speech_model=args.speech_model),
+                                   concurrency=args.concurrency, max_poll=args.max_poll,
+                                   use_cache=not args.no_cache, on_event=report)
+    pairs = [(f, f"{os.path.splitext(f)[0]}.srt") for f in files]
+    # Run in a thread so Ctrl+C reaches the main thread and can cancel the jobs.
+    results = {}
+    worker = threading.Thread(target=lambda: results.update(manager.transcribe_many(pairs)), daemon=True)
+    worker.start()
+    try:
+        while worker.is_alive():
+            worker.join(0.2)
+    except KeyboardInterrupt:
+        manager.cancel_event.set()
+        worker.join()
+        return 130
+    if len(results) < len(pairs):
+        return 1
+    return 0 if all(r['event'] in ('done', 'cached') for r in results.values()) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,583 @@
+import io
+import os
+import random
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import tracing
+from audio_extract import find_ffmpeg, probe_audio
+from srt import Cue, read_srt, write_srt
+from translators import Cancelled, TranslationHTTPError, call_with_retry
+
+# Transcription Clients
+#
+# A client is any object with a `transcribe_srt(audio_path, on_status=None,
+# cancel_event=None)` method returning the SRT text for that file. `transcribe_chunked` splits long audio at silences,
+# sends the chunks to a client concurrently and stitches the results together.
+#
+# Clients may also offer `transcribe_json`, returning the transcript with word-level
+# timestamps, and `config()`, describing everything that affects the result. These
+# are what the stage cache stores and keys on.
+
+DEFAULT_CHUNK_MS = 10 * 60 * 1000   # Aim for ten-minute chunks
+DEFAULT_OVERLAP_MS = 5 * 1000       # Extra audio on each side of a seam
+SILENCE_SEARCH_MS = 30 * 1000       # How far from the nominal cut to look for a silence
+DEFAULT_CHUNK_WORKERS = 4
+
+# Configuration
+API_KEY = os.getenv('ASSEMBLYAI_API_KEY', 'YOUR_API_KEY_HERE')
+
+# Which client `make_transcriber` builds by default: 'assemblyai' or 'whisper' (offline).
+DEFAULT_TRANSCRIBER = os.getenv('SUBTITLE_TRANSCRIBER', 'assemblyai')
+DEFAULT_WHISPER_MODEL = os.getenv('SUBTITLE_WHISPER_MODEL', 'small.en')
+WHISPER_SAMPLE_RATE = 16000
+WHISPER_CHUNK_S = 60
+
+_SILENCE_RE = re.compile(r'silence_(start|end): (-?[\d.]+)')
+_CHUNK_NAME_RE = re.compile(r'chunk_(\d+)_(\d+)_(\d+)\.')
+_WORD_RE = re.compile(r'\w+')
+
+
+class AssemblyAITranscriber:
+    """
+    Transcribe audio with AssemblyAI.
+    """
+
+    name = 'assemblyai'
+
+    def __init__(self, speech_model='best', api_key=None):
+        """
+        Args:
+            speech_model (str): Name of the AssemblyAI speech model.
+            api_key (str): API key; defaults to `API_KEY`.
+        """
+        import assemblyai as aai
+        aai.settings.api_key = api_key or API_KEY
+        self._aai = aai
+        self.speech_model = speech_model
+        config = aai.TranscriptionConfig(speech_model=getattr(aai.SpeechModel, speech_model))
+        self._transcriber = aai.Transcriber(config=config)
+
+    def config(self):
+        """
+        Describe the settings that affect the transcript, for cache keys.
+        """
+        return {'provider': self.name, 'speech_model': self.speech_model}
+
+    def transcribe_json(self, audio_path, on_status=None, cancel_event=None, poll_interval=3.0):
+        """
+        Transcribe a file and return the transcript with word-level timestamps.
+
+        The file is submitted and then polled, so progress can be reported and the
+        wait can be abandoned.
+
+        Args:
+            audio_path (str): Path to the audio file.
+            on_status (callable): Called with 'uploading', then each job status ('queued', 'processing').
+            cancel_event (threading.Event): When set, stop waiting and raise `Cancelled`.
+            poll_interval (float): Seconds between status checks.
+
+        Returns:
+            dict: 'id', 'text', 'words' (dicts with 'text', 'start', 'end' in ms and
+                'confidence') and 'srt' (AssemblyAI's own SRT export).
+
+        Raises:
+            RuntimeError: If AssemblyAI reports that the transcription failed.
+            Cancelled: If `cancel_event` was set.
+        """
+        report = on_status or (lambda status: None)
+        report('uploading')
+        size = os.path.getsize(audio_path)
+        with tracing.span('transcribe.upload', bytes=size):
+            transcript = self._transcriber.submit(audio_path)
+        tracing.count('transcribe.bytes_uploaded', size)
+        with tracing.span('transcribe.poll', id=transcript.id) as span:
+            polls = 0
+            while transcript.status not in ('completed', 'error'):
+                report(getattr(transcript.status, 'value', transcript.status))
+                if cancel_event is None:
+                    time.sleep(poll_interval)
+                elif cancel_event.wait(poll_interval):
+                    raise Cancelled("Transcription was cancelled")
+                transcript = self._aai.Transcript.get_by_id(transcript.id)
+                polls += 1
+                tracing.count('transcribe.polls')
+            span.set(polls=polls)
+        if transcript.status == 'error':
+            raise RuntimeError(f"Transcription failed: {transcript.error}")
+        words = [{'text': w.text, 'start': w.start, 'end': w.end, 'confidence': w.confidence}
+                 for w in transcript.words or []]
+        return {'id': transcript.id, 'text': transcript.text or '', 'words': words,
+                'srt': transcript.export_subtitles_srt()}
+
+    def transcribe_srt(self, audio_path, on_status=None, cancel_event=None, poll_interval=3.0):
+        """
+        Transcribe a file and return it as SRT text. See `transcribe_json`.
+        """
+        return self.transcribe_json(audio_path, on_status, cancel_event, poll_interval)['srt']
+
+
+class WhisperTranscriber:
+    """
+    Transcribe audio on this machine with a Whisper model through `faster-whisper`.
+
+    Speech is found with voice activity detection first; the speech is cut into
+    chunks at the pauses between regions, and the chunks are decoded in parallel on
+    several model workers. Silence is never decoded, and the output has the same
+    word-timestamped structure as `AssemblyAITranscriber.transcribe_json`.
+
+    The model is loaded on the first transcription and shared between instances.
+    """
+
+    name = 'whisper'
+
+    _models = {}
+    _models_lock = threading.Lock()
+
+    def __init__(self, model=DEFAULT_WHISPER_MODEL, compute_type='int8', language='en', workers=None,
+                 threads=0, chunk_s=WHISPER_CHUNK_S, beam_size=1, device='cpu'):
+        """
+        Args:
+            model (str): Model size ('tiny', 'base', 'small', 'medium', 'large-v3', ...)
+                or a path to a converted model.
+            compute_type (str): Quantization; 'int8' is the fastest on CPU.
+            language (str): Spoken language, or None to detect it.
+            workers (int): Chunks decoded at the same time; defaults to a quarter of the cores.
+            threads (int): CPU threads per worker; 0 splits the cores between the workers.
+            chunk_s (float): Longest chunk of speech sent to the model at once, in seconds.
+            beam_size (int): Beam width; 1 is greedy decoding (fastest).
+            device (str): 'cpu', or 'cuda'.
+        """
+        cores = os.cpu_count() or 1
+        self.model = model
+        self.compute_type = compute_type
+        self.language = language
+        self.workers = max(1, workers or cores // 4)
+        self.threads = threads or max(1, cores // self.workers)
+        self.chunk_s = chunk_s
+        self.beam_size = beam_size
+        self.device = device
+
+    def config(self):
+        """
+        Describe the settings that affect the transcript, for cache keys.
+        """
+        return {'provider': self.name, 'model': self.model, 'compute_type': self.compute_type,
+                'language': self.language, 'beam_size': self.beam_size, 'chunk_s': self.chunk_s}
+
+    def _load(self):
+        key = (self.model, self.compute_type, self.device, self.workers, self.threads)
+        with self._models_lock:
+            if key not in self._models:
+                from faster_whisper import WhisperModel
+                self._models[key] = WhisperModel(self.model, device=self.device, compute_type=self.compute_type,
+                                                 cpu_threads=self.threads, num_workers=self.workers)
+            return self._models[key]
+
+    def _speech_chunks(self, audio):
+        # Group the speech regions found by VAD into chunks of at most `chunk_s`,
+        # cutting only in the pauses between regions. Returns (start, end) sample ranges.
+        from faster_whisper.vad import VadOptions, get_speech_timestamps
+        limit = int(self.chunk_s * WHISPER_SAMPLE_RATE)
+        chunks = []
+        for region in get_speech_timestamps(audio, VadOptions(min_silence_duration_ms=500, speech_pad_ms=200)):
+            start, end = region['start'], region['end']
+            if chunks and end - chunks[-1][0] <= limit:
+                chunks[-1][1] = end
+            else:
+                # A region longer than the limit is split evenly.
+                pieces = -(-(end - start) // limit)
+                step = -(-(end - start) // pieces)
+                chunks.extend([s, min(s + step, end)] for s in range(start, end, step))
+        return chunks
+
+    def transcribe_json(self, audio_path, on_status=None, cancel_event=None):
+        """
+        Transcribe a file and return the transcript with word-level timestamps.
+
+        Args:
+            audio_path (str): Path to the audio (or video) file.
+            on_status (callable): Called with 'loading model', 'detecting speech', then
+                'transcribing n/total' as chunks finish.
+            cancel_event (threading.Event): When set, stop after the chunks in progress
+                and raise `Cancelled`.
+
+        Returns:
+            dict: 'id' (None), 'text', 'words' (dicts with 'text', 'start', 'end' in ms
+                and 'confidence') and 'srt' (one cue per decoded segment).
+
+        Raises:
+            Cancelled: If `cancel_event` was set.
+        """
+        from faster_whisper import decode_audio
+        report = on_status or (lambda status: None)
+        report('loading model')
+        model = self._load()
+        report('detecting speech')
+        with tracing.span('transcribe.vad') as span:
+            audio = decode_audio(audio_path, sampling_rate=WHISPER_SAMPLE_RATE)
+            chunks = self._speech_chunks(audio)
+            span.set(chunks=len(chunks))
+        finished = 0
+        lock = threading.Lock()
+
+        def run(chunk):
+            nonlocal finished
+            if cancel_event is not None and cancel_event.is_set():
+                raise Cancelled("Transcription was cancelled")
+            offset = chunk[0] * 1000 // WHISPER_SAMPLE_RATE
+            with tracing.span('transcribe.decode', start_ms=offset,
+                              seconds=(chunk[1] - chunk[0]) / WHISPER_SAMPLE_RATE):
+                segments, _ = model.transcribe(audio[chunk[0]:chunk[1]], language=self.language,
+                                               beam_size=self.beam_size, word_timestamps=True,
+                                               condition_on_previous_text=False)
+                result = []
+                for segment in segments:    # A generator: decoding happens here
+                    words = [{'text': w.word.strip(), 'start': offset + int(w.start * 1000),
+                              'end': offset + int(w.end * 1000), 'confidence': w.probability}
+                             for w in segment.words or []]
+                    result.append((offset + int(segment.start * 1000), offset + int(segment.end * 1000),
+                                   segment.text.strip(), words))
+            with lock:
+                finished += 1
+                report(f"transcribing {finished}/{len(chunks)}")
+            return result
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            decoded = [segment for segments in pool.map(run, chunks) for segment in segments]
+        cues = [Cue(n, start, end, [text]) for n, (start, end, text, _) in enumerate(decoded, 1) if text]
+        words = [word for *_, segment_words in decoded for word in segment_words if word['text']]
+        return {'id': None, 'text': ' '.join(c.text for c in cues), 'words': words,
+                'srt': ''.join(f"{c.index}\n{c.timing()}\n{c.text}\n\n" for c in cues)}
+
+    def transcribe_srt(self, audio_path, on_status=None, cancel_event=None):
+        """
+        Transcribe a file and return it as SRT text. See `transcribe_json`.
+        """
+        return self.transcribe_json(audio_path, on_status, cancel_event)['srt']
+
+
+def make_transcriber(name=DEFAULT_TRANSCRIBER, **options):
+    """
+    Create a transcription client by name.
+
+    Args:
+        name (str): 'assemblyai' or 'whisper'.
+        **options: Passed to the client's constructor (e.g. `model`, `workers` for 'whisper').
+
+    Returns:
+        object: The client.
+
+    Raises:
+        ValueError: If the name is unknown.
+    """
+    if name == 'assemblyai':
+        return AssemblyAITranscriber(**options)
+    if name == 'whisper':
+        return WhisperTranscriber(**options)
+    raise ValueError(f"Unknown transcriber: {name}")
+
+
+class FakeTranscriber:
+    """
+    Offline stand-in for a transcription service.
+
+    It holds a reference transcript for the whole recording and answers each chunk
+    with the cues that fall inside it, shifted to the chunk's own timeline. The
+    chunk's time range is read from the file name written by `transcribe_chunked`.
+    """
+
+    name = 'fake'
+
+    def __init__(self, cues, latency=0.0, error_rate=0.0):
+        """
+        Args:
+            cues (list): Reference cues covering the whole recording.
+            latency (float): Seconds to wait before answering each request.
+            error_rate (float): Share of requests that fail as a service error (HTTP 503),
+                to exercise retries.
+        """
+        self.cues = cues
+        self.latency = latency
+        self.error_rate = error_rate
+        self.calls = []
+
+    def config(self):
+        return {'provider': self.name}
+
+    def _chunk_cues(self, audio_path):
+        self.calls.append(audio_path)
+        time.sleep(self.latency)
+        if self.error_rate and random.random() < self.error_rate:
+            raise TranslationHTTPError(503, "injected error")
+        m = _CHUNK_NAME_RE.search(os.path.basename(audio_path))
+        start, end = (int(m.group(2)), int(m.group(3))) if m else (0, float('inf'))
+        n = 0
+        for cue in self.cues:
+            if cue.end > start and cue.start < end:
+                n += 1
+                yield Cue(n, max(cue.start, start) - start, min(cue.end, end) - start, cue.lines)
+
+    def transcribe_srt(self, audio_path, on_status=None, cancel_event=None):
+        out = io.StringIO()
+        for cue in self._chunk_cues(audio_path):
+            out.write(f"{cue.index}\n{cue.timing()}\n" + '\n'.join(cue.lines) + '\n\n')
+        return out.getvalue()
+
+    def transcribe_json(self, audio_path, on_status=None, cancel_event=None):
+        # Each cue's words are spread evenly over its duration.
+        cues = list(self._chunk_cues(audio_path))
+        words = []
+        for cue in cues:
+            tokens = cue.text.split()
+            step = (cue.end - cue.start) / max(1, len(tokens))
+            for i, token in enumerate(tokens):
+                words.append({'text': token, 'start': cue.start + int(i * step),
+                              'end': cue.start + int((i + 1) * step), 'confidence': 1.0})
+        return {'id': None, 'text': ' '.join(w['text'] for w in words), 'words': words,
+                'srt': ''.join(f"{c.index}\n{c.timing()}\n" + '\n'.join(c.lines) + '\n\n' for c in cues)}
+
+
+class FfmpegAudio:
+    """
+    Probe, scan for silence and cut audio files with the `ffmpeg` command-line tools.
+    """
+
+    def __init__(self, noise_db=-35, min_silence=0.5):
+        """
+        Args:
+            noise_db (int): Level in dB below which audio counts as silence.
+            min_silence (float): Shortest silence, in seconds, worth cutting at.
+        """
+        self.noise_db = noise_db
+        self.min_silence = min_silence
+
+    def duration(self, path):
+        """
+        Return the duration of a media file in milliseconds.
+        """
+        duration = probe_audio(path)['duration']
+        if duration is None:
+            raise ValueError(f"Could not read the duration of {path}")
+        return duration
+
+    def silences(self, path):
+        """
+        Return the silent spans of a file as (start, end) tuples in milliseconds.
+        """
+        err = subprocess.run(
+            [find_ffmpeg(), '-hide_banner', '-nostats', '-i', path, '-vn',
+             '-af', f'silencedetect=noise={self.noise_db}dB:d={self.min_silence}', '-f', 'null', '-'],
+            capture_output=True, text=True, check=True,
+        ).stderr
+        spans = []
+        start = None
+        for kind, value in _SILENCE_RE.findall(err):
+            ms = max(0, int(float(value) * 1000))
+            if kind == 'start':
+                start = ms
+            elif start is not None:
+                spans.append((start, ms))
+                start = None
+        return spans
+
+    def extract(self, path, start_ms, end_ms, out_path):
+        """
+        Cut [start_ms, end_ms) out of a file as mono 16 kHz FLAC.
+        """
+        subprocess.run(
+            [find_ffmpeg(), '-y', '-v', 'error', '-ss', f'{start_ms / 1000:.3f}',
+             '-t', f'{(end_ms - start_ms) / 1000:.3f}',
+             '-i', path, '-vn', '-ac', '1', '-ar', '16000', '-c:a', 'flac', out_path],
+            check=True,
+        )
+
+
+class FakeAudio:
+    """
+    Offline stand-in for `FfmpegAudio` with a fixed duration and silence list.
+
+    `extract` writes an empty placeholder file instead of real audio.
+    """
+
+    def __init__(self, duration_ms, silences=()):
+        self.duration_ms = duration_ms
+        self.silence_spans = list(silences)
+
+    def duration(self, path):
+        return self.duration_ms
+
+    def silences(self, path):
+        return self.silence_spans
+
+    def extract(self, path, start_ms, end_ms, out_path):
+        open(out_path, 'wb').close()
+
+
+def plan_chunks(duration_ms, silences, chunk_ms=DEFAULT_CHUNK_MS, overlap_ms=DEFAULT_OVERLAP_MS,
+                search_ms=SILENCE_SEARCH_MS):
+    """
+    Choose where to cut a recording into chunks.
+
+    Each nominal cut (every `chunk_ms`) is moved to the middle of the nearest silence
+    within `search_ms`, if there is one. Every chunk then gets `overlap_ms` of extra
+    audio on both sides so no word is lost at a seam.
+
+    Args:
+        duration_ms (int): Length of the recording.
+        silences (list): Silent spans as (start, end) tuples in milliseconds.
+        chunk_ms (int): Target chunk length.
+        overlap_ms (int): Extra audio added on each side of a cut.
+        search_ms (int): How far from the nominal cut to look for a silence.
+
+    Returns:
+        list: (audio_start, audio_end, keep_start, keep_end) tuples. Cues starting in
+            [keep_start, keep_end) belong to the chunk when stitching.
+    """
+    mids = sorted((s + e) // 2 for s, e in silences)
+    cuts = [0]
+    while duration_ms - cuts[-1] > chunk_ms * 1.5:
+        nominal = cuts[-1] + chunk_ms
+        near = [m for m in mids if abs(m - nominal) <= search_ms and m > cuts[-1]]
+        cuts.append(min(near, key=lambda m: abs(m - nominal)) if near else nominal)
+    cuts.append(duration_ms)
+    chunks = []
+    for keep_start, keep_end in zip(cuts, cuts[1:]):
+        chunks.append((max(0, keep_start - overlap_ms), min(duration_ms, keep_end + overlap_ms),
+                       keep_start, keep_end))
+    return chunks
+
+
+def _words(text):
+    return set(_WORD_RE.findall(text.lower()))
+
+
+class Stitcher:
+    """
+    Merge per-chunk transcripts into one timeline, one chunk at a time.
+
+    Timestamps are shifted by each chunk's offset, and each cue is kept only in the
+    chunk that owns its start time. A cue at the start of a chunk that overlaps the
+    previous cue in time and repeats most of its words is dropped as a duplicate.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self._last = None
+
+    def add(self, chunk, srt_text):
+        """
+        Stitch the next chunk's transcript onto the timeline.
+
+        Args:
+            chunk (tuple): The chunk, as returned by `plan_chunks`.
+            srt_text (str): The chunk's SRT transcript.
+
+        Returns:
+            list: The new cues, numbered on from the previous chunk.
+        """
+        audio_start, _, keep_start, keep_end = chunk
+        cues = []
+        for cue in read_srt(io.StringIO(srt_text)):
+            start, end = cue.start + audio_start, cue.end + audio_start
+            if not keep_start <= start < keep_end:
+                continue
+            last = self._last
+            if last is not None and start < last.end:
+                prev_words, words = _words(last.text), _words(cue.text)
+                if words and len(words & prev_words) / len(words) > 0.5:
+                    continue
+            self.count += 1
+            self._last = Cue(self.count, start, end, cue.lines)
+            cues.append(self._last)
+        return cues
+
+
+def stitch_chunks(results):
+    """
+    Merge per-chunk transcripts into one timeline. See `Stitcher`.
+
+    Args:
+        results (list): (chunk, srt_text) tuples in chunk order, where `chunk` is a
+            tuple from `plan_chunks`.
+
+    Returns:
+        list: The stitched cues, numbered from 1.
+    """
+    stitcher = Stitcher()
+    cues = []
+    for chunk, srt_text in results:
+        cues.extend(stitcher.add(chunk, srt_text))
+    return cues
+
+
+def transcribe_chunked(audio_path, srt_path, client=None, audio=None, chunk_ms=DEFAULT_CHUNK_MS,
+                       overlap_ms=DEFAULT_OVERLAP_MS, workers=DEFAULT_CHUNK_WORKERS, retries=2, on_status=None,
+                       cancel_event=None):
+    """
+    Transcribe a long recording as overlapping chunks sent concurrently.
+
+    A chunk that fails with a retryable error (see `translators.is_retryable`) is
+    retried on its own with backoff, so one error does not lose the whole file.
+
+    Args:
+        audio_path (str): Path to the input audio file.
+        srt_path (str): Path to save the stitched SRT file.
+        client (object): Transcription client; defaults to `make_transcriber()`.
+        audio (object): Audio tool for probing and cutting; defaults to `FfmpegAudio`.
+        chunk_ms (int): Target chunk length in milliseconds.
+        overlap_ms (int): Overlap added on each side of a cut, in milliseconds.
+        workers (int): Number of chunks transcribed at the same time.
+        retries (int): Extra attempts per chunk before giving up.
+        on_status (callable): Called with 'chunks done/total' as chunks finish.
+        cancel_event (threading.Event): When set, no further chunk is started, the chunks
+            in progress stop waiting, and `Cancelled` is raised.
+
+    Returns:
+        str: The path of the written SRT file.
+
+    Raises:
+        Cancelled: If `cancel_event` was set.
+    """
+    client = client or make_transcriber()
+    audio = audio or FfmpegAudio()
+    chunks = plan_chunks(audio.duration(audio_path), audio.silences(audio_path), chunk_ms, overlap_ms)
+    tmp_dir = tempfile.mkdtemp(prefix='subtitle_chunks_')
+    done = 0
+    lock = threading.Lock()
+    if on_status:
+        on_status(f"chunks 0/{len(chunks)}")
+
+    def transcribe(n, out_path):
+        with tracing.span('transcribe.chunk', chunk=n):
+            return client.transcribe_srt(out_path, cancel_event=cancel_event)
+
+    def run(numbered):
+        nonlocal done
+        n, chunk = numbered
+        if cancel_event is not None and cancel_event.is_set():
+            raise Cancelled("Transcription was cancelled")
+        out_path = os.path.join(tmp_dir, f'chunk_{n}_{chunk[0]}_{chunk[1]}.flac')
+        with tracing.span('extract.chunk', chunk=n):
+            audio.extract(audio_path, chunk[0], chunk[1], out_path)
+        result = chunk, call_with_retry(transcribe, n, out_path, retries=retries)
+        with lock:
+            done += 1
+            if on_status:
+                on_status(f"chunks {done}/{len(chunks)}")
+        return result
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            results = list(pool.map(run, enumerate(chunks)))
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    with tracing.span('srt.write', chunks=len(results)):
+        write_srt(srt_path, stitch_chunks(results))
+    return srt_path
+
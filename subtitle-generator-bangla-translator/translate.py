@@ -0,0 +1,54 @@
+# Translate an English SRT into one or more languages from the command line.
+# The file is parsed once and every language is translated at the same time.
+#
+#   python translate.py talk.srt                      # talk_bangla.srt
+#   python translate.py talk.srt --targets bn hi ur   # talk_bangla.srt, talk_hindi.srt, talk_urdu.srt
+#   python translate.py talk.srt --backend local      # offline, with the model in SUBTITLE_LOCAL_MODEL
+#   python translate.py talk.srt --incremental        # after editing talk.srt: only changed sentences
+
+import argparse
+import sys
+
+import tracing
+from subtitle_core import translate_srt_multi
+from translators import Cancelled, make_backend, DEFAULT_RATE, DEFAULT_WORKERS
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Translate an SRT file into one or more languages.")
+    parser.add_argument('srt', help="English SRT file")
+    parser.add_argument('--targets', nargs='+', default=['bn'], help="Target language codes (default: bn)")
+    parser.add_argument('--backend', default='google', choices=['google', 'libre', 'local', 'fake'])
+    parser.add_argument('--url', help="Service URL for the 'libre' backend")
+    parser.add_argument('--model', help="CTranslate2 model directory for the 'local' backend")
+    parser.add_argument('--threads', type=int, default=0, help="CPU threads for the 'local' backend (0: all)")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help="Requests in flight per language")
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE,
+                        help="Requests per second across all languages, 0 for no limit")
+    parser.add_argument('--no-cache', action='store_true', help="Do not use the translation memory")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Only translate sentences changed since the last run (keeps a .manifest file)")
+    parser.add_argument('--trace', help="Write a timing trace to this file (.json for Chrome, .jsonl)")
+    args = parser.parse_args(argv)
+    if args.trace:
+        tracing.enable(args.trace)
+
+    def report(done, total):
+        print(f"translate: {done}/{total}", file=sys.stderr)
+
+    try:
+        translators = {t: make_backend(args.backend, 'auto', t, url=args.url, model=args.model,
+                                       threads=args.threads)
+                       for t in args.targets}
+        paths = translate_srt_multi(args.srt, args.targets, translators=translators, workers=args.workers,
+                                    rate=args.rate or None, use_cache=not args.no_cache, on_progress=report,
+                                    incremental=args.incremental)
+    except (KeyboardInterrupt, Cancelled):
+        return 130
+    for target in args.targets:
+        print(f"Generated: {paths[target]}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
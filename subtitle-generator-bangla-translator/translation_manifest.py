@@ -0,0 +1,159 @@
+import hashlib
+import json
+import os
+import threading
+
+from translation_memory import normalize
+
+# Translation Manifest
+#
+# A sidecar file next to a translated SRT that records, for every sentence group, a
+# hash of its English text and its translation. When the English SRT is edited and
+# translated again, groups whose text is unchanged take their translation from the
+# manifest and are only re-cut to their (possibly new) timings; only edited groups
+# are sent to the translator. Translations are appended as each batch finishes, so
+# a run that crashed or was cancelled resumes where it stopped.
+#
+# The file is JSON lines: a header naming the translator and language pair, then one
+# {"hash": ..., "text": ...} object per group. A manifest written for a different
+# translator or language pair is ignored.
+
+MANIFEST_SUFFIX = '.manifest'
+
+
+def manifest_path(output_path):
+    """
+    Name the manifest of a translated SRT, e.g. `talk_bangla.srt` -> `talk_bangla.srt.manifest`.
+    """
+    return output_path + MANIFEST_SUFFIX
+
+
+def group_hash(text):
+    """
+    Hash the source text of a sentence group (whitespace differences do not count).
+
+    Returns:
+        str: Hex digest.
+    """
+    return hashlib.blake2b(normalize(text).encode('utf-8'), digest_size=16).hexdigest()
+
+
+class TranslationManifest:
+    """
+    The record of earlier translations for one output file.
+
+    Lookups are served from memory; new translations are appended to the file at
+    once. Call `finish()` after a complete run to drop groups that no longer exist,
+    or `close()` to keep everything for a later resume.
+    """
+
+    def __init__(self, path, provider, source, target):
+        """
+        Args:
+            path (str): Manifest file; read if it exists and was written for the same translator.
+            provider (str): Name of the translation backend.
+            source (str): Source language code.
+            target (str): Target language code.
+        """
+        self.path = path
+        self.header = {'manifest': 1, 'provider': provider, 'source': source, 'target': target}
+        self.entries = self._load()
+        self.reused = 0
+        self.added = 0
+        self._used = set()
+        self._lock = threading.Lock()
+        self._file = None
+
+    def _load(self):
+        # Read in binary to know where the last complete entry ends (`_good_end`).
+        entries = {}
+        self._good_end = 0
+        try:
+            with open(self.path, 'rb') as f:
+                if json.loads(f.readline() or 'null') != self.header:
+                    return {}
+                self._good_end = f.tell()
+                for line in f:
+                    try:
+                        if not line.endswith(b'\n'):
+                            raise ValueError("incomplete line")
+                        entry = json.loads(line)
+                    except ValueError:
+                        break   # Cut short by a crash; everything before it is good
+                    entries[entry['hash']] = entry['text']
+                    self._good_end += len(line)
+        except (OSError, ValueError):
+            self._good_end = 0
+            return {}
+        return entries
+
+    def _open(self):
+        # Append to a valid manifest, after dropping any torn line a crash left at the
+        # end (new entries would otherwise be glued to it and lost); start a new one
+        # otherwise. `entries` cannot tell: `add` fills it before the first `_open`.
+        if self._good_end:
+            with open(self.path, 'r+b') as f:
+                f.truncate(self._good_end)
+            self._file = open(self.path, 'a', encoding='utf-8')
+        else:
+            self._file = open(self.path, 'w', encoding='utf-8')
+            self._file.write(json.dumps(self.header) + '\n')
+
+    def get(self, text):
+        """
+        Look up the earlier translation of a group's source text.
+
+        Returns:
+            str: The translation, or None if the group is new or was edited.
+        """
+        key = group_hash(text)
+        with self._lock:
+            self._used.add(key)
+            trans = self.entries.get(key)
+            if trans is not None:
+                self.reused += 1
+            return trans
+
+    def add(self, pairs):
+        """
+        Record new translations and append them to the file.
+
+        Args:
+            pairs (list): (source text, translation) tuples.
+        """
+        if not pairs:
+            return
+        lines = []
+        with self._lock:
+            for text, trans in pairs:
+                key = group_hash(text)
+                self._used.add(key)
+                self.entries[key] = trans
+                lines.append(json.dumps({'hash': key, 'text': trans}, ensure_ascii=False) + '\n')
+            self.added += len(pairs)
+            if self._file is None:
+                self._open()
+            self._file.write(''.join(lines))
+            self._file.flush()
+
+    def finish(self):
+        """
+        Rewrite the manifest with only the groups seen in this run, then close it.
+        """
+        self.close()
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(self.header) + '\n')
+            for key, trans in self.entries.items():
+                if key in self._used:
+                    f.write(json.dumps({'hash': key, 'text': trans}, ensure_ascii=False) + '\n')
+        os.replace(tmp, self.path)
+
+    def close(self):
+        """
+        Close the file, keeping every entry (for resuming an unfinished run).
+        """
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
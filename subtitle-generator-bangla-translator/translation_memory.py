@@ -0,0 +1,211 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+
+# Translation Memory
+#
+# An on-disk cache of earlier translations, so lines that show up again (intros,
+# outros, catchphrases, re-runs after a timing fix) are never sent twice.
+
+DEFAULT_TM_PATH = os.getenv(
+    'SUBTITLE_TM_PATH',
+    os.path.join(os.path.expanduser('~'), '.cache', 'subtitle-generator', 'translation_memory.sqlite'),
+)
+DEFAULT_MAX_ENTRIES = 200_000
+EVICT_FRACTION = 0.01   # Share of `max_entries` evicted at once, so the table is not counted on every write
+
+_SPACE_RE = re.compile(r'\s+')
+
+
+def normalize(text):
+    """
+    Normalize source text for lookups by collapsing whitespace.
+
+    Args:
+        text (str): The source text.
+
+    Returns:
+        str: The normalized text.
+    """
+    return _SPACE_RE.sub(' ', text).strip()
+
+
+class TranslationMemory:
+    """
+    SQLite-backed translation cache with LRU eviction and hit/miss counters.
+
+    Entries are keyed on the normalized source text plus (source, target, provider).
+    The object can be shared between threads.
+
+    The number of entries is counted once when the memory is opened and then only
+    estimated. When the estimate goes over `max_entries`, the entries are counted
+    again, and if they really are too many, the least recently used are evicted down
+    to `EVICT_FRACTION` below the limit.
+    """
+
+    def __init__(self, path=DEFAULT_TM_PATH, max_entries=DEFAULT_MAX_ENTRIES):
+        """
+        Args:
+            path (str): Database file, created if missing. Use ':memory:' for a throwaway cache.
+            max_entries (int): Entries kept before the least recently used are evicted.
+        """
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS tm ('
+            ' text TEXT NOT NULL, source TEXT NOT NULL, target TEXT NOT NULL,'
+            ' provider TEXT NOT NULL, translation TEXT NOT NULL, used INTEGER NOT NULL,'
+            ' PRIMARY KEY (text, source, target, provider))'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS tm_used ON tm (used)')
+        self._conn.commit()
+        # Monotonic use counter; higher means more recently used.
+        self._clock = self._conn.execute('SELECT COALESCE(MAX(used), 0) FROM tm').fetchone()[0]
+        # Upper bound on the entries (a replaced entry counts as a new one).
+        self._entries = len(self)
+
+    def get_many(self, texts, source, target, provider):
+        """
+        Look up several texts at once.
+
+        Args:
+            texts (list): Source texts.
+            source (str): Source language code.
+            target (str): Target language code.
+            provider (str): Name of the translation backend.
+
+        Returns:
+            list: The cached translation for each text, or None where there is none.
+        """
+        results = []
+        with self._lock:
+            for text in texts:
+                key = normalize(text)
+                row = self._conn.execute(
+                    'SELECT translation FROM tm WHERE text=? AND source=? AND target=? AND provider=?',
+                    (key, source, target, provider),
+                ).fetchone()
+                if row is None:
+                    self.misses += 1
+                    results.append(None)
+                    continue
+                self.hits += 1
+                self._clock += 1
+                self._conn.execute(
+                    'UPDATE tm SET used=? WHERE text=? AND source=? AND target=? AND provider=?',
+                    (self._clock, key, source, target, provider),
+                )
+                results.append(row[0])
+            self._conn.commit()
+        return results
+
+    def get(self, text, source, target, provider):
+        """
+        Look up a single text. See `get_many`.
+        """
+        return self.get_many([text], source, target, provider)[0]
+
+    def put_many(self, pairs, source, target, provider):
+        """
+        Store translations, evicting the least recently used entries if over capacity.
+
+        Args:
+            pairs (list): (source text, translation) tuples.
+            source (str): Source language code.
+            target (str): Target language code.
+            provider (str): Name of the translation backend.
+        """
+        with self._lock:
+            rows = []
+            for text, translation in pairs:
+                self._clock += 1
+                rows.append((normalize(text), source, target, provider, translation, self._clock))
+            self._conn.executemany('INSERT OR REPLACE INTO tm VALUES (?, ?, ?, ?, ?, ?)', rows)
+            self._entries += len(rows)
+            if self._entries > self.max_entries:
+                self._evict()
+            self._conn.commit()
+
+    def put(self, text, translation, source, target, provider):
+        """
+        Store a single translation. See `put_many`.
+        """
+        self.put_many([(text, translation)], source, target, provider)
+
+    def _evict(self):
+        self._entries = len(self)
+        if self._entries > self.max_entries:
+            excess = self._entries - self.max_entries + int(self.max_entries * EVICT_FRACTION)
+            self._conn.execute(
+                'DELETE FROM tm WHERE rowid IN (SELECT rowid FROM tm ORDER BY used LIMIT ?)', (excess,)
+            )
+            self._entries -= excess
+
+    def __len__(self):
+        return self._conn.execute('SELECT COUNT(*) FROM tm').fetchone()[0]
+
+    def stats(self):
+        """
+        Return hit/miss counters and the number of stored entries.
+
+        Returns:
+            dict: Keys 'hits', 'misses' and 'entries'.
+        """
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self)}
+
+    def export_jsonl(self, path):
+        """
+        Write every entry to a JSON Lines file.
+
+        Args:
+            path (str): Output file path.
+
+        Returns:
+            int: Number of entries written.
+        """
+        count = 0
+        with self._lock, open(path, 'w', encoding='utf-8') as f:
+            for text, source, target, provider, translation in self._conn.execute(
+                'SELECT text, source, target, provider, translation FROM tm ORDER BY used'
+            ):
+                f.write(json.dumps({'text': text, 'source': source, 'target': target,
+                                    'provider': provider, 'translation': translation},
+                                   ensure_ascii=False) + '\n')
+                count += 1
+        return count
+
+    def import_jsonl(self, path):
+        """
+        Load entries from a JSON Lines file written by `export_jsonl`.
+
+        Args:
+            path (str): Input file path.
+
+        Returns:
+            int: Number of entries imported.
+        """
+        by_pair = {}
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                e = json.loads(line)
+                key = (e['source'], e['target'], e['provider'])
+                by_pair.setdefault(key, []).append((e['text'], e['translation']))
+        for (source, target, provider), pairs in by_pair.items():
+            self.put_many(pairs, source, target, provider)
+        return sum(len(pairs) for pairs in by_pair.values())
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
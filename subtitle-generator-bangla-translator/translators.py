@@ -0,0 +1,522 @@
+import json
+import os
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import tracing
+
+# Translation Backends
+#
+# A backend is any object with a `name` attribute and a `translate(text)` method
+# returning the translated string. `BatchTranslator` sits on top of a backend and
+# packs many short texts into one request. A backend that can take a list directly
+# offers `translate_texts(texts)` as well, and sets `remote = False` if its requests
+# should not count against the rate limit.
+
+# Line used to separate items inside one batched request. Google Translate leaves
+# runs of punctuation on their own line untouched, so it comes back intact.
+SENTINEL = '|||'
+SENTINEL_RE = re.compile(r'\s*\|\s*\|\s*\|\s*')
+
+# deep_translator rejects anything over 5000 characters per request.
+MAX_BATCH_CHARS = 4500
+
+# Defaults for concurrent translation: worker threads and requests per second.
+DEFAULT_WORKERS = 4
+DEFAULT_RATE = 5.0
+
+# Local model: a CTranslate2 conversion of a MarianMT or NLLB model, e.g.
+#   ct2-transformers-converter --model facebook/nllb-200-distilled-600M --quantization int8 \
+#       --output_dir ~/.cache/subtitle-generator/models/nllb-200-distilled-600M-ct2
+DEFAULT_LOCAL_MODEL = os.getenv(
+    'SUBTITLE_LOCAL_MODEL',
+    os.path.join(os.path.expanduser('~'), '.cache', 'subtitle-generator', 'models', 'nllb-200-distilled-600M-ct2'),
+)
+LOCAL_BATCH_TOKENS = 2048   # Most tokens run through the model in one forward pass
+
+# Language code -> NLLB language code.
+NLLB_LANGUAGES = {
+    'en': 'eng_Latn', 'bn': 'ben_Beng', 'hi': 'hin_Deva', 'ur': 'urd_Arab', 'ta': 'tam_Taml',
+    'ne': 'npi_Deva', 'te': 'tel_Telu', 'mr': 'mar_Deva', 'gu': 'guj_Gujr', 'pa': 'pan_Guru',
+}
+
+
+class Cancelled(Exception):
+    """
+    Raised when a long-running job is stopped through its cancel event.
+    """
+
+
+class TranslationHTTPError(Exception):
+    """
+    Raised by HTTP backends when the service answers with an error status.
+    """
+
+    def __init__(self, status, message=''):
+        super().__init__(f"HTTP {status}: {message}" if message else f"HTTP {status}")
+        self.status = status
+
+
+def is_retryable(exc):
+    """
+    Check if a backend error is worth retrying (rate limiting or a server error).
+
+    Args:
+        exc (Exception): The error raised by the backend.
+
+    Returns:
+        bool: True for HTTP 429 and 5xx responses, False otherwise.
+    """
+    status = getattr(exc, 'status', None)
+    if status is None:
+        status = getattr(getattr(exc, 'response', None), 'status_code', None)
+    if status is not None:
+        return status == 429 or 500 <= status < 600
+    # deep_translator reports rate limiting with its own exception type.
+    return type(exc).__name__ == 'TooManyRequests'
+
+
+def call_with_retry(fn, *args, retries=5, base_delay=0.5, max_delay=30.0):
+    """
+    Call `fn`, retrying with exponential backoff and jitter on retryable errors.
+
+    Args:
+        fn (callable): The function to call.
+        *args: Arguments passed to `fn`.
+        retries (int): How many times to retry before giving up.
+        base_delay (float): Delay in seconds before the first retry.
+        max_delay (float): Upper bound on the delay between retries.
+
+    Returns:
+        object: Whatever `fn` returns.
+    """
+    attempt = 0
+    while True:
+        try:
+            return fn(*args)
+        except Exception as e:
+            if attempt >= retries or not is_retryable(e):
+                raise
+            delay = min(max_delay, base_delay * 2 ** attempt)
+            tracing.count('retries')
+            with tracing.span('retry.backoff', attempt=attempt + 1, error=type(e).__name__):
+                time.sleep(delay * random.uniform(0.5, 1.0))
+            attempt += 1
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket limiting how many requests start per second.
+    """
+
+    def __init__(self, rate, burst=None):
+        """
+        Args:
+            rate (float): Tokens added per second.
+            burst (int): Bucket capacity; defaults to one second's worth of tokens.
+        """
+        self.rate = float(rate)
+        self.capacity = float(burst if burst is not None else max(1, rate))
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Block until a token is available, then take it.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            with tracing.span('translate.rate_limit'):
+                time.sleep(wait)
+
+
+class GoogleBackend:
+    """
+    Translate text with Google Translate through `deep_translator`.
+
+    `GoogleTranslator` keeps the text and languages of the request on the instance
+    while it is sent, so one instance must not be shared between threads: each thread
+    that calls `translate` gets its own, built on its first call.
+    """
+
+    name = 'google'
+
+    def __init__(self, source='auto', target='bn'):
+        """
+        Args:
+            source (str): Source language code, or 'auto' to detect it.
+            target (str): Target language code.
+        """
+        from deep_translator import GoogleTranslator
+        self.source = source
+        self.target = target
+        self._translator_class = GoogleTranslator
+        self._local = threading.local()
+
+    def translate(self, text):
+        translator = getattr(self._local, 'translator', None)
+        if translator is None:
+            translator = self._local.translator = self._translator_class(source=self.source, target=self.target)
+        return translator.translate(text) or ''
+
+
+class FakeTranslator:
+    """
+    Offline stand-in for a real backend, used to exercise batching without network.
+
+    Every call is recorded in `calls` so callers can check how many requests were made.
+    """
+
+    name = 'fake'
+
+    def __init__(self, source='auto', target='bn', transform=None):
+        """
+        Args:
+            source (str): Source language code (recorded only).
+            target (str): Target language code (recorded only).
+            transform (callable): Function applied to each request; defaults to `str.upper`.
+        """
+        self.source = source
+        self.target = target
+        self.transform = transform or str.upper
+        self.calls = []
+
+    def translate(self, text):
+        self.calls.append(text)
+        return self.transform(text)
+
+
+class LibreTranslateBackend:
+    """
+    Translate text through a LibreTranslate-compatible HTTP endpoint.
+    """
+
+    name = 'libre'
+
+    def __init__(self, url, source='auto', target='bn', api_key=None, timeout=60):
+        """
+        Args:
+            url (str): Base URL of the service (e.g. 'http://localhost:5000').
+            source (str): Source language code, or 'auto' to detect it.
+            target (str): Target language code.
+            api_key (str): Optional API key sent with every request.
+            timeout (float): Request timeout in seconds.
+        """
+        self.url = url.rstrip('/') + '/translate'
+        self.source = source
+        self.target = target
+        self.api_key = api_key
+        self.timeout = timeout
+
+    def translate(self, text):
+        import urllib.error
+        import urllib.request
+        payload = {'q': text, 'source': self.source, 'target': self.target, 'format': 'text'}
+        if self.api_key:
+            payload['api_key'] = self.api_key
+        req = urllib.request.Request(self.url, data=json.dumps(payload).encode('utf-8'),
+                                     headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+                return json.loads(resp.read().decode('utf-8')).get('translatedText', '')
+        except urllib.error.HTTPError as e:
+            raise TranslationHTTPError(e.code, e.reason) from e
+
+
+class LocalBackend:
+    """
+    Translate text on this machine with a CTranslate2 model (MarianMT or NLLB).
+
+    Nothing is loaded until the first translation, so creating the backend costs
+    nothing at startup. Loaded models are shared between backends, so translating
+    into several languages with one NLLB model loads it once.
+
+    `translate_texts` sorts the texts by length and lets CTranslate2 cut them into
+    batches of at most `batch_tokens` tokens, so short and long sentences are not
+    padded to the same length.
+    """
+
+    name = 'local'
+    remote = False
+
+    _models = {}
+    _models_lock = threading.Lock()
+
+    def __init__(self, model_dir=DEFAULT_LOCAL_MODEL, source='en', target='bn', tokenizer=None, threads=0,
+                 batch_tokens=LOCAL_BATCH_TOKENS, beam_size=2, device='cpu'):
+        """
+        Args:
+            model_dir (str): Directory of the converted CTranslate2 model.
+            source (str): Source language code.
+            target (str): Target language code.
+            tokenizer (str): Hugging Face name or path of the tokenizer; defaults to `model_dir`.
+            threads (int): CPU threads used by the model; 0 uses all cores.
+            batch_tokens (int): Largest batch, in tokens.
+            beam_size (int): Beam width; 1 is greedy decoding (fastest).
+            device (str): 'cpu', or 'cuda' if CTranslate2 was built with CUDA.
+        """
+        self.model_dir = model_dir
+        self.source = 'en' if source == 'auto' else source
+        self.target = target
+        self.tokenizer = tokenizer or model_dir
+        self.threads = threads
+        self.batch_tokens = batch_tokens
+        self.beam_size = beam_size
+        self.device = device
+        self.nllb = 'nllb' in self.tokenizer.lower() or 'nllb' in os.path.basename(model_dir).lower()
+        # Part of the translation memory key, so different models never share entries.
+        self.name = f"local:{os.path.basename(os.path.normpath(model_dir))}"
+
+    def _load(self):
+        key = (self.model_dir, self.tokenizer, self.source if self.nllb else None, self.device, self.threads)
+        with self._models_lock:
+            if key not in self._models:
+                import ctranslate2
+                from transformers import AutoTokenizer
+                options = {'src_lang': NLLB_LANGUAGES.get(self.source, self.source)} if self.nllb else {}
+                tokenizer = AutoTokenizer.from_pretrained(self.tokenizer, **options)
+                model = ctranslate2.Translator(self.model_dir, device=self.device, inter_threads=1,
+                                               intra_threads=self.threads)
+                self._models[key] = (model, tokenizer)
+            return self._models[key]
+
+    def translate(self, text):
+        return self.translate_texts([text])[0]
+
+    def translate_texts(self, texts):
+        """
+        Translate a list of texts in as few model passes as possible.
+
+        Args:
+            texts (list): The texts to translate.
+
+        Returns:
+            list: The translated texts, in input order.
+        """
+        if not texts:
+            return []
+        model, tokenizer = self._load()
+        tokens = [tokenizer.convert_ids_to_tokens(tokenizer.encode(text)) for text in texts]
+        order = sorted(range(len(texts)), key=lambda i: len(tokens[i]))
+        prefix = [[NLLB_LANGUAGES.get(self.target, self.target)]] * len(texts) if self.nllb else None
+        results = model.translate_batch([tokens[i] for i in order], target_prefix=prefix,
+                                        max_batch_size=self.batch_tokens, batch_type='tokens',
+                                        beam_size=self.beam_size)
+        translated = [''] * len(texts)
+        for i, result in zip(order, results):
+            hypothesis = result.hypotheses[0]
+            if self.nllb:
+                hypothesis = hypothesis[1:]     # Drop the target language token
+            translated[i] = tokenizer.decode(tokenizer.convert_tokens_to_ids(hypothesis),
+                                             skip_special_tokens=True)
+        return translated
+
+
+def make_backend(name='google', source='auto', target='bn', url=None, model=None, threads=0):
+    """
+    Create a translation backend by name.
+
+    Args:
+        name (str): Backend name ('google', 'libre', 'local' or 'fake').
+        source (str): Source language code.
+        target (str): Target language code.
+        url (str): Service URL, required for the 'libre' backend.
+        model (str): Model directory for the 'local' backend; defaults to `DEFAULT_LOCAL_MODEL`.
+        threads (int): CPU threads for the 'local' backend; 0 uses all cores.
+
+    Returns:
+        object: The backend instance.
+
+    Raises:
+        ValueError: If the backend name is unknown.
+    """
+    if name == 'google':
+        return GoogleBackend(source, target)
+    if name == 'libre':
+        if not url:
+            raise ValueError("The 'libre' backend needs a service URL")
+        return LibreTranslateBackend(url, source, target)
+    if name == 'local':
+        return LocalBackend(model or DEFAULT_LOCAL_MODEL, source, target, threads=threads)
+    if name == 'fake':
+        return FakeTranslator(source, target)
+    raise ValueError(f"Unknown translation backend: {name}")
+
+
+def make_batches(texts, max_chars=MAX_BATCH_CHARS):
+    """
+    Pack texts into batches whose joined length stays under `max_chars`.
+
+    A text longer than `max_chars` on its own gets a batch to itself.
+
+    Args:
+        texts (list): The texts to pack, in order.
+        max_chars (int): Upper bound on the joined length of one batch.
+
+    Returns:
+        list: Lists of indices into `texts`, one list per batch.
+    """
+    sep_len = len(SENTINEL) + 2
+    batches = []
+    current = []
+    size = 0
+    for i, text in enumerate(texts):
+        extra = len(text) + (sep_len if current else 0)
+        if current and size + extra > max_chars:
+            batches.append(current)
+            current, size = [], 0
+            extra = len(text)
+        current.append(i)
+        size += extra
+    if current:
+        batches.append(current)
+    return batches
+
+
+class BatchTranslator:
+    """
+    Translate many texts with as few backend requests as possible.
+
+    Texts are joined with `SENTINEL` lines, sent in one request per batch and split
+    back apart. If a batch comes back with the wrong number of parts, its items are
+    translated one by one instead. Backends with `translate_texts` (local models)
+    get each batch as a list and need no separators.
+
+    Batches are independent, so they are sent from a pool of worker threads. Every
+    request waits on the rate limiter and is retried with backoff on HTTP 429/5xx;
+    results are always returned in input order.
+    """
+
+    def __init__(self, backend, max_chars=MAX_BATCH_CHARS, workers=1, rate_limiter=None, retries=5,
+                 memory=None, cancel_event=None):
+        """
+        Args:
+            backend (object): The translation backend to send requests to.
+            max_chars (int): Upper bound on the size of one batched request.
+            workers (int): Number of batches translated at the same time.
+            rate_limiter (RateLimiter): Shared limiter for all requests, or None for no limit.
+            retries (int): Retries per request on retryable errors.
+            memory (TranslationMemory): Cache consulted before any request, or None.
+            cancel_event (threading.Event): When set, pending requests raise `Cancelled`.
+        """
+        self.backend = backend
+        self.max_chars = max_chars
+        self.workers = max(1, workers)
+        self.rate_limiter = rate_limiter
+        self.retries = retries
+        self.memory = memory
+        self.cancel_event = cancel_event
+
+    def translate_many(self, texts, on_done=None, on_translated=None):
+        """
+        Translate a list of texts, keeping their order.
+
+        Args:
+            texts (list): The texts to translate.
+            on_done (callable): Called with a list of indices each time some texts are finished.
+            on_translated (callable): Called with a list of (index, translation) pairs for
+                the texts found in the memory, then again as each request finishes.
+
+        Returns:
+            list: The translated texts, one per input text.
+        """
+        results = [''] * len(texts)
+        # Empty texts need no request and would leave blank lines between sentinels.
+        pending = [i for i, text in enumerate(texts) if text.strip()]
+        if self.memory is not None and pending:
+            missing = self._apply_memory(texts, pending, results)
+            if on_translated and len(missing) < len(pending):
+                missing_set = set(missing)
+                on_translated([(i, results[i]) for i in pending if i not in missing_set])
+            pending = missing
+        if on_done:
+            pending_set = set(pending)
+            on_done([i for i in range(len(texts)) if i not in pending_set])
+        batches = [[pending[j] for j in batch]
+                   for batch in make_batches([texts[i] for i in pending], self.max_chars)]
+
+        def run(indices):
+            return indices, self.translate_batch([texts[i] for i in indices])
+
+        def collect(done):
+            for indices, translated in done:
+                for i, trans in zip(indices, translated):
+                    results[i] = trans
+                # Stored as each batch arrives, so a run that fails later keeps what it got.
+                if self.memory is not None:
+                    self.memory.put_many([(texts[i], results[i]) for i in indices], *self._memory_key())
+                if on_translated:
+                    on_translated(list(zip(indices, translated)))
+                if on_done:
+                    on_done(indices)
+
+        if self.workers == 1 or len(batches) < 2:
+            collect(map(run, batches))
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(batches))) as pool:
+                collect(pool.map(run, batches))
+        return results
+
+    def _memory_key(self):
+        backend = self.backend
+        return getattr(backend, 'source', 'auto'), getattr(backend, 'target', ''), backend.name
+
+    def _apply_memory(self, texts, pending, results):
+        # Fill results from the cache and return the indices that still need a request.
+        cached = self.memory.get_many([texts[i] for i in pending], *self._memory_key())
+        missing = []
+        for i, trans in zip(pending, cached):
+            if trans is None:
+                missing.append(i)
+            else:
+                results[i] = trans
+        tracing.count('cache.tm.hits', len(pending) - len(missing))
+        tracing.count('cache.tm.misses', len(missing))
+        return missing
+
+    def translate_batch(self, items):
+        """
+        Translate one batch in a single request, falling back to per-item calls.
+
+        Args:
+            items (list): The texts in the batch.
+
+        Returns:
+            list: The translated texts, one per item.
+        """
+        if hasattr(self.backend, 'translate_texts'):
+            return [t.strip() for t in self._call(items, self.backend.translate_texts)]
+        if len(items) == 1:
+            return [self._translate_one(items[0])]
+        joined = f"\n{SENTINEL}\n".join(items)
+        parts = SENTINEL_RE.split(self._call(joined).strip())
+        if len(parts) != len(items):
+            # The delimiter was mangled or dropped; translate each item separately.
+            return [self._translate_one(item) for item in items]
+        return [p.strip() for p in parts]
+
+    def _translate_one(self, text):
+        if not text.strip():
+            return ''
+        return self._call(text).strip()
+
+    def _call(self, text, method=None):
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise Cancelled("Translation was cancelled")
+        if self.rate_limiter is not None and getattr(self.backend, 'remote', True):
+            self.rate_limiter.acquire()
+        tracing.count('translate.requests')
+        with tracing.span('translate.request', backend=self.backend.name,
+                          chars=len(text) if isinstance(text, str) else sum(map(len, text))):
+            return call_with_retry(method or self.backend.translate, text, retries=self.retries) or ''
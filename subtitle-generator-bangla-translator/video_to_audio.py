@@ -1,142 +1,269 @@
-# This script creates a GUI to convert video files to audio files.
-# Users can select a video, choose an audio format, and convert it.
-
-import tkinter as tk  # For creating the GUI
-from tkinter import filedialog, messagebox, ttk  # For file dialog, messages, and dropdown
-import moviepy as mp  # For video-to-audio conversion
-import os  # For file path operations
-
-# Create the main GUI window
-root = tk.Tk()
-root.title("Video to Audio Converter")  # Set window title
-root.configure(bg='#f0f0f0')  # Light gray background for the window
-
-# Variable to store the selected video file path
-video_path = ''
-
-# Supported audio formats for the dropdown
-audio_formats = ['mp3', 'wav', 'm4a']
-
-def select_video():
-    """
-    Open a file dialog to select a video file and update the label.
-    Restricts selection to common video formats.
-    """
-    global video_path
-    # Open file dialog with video file filters
-    path = filedialog.askopenfilename(
-        filetypes=[("Video files", "*.mp4 *.avi *.mkv *.mov *.wmv"), ("All files", "*")]
-    )
-    if path:
-        # Check if the file has a valid video extension
-        valid_extensions = ['.mp4', '.avi', '.mkv', '.mov', '.wmv']
-        if not any(path.lower().endswith(ext) for ext in valid_extensions):
-            messagebox.showwarning("Invalid File", "Please select a valid video file (.mp4, .avi, .mkv, .mov, .wmv).")
-            return
-        video_path = path
-        # Update label with the file name (last part of the path)
-        file_label.config(text=os.path.basename(path))
-
-def convert_to_audio():
-    """
-    Convert the selected video to an audio file in the chosen format.
-    Saves the audio file in the same directory as the video.
-    """
-    if not video_path:
-        messagebox.showwarning("No File", "Please select a video file first.")
-        return
-
-    # Get the selected audio format from the dropdown
-    audio_format = format_var.get()
-    if not audio_format:
-        messagebox.showwarning("No Format", "Please select an audio format.")
-        return
-
-    # Create output audio file path by replacing video extension with audio extension
-    base, _ = os.path.splitext(video_path)
-    output_audio = f"{base}.{audio_format}"
-
-    # Show processing message and disable the convert button
-    convert_btn.config(state='disabled', text="Converting...")
-    status_label.config(text="Converting to audio...")
-    root.update()
-
-    try:
-        # Load the video file
-        video = mp.VideoFileClip(video_path)
-        # Extract audio and save it in the chosen format
-        video.audio.write_audiofile(output_audio)
-        # Close the video file to free resources
-        video.close()
-        # Show success message
-        messagebox.showinfo("Success", f"Audio saved as: {output_audio}")
-        status_label.config(text="Done!")
-    except Exception as e:
-        # Show error message if conversion fails
-        messagebox.showerror("Conversion Error", f"Failed to convert: {str(e)}")
-        status_label.config(text="Error occurred")
-    finally:
-        # Re-enable the convert button
-        convert_btn.config(state='normal', text="Convert")
-
-# GUI Elements
-# Label to display the selected file name
-file_label = tk.Label(
-    root,
-    text="No video selected",
-    bg='#f0f0f0',
-    fg='#333333'
-)
-file_label.pack(pady=10)
-
-# Button to select a video file
-select_btn = tk.Button(
-    root,
-    text="Select Video File",
-    command=select_video,
-    bg='#4CAF50',  # Green background
-    fg='white',  # White text
-    activebackground='#45a049'  # Slightly darker green when clicked
-)
-select_btn.pack(pady=5)
-
-# Dropdown menu for selecting audio format
-format_var = tk.StringVar(value=audio_formats[0])  # Default to first format (mp3)
-format_label = tk.Label(
-    root,
-    text="Select Audio Format:",
-    bg='#f0f0f0',
-    fg='#333333'
-)
-format_label.pack(pady=5)
-format_dropdown = ttk.Combobox(
-    root,
-    textvariable=format_var,
-    values=audio_formats,
-    state='readonly',  # Prevent typing in dropdown
-    width=10
-)
-format_dropdown.pack(pady=5)
-
-# Button to start conversion
-convert_btn = tk.Button(
-    root,
-    text="Convert",
-    command=convert_to_audio,
-    bg='#2196F3',  # Blue background
-    fg='white',  # White text
-    activebackground='#1e88e5'  # Slightly darker blue when clicked
-)
-convert_btn.pack(pady=10)
-
-# Label to show conversion status
-status_label = tk.Label(
-    root,
-    text="",
-    bg='#f0f0f0',
-    fg='#333333'
-)
-status_label.pack(pady=5)
-
-# Start the GUI
+# This script creates a GUI to convert video files to audio files.
+# Users can select a video, choose an audio format, and convert it.
+
+import tkinter as tk  # For creating the GUI
+from tkinter import filedialog, messagebox, ttk  # For file dialog, messages, and dropdown
+from audio_extract import extract_audio  # For video-to-audio conversion (ffmpeg)
+import os  # For file path operations
+import queue  # For passing progress from the worker thread to the GUI
+import threading  # For running conversions in the background
+from translators import Cancelled  # Raised when a conversion is cancelled
+
+# Create the main GUI window
+root = tk.Tk()
+root.title("Video to Audio Converter")  # Set window title
+root.configure(bg='#f0f0f0')  # Light gray background for the window
+
+# Variable to store the selected video file path
+video_path = ''
+
+# Progress/results from the worker thread, and the flag that asks it to stop
+events = queue.Queue()
+cancel_event = threading.Event()
+
+# Supported audio formats for the dropdown
+audio_formats = ['mp3', 'wav', 'm4a', 'flac']
+
+def select_video():
+    """
+    Open a file dialog to select a video file and update the label.
+    Restricts selection to common video formats.
+    """
+    global video_path
+    # Open file dialog with video file filters
+    path = filedialog.askopenfilename(
+        filetypes=[("Video files", "*.mp4 *.avi *.mkv *.mov *.wmv"), ("All files", "*")]
+    )
+    if path:
+        # Check if the file has a valid video extension
+        valid_extensions = ['.mp4', '.avi', '.mkv', '.mov', '.wmv']
+        if not any(path.lower().endswith(ext) for ext in valid_extensions):
+            messagebox.showwarning("Invalid File", "Please select a valid video file (.mp4, .avi, .mkv, .mov, .wmv).")
+            return
+        video_path = path
+        # Update label with the file name (last part of the path)
+        file_label.config(text=os.path.basename(path))
+
+def convert_to_audio():
+    """
+    Convert the selected video to an audio file in the chosen format.
+    Saves the audio file in the same directory as the video.
+    """
+    if not video_path:
+        messagebox.showwarning("No File", "Please select a video file first.")
+        return
+
+    # Get the selected audio format from the dropdown
+    audio_format = format_var.get()
+    if not audio_format:
+        messagebox.showwarning("No Format", "Please select an audio format.")
+        return
+
+    # Create output audio file path by replacing video extension with audio extension
+    base, _ = os.path.splitext(video_path)
+    output_audio = f"{base}.{audio_format}"
+
+    # Show processing message, disable both convert buttons and allow cancelling
+    convert_btn.config(state='disabled', text="Converting...")
+    batch_btn.config(state='disabled')  # A folder run would turn Convert back on when it ends
+    cancel_btn.config(state='normal')
+    status_label.config(text="Converting to audio...")
+    progress_bar.config(value=0)
+    cancel_event.clear()
+    # Read the Tk variables here; the worker thread must not touch widgets
+    video_path_now = video_path
+    for_transcription = transcribe_var.get()
+
+    def work():
+        # Runs on a worker thread; results go back to the GUI through the queue
+        try:
+            # Extract the audio track; it is copied without re-encoding when the format allows
+            method = extract_audio(video_path_now, output_audio, for_transcription=for_transcription,
+                                   on_progress=lambda fraction: events.put(('progress', fraction)),
+                                   cancel_event=cancel_event)
+            events.put(('done', method))
+        except Cancelled:
+            events.put(('cancelled',))
+        except Exception as e:
+            events.put(('error', str(e)))
+
+    threading.Thread(target=work, daemon=True).start()
+
+    def poll():
+        # Apply updates from the worker thread until the conversion ends
+        while not events.empty():
+            event = events.get_nowait()
+            if event[0] == 'progress':
+                progress_bar.config(value=100 * event[1])
+                continue
+            convert_btn.config(state='normal', text="Convert")
+            batch_btn.config(state='normal')
+            cancel_btn.config(state='disabled')
+            if event[0] == 'done':
+                # Show success message
+                how = "copied" if event[1] == 'copy' else "converted"
+                status_label.config(text="Done!")
+                messagebox.showinfo("Success", f"Audio {how} to: {output_audio}")
+            elif event[0] == 'cancelled':
+                progress_bar.config(value=0)
+                status_label.config(text="Cancelled")
+            else:
+                # Show error message if conversion fails
+                status_label.config(text="Error occurred")
+                messagebox.showerror("Conversion Error", f"Failed to convert: {event[1]}")
+            return
+        root.after(100, poll)
+
+    root.after(100, poll)
+
+def cancel_conversion():
+    """
+    Stop the running conversion; the partial audio file is deleted.
+    """
+    cancel_event.set()
+    cancel_btn.config(state='disabled')
+    status_label.config(text="Cancelling...")
+
+def convert_folder():
+    """
+    Convert every video in a chosen folder (and its subfolders) to the selected format.
+    Runs in the background across all CPU cores; videos already converted are skipped.
+    """
+    folder = filedialog.askdirectory()
+    if not folder:
+        return
+    audio_format = format_var.get()
+    for_transcription = transcribe_var.get()
+    summary = {}
+
+    def work():
+        # Imported here: the process pool machinery is only needed for folders.
+        from batch_convert import convert_batch
+        summary.update(convert_batch(folder, audio_format, for_transcription=for_transcription))
+
+    # Disable the buttons while the batch runs and check back until it finishes
+    batch_btn.config(state='disabled', text="Converting folder...")
+    convert_btn.config(state='disabled')
+    status_label.config(text=f"Converting videos in {os.path.basename(folder)}...")
+    worker = threading.Thread(target=work, daemon=True)
+    worker.start()
+
+    def check():
+        if worker.is_alive():
+            root.after(200, check)
+            return
+        batch_btn.config(state='normal', text="Convert Folder...")
+        convert_btn.config(state='normal')
+        if not summary:
+            status_label.config(text="Error occurred")
+            messagebox.showerror("Conversion Error", "The batch conversion failed; see the console.")
+            return
+        status_label.config(text="Done!")
+        messagebox.showinfo(
+            "Batch Finished",
+            f"{summary['converted']} converted, {summary['skipped']} skipped, {summary['failed']} failed "
+            f"in {summary['seconds']:.1f}s"
+        )
+
+    root.after(200, check)
+
+# GUI Elements
+# Label to display the selected file name
+file_label = tk.Label(
+    root,
+    text="No video selected",
+    bg='#f0f0f0',
+    fg='#333333'
+)
+file_label.pack(pady=10)
+
+# Button to select a video file
+select_btn = tk.Button(
+    root,
+    text="Select Video File",
+    command=select_video,
+    bg='#4CAF50',  # Green background
+    fg='white',  # White text
+    activebackground='#45a049'  # Slightly darker green when clicked
+)
+select_btn.pack(pady=5)
+
+# Dropdown menu for selecting audio format
+format_var = tk.StringVar(value=audio_formats[0])  # Default to first format (mp3)
+format_label = tk.Label(
+    root,
+    text="Select Audio Format:",
+    bg='#f0f0f0',
+    fg='#333333'
+)
+format_label.pack(pady=5)
+format_dropdown = ttk.Combobox(
+    root,
+    textvariable=format_var,
+    values=audio_formats,
+    state='readonly',  # Prevent typing in dropdown
+    width=10
+)
+format_dropdown.pack(pady=5)
+
+# Checkbox to produce small mono 16 kHz audio for transcription
+transcribe_var = tk.BooleanVar(value=False)
+transcribe_check = tk.Checkbutton(
+    root,
+    text="Optimize for transcription (mono, 16 kHz)",
+    variable=transcribe_var,
+    bg='#f0f0f0',
+    fg='#333333',
+    activebackground='#f0f0f0'
+)
+transcribe_check.pack(pady=5)
+
+# Button to start conversion
+convert_btn = tk.Button(
+    root,
+    text="Convert",
+    command=convert_to_audio,
+    bg='#2196F3',  # Blue background
+    fg='white',  # White text
+    activebackground='#1e88e5'  # Slightly darker blue when clicked
+)
+convert_btn.pack(pady=10)
+
+# Button to stop a running conversion
+cancel_btn = tk.Button(
+    root,
+    text="Cancel",
+    command=cancel_conversion,
+    state='disabled',
+    bg='#f44336',  # Red background
+    fg='white',  # White text
+    activebackground='#e53935'  # Slightly darker red when clicked
+)
+cancel_btn.pack(pady=5)
+
+# Progress bar for the current conversion
+progress_bar = ttk.Progressbar(root, length=240, mode='determinate', maximum=100)
+progress_bar.pack(pady=5)
+
+# Button to convert a whole folder of videos at once
+batch_btn = tk.Button(
+    root,
+    text="Convert Folder...",
+    command=convert_folder,
+    bg='#607D8B',  # Blue-gray background
+    fg='white',  # White text
+    activebackground='#546E7A'  # Slightly darker when clicked
+)
+batch_btn.pack(pady=5)
+
+# Label to show conversion status
+status_label = tk.Label(
+    root,
+    text="",
+    bg='#f0f0f0',
+    fg='#333333'
+)
+status_label.pack(pady=5)
+
+# Start the GUI
 root.mainloop()
\ No newline at end of file
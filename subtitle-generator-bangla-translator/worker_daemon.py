@@ -0,0 +1,701 @@
+# Long-lived worker that keeps translators, caches and models warm between runs.
+# Every script run otherwise starts from nothing: the SDKs are imported again, the
+# translation backends and transcription clients are rebuilt, the translation memory
+# is reopened and a local model is loaded once more. The daemon holds all of that
+# in one process; `cli.py --daemon`, the GUI and scripts send it jobs (the same file
+# lists and options as `cli.py`) and stream back the same events.
+#
+#   python worker_daemon.py serve --warm bn hi         # start it (Ctrl+C or `stop` ends it)
+#   python cli.py "season1/*.srt" --targets bn --daemon
+#   python worker_daemon.py status
+#   python worker_daemon.py stop
+#
+# It listens on a Unix socket (readable only by its owner) or, where there are none,
+# on 127.0.0.1:8765. SUBTITLE_DAEMON sets another address: a socket path or host:port.
+# The protocol is plain HTTP with JSON bodies. Every request must carry the token kept
+# in an owner-only file (`TOKEN_PATH`) and a local Host, and POSTs must be JSON, so a
+# web page cannot drive a daemon listening on localhost.
+# The client speaks it over a bare socket
+# because http.client (with the email package behind it) would take longer to import
+# than a whole small job takes on a warm daemon.
+
+import argparse
+import json
+import os
+import socket
+import sys
+import threading
+import time
+import uuid
+
+import tracing
+from translators import Cancelled, DEFAULT_RATE, DEFAULT_WORKERS
+
+DAEMON_ADDRESS = os.getenv('SUBTITLE_DAEMON') or (
+    os.path.join(os.path.expanduser('~'), '.cache', 'subtitle-generator', 'worker.sock')
+    if hasattr(socket, 'AF_UNIX') else '127.0.0.1:8765'
+)
+TOKEN_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'subtitle-generator', 'worker.token')
+TOKEN_HEADER = 'X-Worker-Token'
+LOCAL_HOSTS = ('localhost', '127.0.0.1', '[::1]')
+KEEP_JOBS = 200         # Finished jobs whose events can still be fetched
+CONNECT_TIMEOUT = 5.0   # Seconds to wait for the daemon to answer a request
+
+
+def parse_address(address):
+    """
+    Split a daemon address into a (host, port) pair, or return it unchanged if it is
+    a Unix socket path.
+    """
+    host, sep, port = address.rpartition(':')
+    if sep and host and port.isdigit() and '/' not in address and '\\' not in address:
+        return host, int(port)
+    return address
+
+
+def load_token(path=TOKEN_PATH, create=False):
+    """
+    Read the token clients must send to the daemon.
+
+    Args:
+        path (str): The token file.
+        create (bool): Create the file with a new random token if there is none yet.
+            It is made readable by its owner only.
+
+    Returns:
+        str: The token; empty if there is no token file and `create` is False.
+    """
+    try:
+        with open(path, 'r', encoding='ascii') as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        if not create:
+            return ''
+    import secrets
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        return load_token(path)     # Another daemon created it first
+    token = secrets.token_hex(32)
+    with os.fdopen(fd, 'w', encoding='ascii') as f:
+        f.write(token)
+    return token
+
+
+class DaemonError(Exception):
+    """
+    Raised when the daemon rejects a request.
+    """
+
+    def __init__(self, status, message=''):
+        super().__init__(f"HTTP {status}: {message}" if message else f"HTTP {status}")
+        self.status = status
+
+
+class DaemonJob:
+    """
+    One submitted run: its files, the runner processing them and the events so far.
+    """
+
+    def __init__(self, files):
+        self.id = uuid.uuid4().hex[:12]
+        self.files = files
+        self.runner = None
+        self.events = []
+        self.finished = False
+        self._cond = threading.Condition()
+
+    def add(self, event):
+        with self._cond:
+            self.events.append(event)
+            if event['event'] == 'summary':
+                self.finished = True
+            self._cond.notify_all()
+
+    def wait(self, since, timeout=None):
+        """
+        Wait for events after the first `since`.
+
+        Returns:
+            tuple: The new events, and whether the job has finished.
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: len(self.events) > since or self.finished, timeout)
+            return self.events[since:], self.finished
+
+
+class WorkerDaemon:
+    """
+    Runs jobs with one set of long-lived resources: a translation memory, a transcript
+    cache, a rate limit shared by every job, and translation backends and
+    transcription clients that are created on first use and then kept.
+
+    Each job is a `cli.BatchRunner` run on its own thread.
+    """
+
+    def __init__(self, rate=DEFAULT_RATE, use_cache=True, memory=None, cache=None, keep_jobs=KEEP_JOBS):
+        """
+        Args:
+            rate (float): Requests per second across all jobs, or None for no limit.
+            use_cache (bool): Use the translation memory and the transcript cache.
+            memory (TranslationMemory): Translation memory; defaults to the on-disk memory.
+            cache (StageCache): Transcript cache; defaults to the shared cache directory.
+            keep_jobs (int): Finished jobs remembered for `events`.
+        """
+        from stage_cache import StageCache
+        from translation_memory import TranslationMemory
+        from translators import RateLimiter
+        self.limiter = RateLimiter(rate) if rate else None
+        self.memory = (memory or TranslationMemory()) if use_cache else None
+        self.cache = (cache or StageCache()) if use_cache else None
+        self.keep_jobs = keep_jobs
+        self.backends = {}
+        self.transcribers = {}
+        self.jobs = {}
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+    def transcriber(self, name):
+        """
+        The transcription client for `name`, created the first time it is asked for.
+        """
+        from transcription import make_transcriber
+        with self._lock:
+            if name not in self.transcribers:
+                self.transcribers[name] = make_transcriber(name)
+            return self.transcribers[name]
+
+    def warm(self, targets, backend='google', url=None, model=None, transcriber=None):
+        """
+        Create the backends for `targets` (loading a local model) and the transcription
+        client before the first job needs them.
+        """
+        from cli import BatchRunner
+        runner = BatchRunner(targets, backend=backend, url=url, model=model, backends=self.backends)
+        engines = [runner.backend_for(target) for target in targets]
+        if transcriber:
+            engines.append(self.transcriber(transcriber))
+        for engine in engines:
+            if hasattr(engine, '_load'):   # Local models load on first use otherwise
+                engine._load()
+
+    def submit(self, files, targets=(), jobs=None, transcriber=None, backend='google', url=None, model=None,
+               workers=DEFAULT_WORKERS, force=False, incremental=False, trim=False, use_cache=True):
+        """
+        Start processing files on a thread of their own, as `cli.py` would.
+
+        Args:
+            files (list): Absolute paths of audio and SRT files.
+            targets (list): Languages to translate into.
+            jobs (int): Files of this job processed at the same time.
+            transcriber (str): Transcriber name; defaults to `DEFAULT_TRANSCRIBER`.
+            backend, url, model, workers, force, incremental, trim: As for `cli.BatchRunner`.
+            use_cache (bool): Use the daemon's translation memory and transcript cache.
+
+        Returns:
+            DaemonJob: The job, already running.
+
+        Raises:
+            ValueError: If a path is not absolute or the transcriber name is unknown.
+        """
+        from cli import BatchRunner, DEFAULT_JOBS
+        from subtitle_core import AUDIO_EXTENSIONS
+        from transcription import DEFAULT_TRANSCRIBER
+        if not all(os.path.isabs(f) for f in files):
+            raise ValueError("File paths sent to the daemon must be absolute")
+        needs_transcriber = any(f.lower().endswith(AUDIO_EXTENSIONS) for f in files)
+        job = DaemonJob(list(files))
+        job.runner = BatchRunner(
+            targets, jobs=jobs or DEFAULT_JOBS,
+            transcriber=self.transcriber(transcriber or DEFAULT_TRANSCRIBER) if needs_transcriber else None,
+            backend=backend, url=url, model=model, workers=workers, rate=self.limiter,
+            memory=self.memory if use_cache else None, cache=self.cache if use_cache else None, force=force,
+            incremental=incremental, trim=trim, on_event=job.add, backends=self.backends)
+        with self._lock:
+            self.jobs[job.id] = job
+            finished = [j for j in self.jobs.values() if j.finished]
+            for old in finished[:max(0, len(finished) - self.keep_jobs)]:
+                del self.jobs[old.id]
+        tracing.count('daemon.jobs')
+        threading.Thread(target=self._run, args=(job,), daemon=True).start()
+        return job
+
+    def _run(self, job):
+        with tracing.span('daemon.job', job=job.id, files=len(job.files)):
+            try:
+                job.runner.run(job.files)
+            except Exception as e:
+                # BatchRunner reports failures per file; this is a bug, but the client must not hang.
+                job.add({'event': 'summary', 'files': len(job.files), 'seconds': 0, 'done': 0, 'skipped': 0,
+                         'failed': len(job.files), 'cancelled': 0, 'error': f"{type(e).__name__}: {e}"})
+
+    def cancel(self, job_id=None):
+        """
+        Cancel one job, or every running job if `job_id` is None.
+        """
+        with self._lock:
+            jobs = list(self.jobs.values()) if job_id is None else [self.jobs[job_id]]
+        for job in jobs:
+            job.runner.cancel_event.set()
+
+    def status(self):
+        """
+        Describe the daemon: uptime, jobs, and the backends and clients it holds.
+        """
+        with self._lock:
+            running = sum(not job.finished for job in self.jobs.values())
+            finished = len(self.jobs) - running
+        status = {
+            'pid': os.getpid(), 'uptime': round(time.time() - self.started, 1),
+            'running': running, 'finished': finished,
+            'backends': sorted(f"{key[0]}:{key[1]}" for key in self.backends),
+            'transcribers': sorted(self.transcribers),
+        }
+        if self.memory is not None:
+            status['memory'] = {'hits': self.memory.hits, 'misses': self.memory.misses}
+        return status
+
+    def close(self, timeout=10.0):
+        """
+        Cancel the running jobs, wait for them to stop and close the translation memory.
+        """
+        self.cancel()
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            jobs = list(self.jobs.values())
+        for job in jobs:
+            job.wait(len(job.events), max(0.0, deadline - time.monotonic()))
+        if self.memory is not None:
+            self.memory.close()
+
+
+def make_server(daemon, address=DAEMON_ADDRESS, token_path=TOKEN_PATH):
+    """
+    Create the HTTP server for a daemon; call its `serve_forever()` to start serving.
+
+    A Unix socket is created with owner-only permissions, replacing a stale socket
+    left by a daemon that did not shut down cleanly. The token file is created if
+    needed and made owner-only.
+
+    Raises:
+        OSError: If another daemon is already listening at `address`.
+    """
+    import socketserver
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    token = load_token(token_path, create=True)
+    os.chmod(token_path, 0o600)
+    handler = type('DaemonHandler', (DaemonRoutes, BaseHTTPRequestHandler), {})
+    target = parse_address(address)
+    if isinstance(target, tuple):
+        server = ThreadingHTTPServer(target, handler)
+        server.address = f"{target[0]}:{server.server_address[1]}"
+    else:
+        if os.path.exists(target):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(target)
+            except OSError:
+                os.remove(target)
+            else:
+                raise OSError(f"A worker daemon is already running at {target}")
+            finally:
+                probe.close()
+        os.makedirs(os.path.dirname(os.path.abspath(target)), exist_ok=True)
+
+        class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+            daemon_threads = True
+
+        server = UnixHTTPServer(target, handler)
+        os.chmod(target, 0o600)
+        server.address = target
+    server.daemon = daemon
+    server.token = token
+    return server
+
+
+class DaemonRoutes:
+    # The daemon's requests; `make_server` mixes this into `BaseHTTPRequestHandler`.
+    #
+    # GET  /status                      -> daemon status
+    # POST /jobs                        -> {"id": ...}; body: {"files": [...], options of `WorkerDaemon.submit`}
+    # GET  /jobs/<id>/events?since=N    -> the job's events as JSON lines, streamed until its summary
+    # POST /jobs/<id>/cancel
+    # POST /shutdown
+    #
+    # Requests without the token, with another Host than localhost (DNS rebinding) or
+    # POSTs that are not JSON (what a web page can send without asking) are refused.
+
+    def _reply(self, data, status=200):
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _job(self, job_id):
+        job = self.server.daemon.jobs.get(job_id)
+        if job is None:
+            self._reply({'error': f"No such job: {job_id}"}, 404)
+        return job
+
+    def _allowed(self):
+        # Check the request comes from a client of this user; reply with an error if not.
+        import hmac
+        host = (self.headers.get('Host') or '').lower()
+        name, sep, port = host.rpartition(':')
+        if not (sep and port.isdigit()):
+            name = host
+        if name not in LOCAL_HOSTS:
+            self._reply({'error': f"Host not allowed: {host}"}, 403)
+            return False
+        token = self.headers.get(TOKEN_HEADER) or ''
+        if not hmac.compare_digest(token.encode('utf-8'), self.server.token.encode('utf-8')):
+            self._reply({'error': "Missing or wrong token"}, 403)
+            return False
+        content_type = (self.headers.get('Content-Type') or '').split(';')[0].strip().lower()
+        if self.command == 'POST' and content_type != 'application/json':
+            self._reply({'error': "Requests must be application/json"}, 415)
+            return False
+        return True
+
+    def do_GET(self):
+        if not self._allowed():
+            return
+        path, _, query = self.path.partition('?')
+        parts = path.strip('/').split('/')
+        if parts == ['status']:
+            self._reply(self.server.daemon.status())
+        elif len(parts) == 3 and parts[0] == 'jobs' and parts[2] == 'events':
+            job = self._job(parts[1])
+            if job is not None:
+                from urllib.parse import parse_qs
+                since = parse_qs(query).get('since', ['0'])[0]
+                self._stream(job, int(since) if since.isdigit() else 0)
+        else:
+            self._reply({'error': f"Not found: {path}"}, 404)
+
+    def _stream(self, job, since):
+        # No Content-Length: the events are written as they come and the connection
+        # is closed after the summary.
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.end_headers()
+        finished = False
+        while not finished:
+            events, finished = job.wait(since, timeout=1.0)
+            since += len(events)
+            try:
+                self.wfile.write(''.join(json.dumps(e, ensure_ascii=False) + '\n' for e in events).encode('utf-8'))
+                self.wfile.flush()
+            except OSError:
+                break   # The client went away; the job carries on
+        self.close_connection = True
+
+    def do_POST(self):
+        if not self._allowed():
+            return
+        parts = self.path.strip('/').split('/')
+        length = int(self.headers.get('Content-Length', 0))
+        try:
+            payload = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            self._reply({'error': "Request body is not JSON"}, 400)
+            return
+        daemon = self.server.daemon
+        if parts == ['jobs']:
+            try:
+                job = daemon.submit(**payload)
+            except (TypeError, ValueError) as e:
+                self._reply({'error': str(e)}, 400)
+                return
+            self._reply({'id': job.id})
+        elif len(parts) == 3 and parts[0] == 'jobs' and parts[2] == 'cancel':
+            if self._job(parts[1]) is not None:
+                daemon.cancel(parts[1])
+                self._reply({'id': parts[1]})
+        elif parts == ['shutdown']:
+            self._reply({'pid': os.getpid()})
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+        else:
+            self._reply({'error': f"Not found: {self.path}"}, 404)
+
+    def log_message(self, format, *args):
+        pass    # Job events are the log
+
+
+class DaemonClient:
+    """
+    Sends jobs to a running `WorkerDaemon` and reads back their events.
+
+    `transcribe_to_srt` and `translate_srt` have the signatures `JobQueue` expects,
+    so the GUI can hand its work to the daemon unchanged.
+    """
+
+    def __init__(self, address=None, timeout=CONNECT_TIMEOUT, token=None):
+        """
+        Args:
+            address (str): Socket path or host:port; defaults to `DAEMON_ADDRESS`.
+            timeout (float): Seconds to wait for each reply (event streams wait indefinitely).
+            token (str): The daemon's token; read from `TOKEN_PATH` when needed by default.
+        """
+        self.address = address or DAEMON_ADDRESS
+        self.timeout = timeout
+        self.token = token
+
+    def _open(self, method, path, payload=None, timeout=None):
+        # Send an HTTP/1.0 request; return the socket, its reader (past the headers) and the status.
+        target = parse_address(self.address)
+        if isinstance(target, tuple):
+            sock = socket.create_connection(target, timeout)
+        else:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(timeout)
+            try:
+                sock.connect(target)
+            except OSError:
+                sock.close()
+                raise
+        try:
+            body = b'' if payload is None else json.dumps(payload).encode('utf-8')
+            token = self.token or load_token()
+            sock.sendall(f"{method} {path} HTTP/1.0\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+                         f"{TOKEN_HEADER}: {token}\r\nContent-Length: {len(body)}\r\n\r\n".encode('ascii') + body)
+            reader = sock.makefile('rb')
+            status = int(reader.readline().split()[1])
+            while reader.readline().strip():
+                pass
+        except (OSError, ValueError, IndexError):
+            sock.close()
+            raise
+        return sock, reader, status
+
+    def _request(self, method, path, payload=None):
+        sock, reader, status = self._open(method, path, payload, self.timeout)
+        try:
+            data = json.loads(reader.read() or b'{}')
+        finally:
+            reader.close()
+            sock.close()
+        if status != 200:
+            raise DaemonError(status, data.get('error', ''))
+        return data
+
+    def ping(self):
+        """
+        Ask the daemon for its status.
+
+        Returns:
+            dict: The status, or None if no daemon answers at the address.
+
+        Raises:
+            DaemonError: If a daemon answers but refuses the request (e.g. a wrong token).
+        """
+        try:
+            return self._request('GET', '/status')
+        except (OSError, ValueError, IndexError):
+            return None
+
+    def submit(self, files, **options):
+        """
+        Start a job; see `WorkerDaemon.submit` for the options.
+
+        Returns:
+            str: The job id.
+        """
+        return self._request('POST', '/jobs', dict(options, files=[os.path.abspath(f) for f in files]))['id']
+
+    def events(self, job_id, since=0):
+        """
+        Yield the events of a job as they happen, ending with its summary.
+        """
+        sock, reader, status = self._open('GET', f'/jobs/{job_id}/events?since={since}')
+        try:
+            if status != 200:
+                raise DaemonError(status, json.loads(reader.read() or b'{}').get('error', ''))
+            for line in reader:
+                yield json.loads(line)
+        finally:
+            reader.close()
+            sock.close()
+
+    def cancel(self, job_id):
+        self._request('POST', f'/jobs/{job_id}/cancel', {})
+
+    def shutdown(self):
+        self._request('POST', '/shutdown', {})
+
+    def run(self, files, on_event=None, cancel_event=None, **options):
+        """
+        Run a job and wait for it, like `cli.BatchRunner.run`.
+
+        Args:
+            files (list): Input files; relative paths are made absolute, and events name
+                files as they were given here.
+            on_event (callable): Called with each event dict.
+            cancel_event (threading.Event): When set, the job is cancelled on the daemon.
+            **options: Job options (see `WorkerDaemon.submit`).
+
+        Returns:
+            dict: The summary event.
+        """
+        names = {os.path.abspath(f): f for f in files}
+        job_id = self.submit(files, **options)
+        done = threading.Event()
+        if cancel_event is not None:
+            threading.Thread(target=self._cancel_when_set, args=(job_id, cancel_event, done), daemon=True).start()
+        summary = None
+        try:
+            for event in self.events(job_id):
+                if 'file' in event:
+                    event['file'] = names.get(event['file'], event['file'])
+                if event['event'] == 'summary':
+                    summary = event
+                if on_event is not None:
+                    on_event(event)
+        finally:
+            done.set()
+        return summary
+
+    def _cancel_when_set(self, job_id, cancel_event, done):
+        while not done.is_set():
+            if cancel_event.wait(0.2):
+                self.cancel(job_id)
+                return
+
+    def _run_file(self, path, targets, cancel_event, on_progress, **options):
+        # Run one file as its own job; raise like the local function would.
+        errors = []
+
+        def handle(event):
+            if event['event'] == 'error':
+                errors.append(event['error'])
+            elif event['event'] == 'progress' and on_progress is not None:
+                on_progress(event)
+
+        summary = self.run([path], handle, cancel_event, targets=targets, jobs=1, force=True, **options)
+        if errors or summary.get('error'):
+            raise RuntimeError(errors[0] if errors else summary['error'])
+        if summary['cancelled'] or (cancel_event is not None and cancel_event.is_set()):
+            raise Cancelled()
+
+    def transcribe_to_srt(self, audio_path, srt_path, on_status=None, cancel_event=None, **options):
+        """
+        Transcribe an audio file on the daemon, like `subtitle_core.transcribe_to_srt`.
+
+        The SRT is written next to the audio, so `srt_path` must be that path. Other
+        job options (e.g. `transcriber`, `trim`) are passed on.
+        """
+        if os.path.abspath(srt_path) != os.path.abspath(f"{os.path.splitext(audio_path)[0]}.srt"):
+            raise ValueError("The daemon writes the SRT next to the audio file")
+        self._run_file(audio_path, [], cancel_event,
+                       on_status and (lambda event: on_status(event['status'])), **options)
+        return srt_path
+
+    def translate_srt(self, input_path, output_path, on_progress=None, cancel_event=None, target='bn',
+                      incremental=True, **options):
+        """
+        Translate an SRT file on the daemon, like `subtitle_core.translate_srt`.
+
+        `output_path` must be `translated_path(input_path, target)`. Other job options
+        (e.g. `backend`) are passed on.
+        """
+        from subtitle_core import translated_path
+        if os.path.abspath(output_path) != os.path.abspath(translated_path(input_path, target)):
+            raise ValueError(f"The daemon writes the translation to {translated_path(input_path, target)}")
+        self._run_file(input_path, [target], cancel_event,
+                       on_progress and (lambda event: on_progress(event['done'], event['total'])),
+                       incremental=incremental, **options)
+
+
+def connect(address=None):
+    """
+    Find a running daemon.
+
+    Returns:
+        DaemonClient: A client for it, or None if no daemon answers at `address`
+            (default `DAEMON_ADDRESS`).
+    """
+    client = DaemonClient(address)
+    try:
+        return client if client.ping() is not None else None
+    except DaemonError:
+        return None     # One we may not use, e.g. another user's
+
+
+def serve(address=DAEMON_ADDRESS, rate=DEFAULT_RATE, use_cache=True, warm=(), backend='google', url=None,
+          model=None, transcriber=None):
+    """
+    Run a daemon until it is told to stop (`DaemonClient.shutdown`) or interrupted.
+    """
+    daemon = WorkerDaemon(rate=rate, use_cache=use_cache)
+    server = make_server(daemon, address)
+    if warm or transcriber:
+        daemon.warm(list(warm), backend=backend, url=url, model=model, transcriber=transcriber)
+    print(f"Worker daemon {os.getpid()} listening on {server.address}", file=sys.stderr)
+    try:
+        server.serve_forever(poll_interval=0.5)
+    finally:
+        server.server_close()
+        daemon.close()
+        if not isinstance(parse_address(server.address), tuple):
+            try:
+                os.remove(server.address)
+            except OSError:
+                pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Keep translators, caches and models warm for many small jobs.")
+    parser.add_argument('--address', default=DAEMON_ADDRESS, help="Unix socket path or host:port")
+    commands = parser.add_subparsers(dest='command', required=True)
+    start = commands.add_parser('serve', help="Run the daemon in the foreground")
+    start.add_argument('--rate', type=float, default=DEFAULT_RATE,
+                       help="Requests per second across all jobs, 0 for no limit")
+    start.add_argument('--no-cache', action='store_true',
+                       help="Use neither the translation memory nor the transcript cache")
+    start.add_argument('--warm', nargs='*', default=[], metavar='TARGET',
+                       help="Languages whose translation backends are created (and models loaded) at start")
+    start.add_argument('--backend', default='google', choices=['google', 'libre', 'local', 'fake'],
+                       help="Backend for --warm")
+    start.add_argument('--url', help="Service URL for the 'libre' backend")
+    start.add_argument('--model', help="CTranslate2 model directory for the 'local' backend")
+    start.add_argument('--transcriber', choices=['assemblyai', 'whisper'],
+                       help="Transcription client to create (and model to load) at start")
+    start.add_argument('--trace', help="Write a timing trace to this file (.json for Chrome, .jsonl)")
+    commands.add_parser('status', help="Show whether a daemon is running and what it holds")
+    commands.add_parser('stop', help="Cancel running jobs and stop the daemon")
+    args = parser.parse_args(argv)
+
+    if args.command == 'serve':
+        if args.trace:
+            tracing.enable(args.trace)
+        try:
+            serve(args.address, rate=args.rate or None, use_cache=not args.no_cache, warm=args.warm,
+                  backend=args.backend, url=args.url, model=args.model, transcriber=args.transcriber)
+        except KeyboardInterrupt:
+            return 130
+        except OSError as e:
+            print(e, file=sys.stderr)
+            return 1
+        return 0
+    client = DaemonClient(args.address)
+    try:
+        status = client.ping()
+    except DaemonError as e:
+        print(f"Worker daemon at {client.address} refused the request: {e}", file=sys.stderr)
+        return 1
+    if status is None:
+        print(f"No worker daemon at {client.address}", file=sys.stderr)
+        return 1
+    if args.command == 'stop':
+        client.shutdown()
+        print(f"Stopped worker daemon {status['pid']}")
+    else:
+        print(json.dumps(status, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())